@@ -0,0 +1,67 @@
+"""Synthetic corpora and queries, generated deterministically from a seed."""
+
+import os
+import random
+from typing import List
+
+_SYLLABLES = ["ka", "lo", "mi", "ten", "ra", "vu", "sel", "do", "ni", "pra", "ge", "tor", "su", "ba", "lin"]
+_FUNCTION_WORDS = ["the", "of", "and", "for", "with", "is", "in", "to", "a", "on"]
+_QUERY_TEMPLATES = [
+    "What is {a}?",
+    "How does {a} affect {b}?",
+    "Compare {a} and {b}, which one is better for {c}?",
+    "Could {a} maybe be related to {b} or something like {c} in some way?",
+    "List the {a} requirements and the {b} costs for a large {c} team.",
+]
+
+
+def _vocabulary(rng: random.Random, size: int) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _sentence(rng: random.Random, topic: List[str], vocab: List[str]) -> str:
+    words = [
+        rng.choice(topic) if rng.random() < 0.5 else rng.choice(_FUNCTION_WORDS + vocab)
+        for _ in range(rng.randint(8, 20))
+    ]
+    return " ".join(words).capitalize() + "."
+
+
+def write_corpus(dest_dir: str, n_docs: int, sentences_per_doc: int = 40, seed: int = 0) -> List[str]:
+    """
+    Write `n_docs` text documents (roughly a page each) to `dest_dir`.
+    Each document is about a few topic words, so that queries built from
+    the same vocabulary have clear nearest neighbours.
+    """
+    rng = random.Random(seed)
+    vocab = _vocabulary(rng, 2000)
+    os.makedirs(dest_dir, exist_ok=True)
+    paths = []
+    for i in range(n_docs):
+        topic = rng.sample(vocab, 5)
+        paragraphs = []
+        for _ in range(sentences_per_doc // 5):
+            paragraphs.append(" ".join(_sentence(rng, topic, vocab) for _ in range(5)))
+        path = os.path.join(dest_dir, f"doc_{i:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+        paths.append(path)
+    return paths
+
+
+def make_queries(n_queries: int, seed: int = 0) -> List[str]:
+    """Distinct queries of varying shape, so that every route gets exercised."""
+    rng = random.Random(seed)
+    vocab = _vocabulary(random.Random(seed), 2000)
+    queries: List[str] = []
+    seen = set()
+    while len(queries) < n_queries:
+        template = _QUERY_TEMPLATES[len(queries) % len(_QUERY_TEMPLATES)]
+        query = template.format(a=rng.choice(vocab), b=rng.choice(vocab), c=rng.choice(vocab))
+        if query not in seen:
+            seen.add(query)
+            queries.append(query)
+    return queries
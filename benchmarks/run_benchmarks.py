@@ -0,0 +1,183 @@
+"""
+End-to-end latency benchmark, fully offline.
+
+Starts the local chat/embedding stand-ins (stub_server.py), points a
+throwaway project directory (settings, .env, caches, index) at them,
+then for each corpus size:
+    1. ingests a synthetic corpus into a fresh index, and
+    2. answers a set of distinct queries with `RAGEngine.generate_answer`,
+and reports p50/p95/p99 per pipeline stage.
+
+    python benchmarks/run_benchmarks.py --sizes 10,100,500 --queries 50
+    python benchmarks/run_benchmarks.py --chat-latency-ms 0 --json results.json
+
+Caches (answers, translations, query embeddings on disk) are disabled
+unless --with-caches is given, so each query pays for the whole pipeline.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJ_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(PROJ_DIR / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from corpus import make_queries, write_corpus  # noqa: E402
+from stub_server import StubServer, add_latency_args, latency_from_args  # noqa: E402
+
+PERCENTILES = (50, 95, 99)
+
+
+def create_project_dir(root: str, stub_url: str, with_caches: bool) -> str:
+    """A project directory whose settings point every remote call at the stub."""
+    with open(PROJ_DIR / "settings.json", encoding="utf-8") as f:
+        settings = json.load(f)
+    settings["HF_ROUTER_URL"] = f"{stub_url}/v1"
+    settings["MODELS"]["DEFAULT_CHAT_MODEL"] = "stub-chat"
+    settings["MODELS"]["DEFAULT_EMB_MODEL"] = "stub-embeddings"
+    settings["EMBEDDINGS"]["ENDPOINT_URL"] = f"{stub_url}/embed"
+    settings["EMBEDDINGS"]["RETRY_BACKOFF_S"] = 0.0
+    settings["OCR"]["ENABLED"] = False
+    if not with_caches:
+        settings["ANSWER_CACHE"]["ENABLED"] = False
+        settings["TRANSLATION_CACHE"]["ENABLED"] = False
+        settings["QUERY_EMBEDDING_CACHE"]["DISK_TIER"] = False
+    proj_dir = os.path.join(root, "project")
+    os.makedirs(proj_dir)
+    with open(os.path.join(proj_dir, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=4)
+    with open(os.path.join(proj_dir, ".env"), "w", encoding="utf-8") as f:
+        f.write("HF_TOKEN=offline\nOPENAI_API_KEY=offline\nLANGCHAIN_API_KEY=offline\n")
+    return proj_dir
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.percentile(np.asarray(samples) * 1000, PERCENTILES)
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, values)}
+
+
+def bench_size(n_docs: int, n_queries: int, work_dir: str, stub: StubServer) -> Dict:
+    # Imported late: the configuration is read from PROJ_DIR on first import.
+    from langchain_core.prompts import PromptTemplate
+
+    from chain import ChromaDocumentRetriever, OpenAIChatModel, SemanticTextSplitter
+    from chain.routing import HeuristicAnalyzer
+    from core.config import load_conf
+    from core.types import HeuristicAnalysisParameters
+    from services.AnswerCache import AnswerCache
+    from services.IngestionPipeline import IngestionPipeline
+    from services.RAGEngine import RAGEngine
+
+    files = write_corpus(os.path.join(work_dir, f"corpus_{n_docs}"), n_docs)
+    splitter = SemanticTextSplitter()
+    retriever = ChromaDocumentRetriever(
+        docs=[], text_splitter=splitter, chroma_index_dir=os.path.join(work_dir, f"index_{n_docs}")
+    )
+    emb_calls = stub.stats.emb_calls
+    ingestion = IngestionPipeline(retriever).run(files)
+    ingestion_emb_calls = stub.stats.emb_calls - emb_calls
+    splitter.close()
+
+    with load_conf() as conf:
+        engine = RAGEngine(
+            doc_retriever=retriever,
+            chat_model=OpenAIChatModel(),
+            sys_prompt_template=PromptTemplate(
+                input_variables=conf.prompt_templs.system.input_variables,
+                template=conf.prompt_templs.system.template,
+            ),
+            answer_cache=AnswerCache(retriever.query_embedder) if conf.answer_cache.enabled else None,
+        )
+    engine.warm_up()
+    queries = make_queries(n_queries, seed=n_docs)
+    # The routing heuristics alone, without the rest of the pipeline.
+    HeuristicAnalyzer.analyze_batch(queries[:1], HeuristicAnalysisParameters())  # compiles the rules
+    start = time.perf_counter()
+    HeuristicAnalyzer.analyze_batch(queries, HeuristicAnalysisParameters())
+    analysis_seconds = time.perf_counter() - start
+    chat_calls = stub.stats.chat_calls
+    stages: Dict[str, List[float]] = {}
+    start = time.perf_counter()
+    for query in queries:
+        trace = engine.generate_answer_traced(query)
+        for stage, seconds in trace.timings.items():
+            stages.setdefault(stage, []).append(seconds)
+    query_seconds = time.perf_counter() - start
+    return {
+        "docs": n_docs,
+        "ingestion": {
+            "seconds": ingestion.seconds,
+            "pages_per_s": ingestion.pages_per_s,
+            "chunks": ingestion.chunks_indexed,
+            "embedding_calls": ingestion_emb_calls,
+        },
+        "queries": {
+            "count": n_queries,
+            "queries_per_s": n_queries / query_seconds if query_seconds > 0 else 0.0,
+            "llm_calls_per_query": (stub.stats.chat_calls - chat_calls) / n_queries,
+            "analysis_us_per_query": analysis_seconds / n_queries * 1e6,
+        },
+        "stages_ms": {stage: percentiles(samples) for stage, samples in stages.items()},
+    }
+
+
+def print_report(results: List[Dict]):
+    for res in results:
+        ing, qs = res["ingestion"], res["queries"]
+        print(f"\n== {res['docs']} documents ==")
+        print(
+            f"ingestion: {ing['seconds']:.2f}s, {ing['pages_per_s']:.1f} pages/s, "
+            f"{ing['chunks']} chunks, {ing['embedding_calls']} embedding calls"
+        )
+        print(
+            f"queries:   {qs['count']} in total, {qs['queries_per_s']:.2f} queries/s, "
+            f"{qs['llm_calls_per_query']:.1f} LLM calls/query, "
+            f"{qs['analysis_us_per_query']:.1f}us/query in the analyzer"
+        )
+        print(f"{'stage':<14}" + "".join(f"{f'p{p} (ms)':>12}" for p in PERCENTILES))
+        for stage, pcts in res["stages_ms"].items():
+            print(f"{stage:<14}" + "".join(f"{pcts[f'p{p}']:>12.1f}" for p in PERCENTILES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency benchmark.")
+    parser.add_argument("--sizes", default="10,100,500", help="Comma-separated corpus sizes (documents).")
+    parser.add_argument("--queries", type=int, default=50, help="Queries answered per corpus size.")
+    parser.add_argument("--with-caches", action="store_true", help="Keep the answer/translation caches on.")
+    parser.add_argument("--json", default=None, help="Also write the results to this file.")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary project directory.")
+    add_latency_args(parser)
+    args = parser.parse_args()
+
+    stub = StubServer(latency=latency_from_args(args)).start()
+    work_dir = tempfile.mkdtemp(prefix="rag-bench-")
+    os.environ["PROJ_DIR"] = create_project_dir(work_dir, stub.url, args.with_caches)
+    # Never send traces anywhere.
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    os.environ["LANGSMITH_TRACING"] = "false"
+    try:
+        results = [
+            bench_size(int(size), args.queries, work_dir, stub) for size in args.sizes.split(",")
+        ]
+    finally:
+        stub.stop()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+A local stand-in for the two remote endpoints the pipeline talks to:
+
+    POST /v1/chat/completions   OpenAI-compatible chat (plain and streamed)
+    POST /embed                 HF Inference feature extraction ({"inputs": [...]})
+
+Responses are deterministic functions of the request, and every call
+sleeps for a configurable latency, so benchmark runs are repeatable and
+need no network. Run it on its own to point a manual session at it:
+
+    python benchmarks/stub_server.py --port 8765 --chat-latency-ms 300
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+_WORD_RE = re.compile(r"\w+")
+_QUANTITY_RE = re.compile(r"\b(\d+)\b")
+
+
+@dataclass
+class StubLatency:
+    chat_first_token_ms: float = 200.0  # before the first token (or the whole answer)
+    chat_per_token_ms: float = 5.0
+    emb_per_request_ms: float = 20.0
+    emb_per_text_ms: float = 0.5
+
+
+@dataclass
+class StubStats:
+    chat_calls: int = 0
+    emb_calls: int = 0
+    emb_texts: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def count(self, **deltas: int):
+        with self._lock:
+            for k, v in deltas.items():
+                setattr(self, k, getattr(self, k) + v)
+
+
+def embed(text: str, dim: int) -> List[float]:
+    """Hashed bag of words: texts sharing words end up close to each other."""
+    vec = [0.0] * dim
+    for word in _WORD_RE.findall(text.lower()):
+        h = int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little")
+        vec[h % dim] += 1.0 if h & 1 << 31 else -1.0
+    norm = sum(v * v for v in vec) ** 0.5 or 1.0
+    return [v / norm for v in vec]
+
+
+def complete(prompt: str, answer_tokens: int) -> List[str]:
+    """
+    Deterministic completion, as a list of tokens. Translation prompts
+    (which ask for a small number of alternatives) get that many lines
+    built from the prompt's own words; anything else, including the
+    answer prompt (the one with a context), gets a fixed-size answer.
+    """
+    words = _WORD_RE.findall(prompt.lower())
+    seed = int(hashlib.md5(prompt.encode()).hexdigest(), 16)
+    m = _QUANTITY_RE.search(prompt)
+    if "Context:" not in prompt and m and int(m.group(1)) < 10:
+        lines = []
+        for i in range(int(m.group(1))):
+            picked = [words[(seed >> (4 * j + i)) % len(words)] for j in range(8)]
+            lines.append(" ".join(picked) + "?")
+        return [f"{line}\n" for line in lines]
+    return [f"{words[(seed >> (j % 64)) % len(words)] if words else 'token'} " for j in range(answer_tokens)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path.endswith("/chat/completions"):
+            self._chat(body)
+        elif self.path.rstrip("/").endswith("/embed"):
+            self._embed(body)
+        else:
+            self.send_error(404)
+
+    def _chat(self, body: Dict):
+        srv = self.server
+        srv.stats.count(chat_calls=1)
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        tokens = complete(prompt, srv.answer_tokens)
+        time.sleep(srv.latency.chat_first_token_ms / 1000)
+        if not body.get("stream"):
+            time.sleep(srv.latency.chat_per_token_ms * len(tokens) / 1000)
+            self._send_json({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens),
+                          "total_tokens": len(prompt.split()) + len(tokens)},
+            })
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i, token in enumerate(tokens + [None]):
+            if i > 0:
+                time.sleep(srv.latency.chat_per_token_ms / 1000)
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": token} if token is not None else {},
+                    "finish_reason": None if token is not None else "stop",
+                }],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _embed(self, body: Dict):
+        srv = self.server
+        texts = body.get("inputs", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        srv.stats.count(emb_calls=1, emb_texts=len(texts))
+        time.sleep((srv.latency.emb_per_request_ms + srv.latency.emb_per_text_ms * len(texts)) / 1000)
+        self._send_json([embed(t, srv.emb_dim) for t in texts])
+
+    def _send_json(self, data):
+        payload = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: StubLatency = None,
+        emb_dim: int = 64,
+        answer_tokens: int = 64,
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency or StubLatency()
+        self.emb_dim = emb_dim
+        self.answer_tokens = answer_tokens
+        self.stats = StubStats()
+        self._thread: threading.Thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def add_latency_args(parser: argparse.ArgumentParser):
+    defaults = StubLatency()
+    parser.add_argument("--chat-latency-ms", type=float, default=defaults.chat_first_token_ms,
+                        help="Chat latency before the first token.")
+    parser.add_argument("--token-latency-ms", type=float, default=defaults.chat_per_token_ms,
+                        help="Chat latency per generated token.")
+    parser.add_argument("--emb-latency-ms", type=float, default=defaults.emb_per_request_ms,
+                        help="Embedding latency per request.")
+    parser.add_argument("--emb-text-latency-ms", type=float, default=defaults.emb_per_text_ms,
+                        help="Embedding latency per text in a request.")
+
+
+def latency_from_args(args: argparse.Namespace) -> StubLatency:
+    return StubLatency(
+        chat_first_token_ms=args.chat_latency_ms,
+        chat_per_token_ms=args.token_latency_ms,
+        emb_per_request_ms=args.emb_latency_ms,
+        emb_per_text_ms=args.emb_text_latency_ms,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for the chat and embedding endpoints.")
+    parser.add_argument("--port", type=int, default=8765)
+    add_latency_args(parser)
+    args = parser.parse_args()
+    server = StubServer(port=args.port, latency=latency_from_args(args))
+    print(f"Chat: {server.url}/v1  Embeddings: {server.url}/embed")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -1,20 +1,34 @@
 import logging
+import os
 import sys
+from typing import TYPE_CHECKING
 
-import anyio
-
-from app_composition import build_rag_engine, setup_langsmith, init_logs
+from app_composition import (
+    STARTUP_IMPORTS,
+    build_rag_engine,
+    dump_metrics_on_exit,
+    get_web_mode_filepaths,
+    init_logs,
+    setup_langsmith,
+)
 from core.types import QueryStr
-from services.RAGEngine import RAGEngine
 from utilities import string, cli
 
+if TYPE_CHECKING:
+    from services.RAGEngine import RAGEngine
+
 setup_langsmith()
 
-rag_svc: RAGEngine
+rag_svc: "RAGEngine"
 logger: logging.Logger
 
 
-def run_web_mode(rag_svc: RAGEngine):
+def run_web_mode(rag_svc: "RAGEngine"):
+    """
+    Register the Chainlit handlers. All sessions share `rag_svc`
+    (one index, one set of connections); a session only holds its
+    own chat history, so starting one doesn't depend on corpus size.
+    """
     logger.info("Running web mode")
     try:
         import chainlit as cl
@@ -25,9 +39,6 @@ def run_web_mode(rag_svc: RAGEngine):
 
     @cl.on_chat_start
     def start():
-        # ! Might want to reconsider for production environment.
-        rag_svc = build_rag_engine()
-        cl.user_session.set("rag_engine", rag_svc)
         cl.user_session.set("chat_history", [])
 
     @cl.on_message
@@ -38,33 +49,81 @@ def run_web_mode(rag_svc: RAGEngine):
             ).send()
             return
         text = msg if isinstance(msg, str) else msg.content
-        response = await anyio.to_thread.run_sync(rag_svc.generate_answer, text)
-        await cl.Message(response).send()
+        response = cl.Message(content="")
+        async for token in rag_svc.agenerate_answer_stream(text):
+            await response.stream_token(token)
+        await response.send()
+        cl.user_session.get("chat_history", []).append((text, response.content))
 
 
-def run_terminal_mode(rag_svc: RAGEngine):
+def run_terminal_mode(rag_svc: "RAGEngine"):
     logger.info("Running terminal mode")
     try:
         while True:
             user_input: QueryStr = QueryStr(input(">> "))
             if not user_input:
                 continue
-            response = rag_svc.generate_answer(user_input)
-            print(f"\033[96m{string.format_response(response)}\033[0m")
+            # Print the answer as it is generated instead of waiting for all of it.
+            print("\033[96m", end="", flush=True)
+            for chunk in string.format_response_stream(rag_svc.generate_answer_stream(user_input)):
+                print(chunk, end="", flush=True)
+            print("\033[0m")
     except KeyboardInterrupt:
         print("\nExiting...")
 
 
 if __name__ == "__main__":
+    args = cli.parse_args()
+    if args.import_profile:
+        from utilities import importprofile
+
+        print(importprofile.profile_imports(STARTUP_IMPORTS))
+        sys.exit(0)
     logger = init_logs()
     logger.debug("Logging is configured")
     logger.debug("Starting RAG Assistant Application")
-    args = cli.parse_args()
+    if args.cl:
+        # Chainlit loads this module itself (see below), so the engine
+        # is built there, once for the whole server process.
+        if args.files:
+            os.environ["RAG_FILES"] = os.pathsep.join(args.files)
+        from chainlit.cli import run_chainlit
+
+        run_chainlit(os.path.abspath(__file__))
+        sys.exit(0)
     rag_svc = build_rag_engine(args.files)
     if rag_svc is None:
         raise RuntimeError("RAG Engine has not been initialized.")
-    if args.cl:
-        run_web_mode(rag_svc)
-    else:
-        print("Running in terminal mode. Press Ctrl+C to exit.")
-        run_terminal_mode(rag_svc)
+    if args.batch:
+        from services.BatchRunner import BatchRunner
+
+        dump_metrics_on_exit()
+        output_path = args.batch_output or f"{os.path.splitext(args.batch)[0]}.answers.jsonl"
+        BatchRunner(
+            rag_svc,
+            concurrency=args.concurrency,
+            on_progress=lambda p: cli.show_temp_message(
+                f"Batch: {p.done + p.skipped}/{p.total} answered, {p.failed} failed "
+                f"({p.queries_per_s:.2f} queries/s)"
+            ),
+        ).run(args.batch, output_path)
+        print(f"\nAnswers written to {output_path}")
+        sys.exit(0)
+    if args.serve:
+        from services.APIServer import APIServer
+
+        # Warms the engine up itself, before reporting ready.
+        APIServer(rag_svc).serve(host=args.host, port=args.port)
+        sys.exit(0)
+    dump_metrics_on_exit()
+    # No warm-up here: it costs an LLM request, and one user would only
+    # save the connection setup on the first question.
+    print("Running in terminal mode. Press Ctrl+C to exit.")
+    run_terminal_mode(rag_svc)
+elif "chainlit" in sys.modules:
+    # Loaded by `chainlit run src/app.py`: build and warm up the
+    # engine at process start, not on the first visitor's chat.
+    logger = init_logs()
+    rag_svc = build_rag_engine(get_web_mode_filepaths())
+    rag_svc.warm_up()
+    run_web_mode(rag_svc)
@@ -1,46 +1,45 @@
+import atexit
 import logging
 import os
-from pathlib import Path
-from typing import List
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_core.documents import Document
-from langchain_core.prompts import PromptTemplate
-
-from chain import OpenAIChatModel, ChromaDocumentRetriever, SemanticTextSplitter
 from core.config import load_conf
-from services.RAGEngine import RAGEngine
-from utilities import cli
-
-logger: logging.Logger = logging.getLogger()
+from core.types import IngestionProgress
+from utilities import cli, metrics
+
+# The pipeline (LangChain, Chroma, the OpenAI and HF clients) is only
+# imported by `build_rag_engine`, so that `--help`, argument errors and
+# the Chainlit launcher don't pay for it.
+if TYPE_CHECKING:
+    from services.RAGEngine import RAGEngine
+
+# Everything building the engine imports, for --import-profile: the
+# pipeline's own modules, then the libraries they load on first use.
+STARTUP_IMPORTS = (
+    "app_composition",
+    "services.RAGEngine",
+    "services.IngestionPipeline",
+    "chain.chat_models",
+    "chain.document_retrievers",
+    "chain.text_splitters",
+    "langchain_openai",
+    "langchain_chroma",
+    "langchain_huggingface",
+    "huggingface_hub",
+    "langchain_community.document_loaders",
+    "utilities.pdf",
+)
+
+logger: logging.Logger = logging.getLogger(__name__)
 
 
 # Ensure imports could omit "src".
 # sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 
-def _load_documents_from_file(fpath: str) -> List[Document]:
-    path = Path(fpath)
-    suffix = path.suffix.lower()
-
-    if suffix == ".pdf":
-        loader = PyPDFLoader(str(path))
-        return loader.load()
-
-    if suffix in {".txt", ".text", ".md"}:
-        return [
-            Document(
-                page_content=path.read_text(encoding="utf-8"),
-                metadata={"source": str(path)},
-            )
-        ]
-
-    raise ValueError(
-        f"Unsupported file type: {path.suffix}. Only PDF and text files are supported."
-    )
-
-
 def setup_langsmith():
     with load_conf() as conf:
         os.environ["LANGCHAIN_TRACING_V2"] = "true"
@@ -50,49 +49,134 @@ def setup_langsmith():
         os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 
+_log_listener: Optional[QueueListener] = None
+
+
+def _stop_log_listener():
+    """Write out what is still queued and close the files."""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    _log_listener = None
+
+
+# Registered before anything that logs at exit, so it runs after them.
+atexit.register(_stop_log_listener)
+
+
 @cli.with_temp_message(message="Initializing logs...")
-def init_logs() -> logging.Logger:
+def init_logs(
+    logs_dir: str = None, level: str = None, modules: Dict[str, str] = None
+) -> logging.Logger:
+    """
+    Records are only put on a queue by the logging call; a listener
+    thread formats them and writes the file, so request handling never
+    waits on disk. The level (and per-module overrides) come from the
+    LOGGING section of settings.json.
+    """
+    global _log_listener
     with load_conf() as conf:
-        LOGS_DIR = conf.paths.logs_dir
-    os.makedirs(LOGS_DIR, exist_ok=True)
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        handlers=[
-            logging.FileHandler(
-                os.path.join(
-                    LOGS_DIR, datetime.strftime(datetime.now(), "%Y%m%d_%H%M%S.log")
-                ),
-                mode="a",
-                encoding="utf-8",
-            ),
-        ],
-        force=True,
+        if logs_dir is None:
+            logs_dir = conf.paths.logs_dir
+        if level is None:
+            level = conf.logging.level
+        if modules is None:
+            modules = conf.logging.modules
+    os.makedirs(logs_dir, exist_ok=True)
+    file_handler = logging.FileHandler(
+        os.path.join(logs_dir, datetime.strftime(datetime.now(), "%Y%m%d_%H%M%S.log")),
+        mode="a",
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(name)s: %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+        )
     )
-    return logging.getLogger()
+    _stop_log_listener()
+    # Unbounded: a put never blocks the caller.
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    # No formatter here: formatting is the listener's job.
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level.upper())
+    for name, module_level in modules.items():
+        logging.getLogger(name).setLevel(module_level.upper())
+    return root
+
+
+def dump_metrics_on_exit():
+    """
+    For the modes without a /metrics endpoint: at exit, write everything
+    recorded to logs/metrics_<timestamp>.prom and log a short summary.
+    """
+
+    def dump():
+        with load_conf() as conf:
+            path = os.path.join(
+                conf.paths.logs_dir,
+                datetime.strftime(datetime.now(), "metrics_%Y%m%d_%H%M%S.prom"),
+            )
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(metrics.render_prometheus())
+        logger.info(f"Metrics written to {path}:\n{metrics.format_summary()}")
+
+    atexit.register(dump)
+
+
+def _show_ingestion_progress(progress: IngestionProgress):
+    cli.show_temp_message(
+        f"Ingesting: {progress.files_loaded}/{progress.files_total} files, "
+        f"{progress.pages_loaded} pages, {progress.chunks_indexed} chunks "
+        f"({progress.pages_per_s:.1f} pages/s)"
+    )
+
+
+def get_web_mode_filepaths() -> List[str]:
+    """Files to ingest in web mode, where there are no CLI arguments: `RAG_FILES`, separated by os.pathsep."""
+    return [fpath for fpath in os.getenv("RAG_FILES", "").split(os.pathsep) if fpath]
 
 
 @cli.with_temp_message(message="Building RAG Engine...")
-def build_rag_engine(filepaths: List[str]) -> RAGEngine:
-    docs = []
-    for fpath in filepaths:
-        logger.debug(f"Loading document from {fpath}")
-        docs.extend(_load_documents_from_file(fpath))
+def build_rag_engine(filepaths: List[str]) -> "RAGEngine":
+    from langchain_core.prompts import PromptTemplate
+
+    from chain import OpenAIChatModel, ChromaDocumentRetriever, SemanticTextSplitter
+    from services.AnswerCache import AnswerCache
+    from services.IngestionPipeline import IngestionPipeline
+    from services.RAGEngine import RAGEngine
+
+    # Opens the persisted index; documents are streamed in below.
     doc_retriever = ChromaDocumentRetriever(
-        docs=docs,
+        docs=[],
         text_splitter=SemanticTextSplitter(),
         # Use default config.
         # Use default chroma index directory.
     )
+    IngestionPipeline(doc_retriever, on_progress=_show_ingestion_progress).run(filepaths)
     chat_model = OpenAIChatModel()  # Use default config.
     with load_conf() as conf:
         sys_prompt_template = PromptTemplate(
             input_variables=conf.prompt_templs.system.input_variables,
             template=conf.prompt_templs.system.template,
         )
-    return RAGEngine(
+        # Shares the query embedding cache, so the lookup's embedding is reused by retrieval.
+        answer_cache = AnswerCache(doc_retriever.query_embedder) if conf.answer_cache.enabled else None
+    rag_engine = RAGEngine(
         doc_retriever=doc_retriever,
         chat_model=chat_model,
         sys_prompt_template=sys_prompt_template,
+        answer_cache=answer_cache,
     )
+    # The engine lives as long as the process, whatever the mode.
+    atexit.register(rag_engine.close)
+    return rag_engine
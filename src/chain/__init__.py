@@ -1,9 +1,23 @@
-from .chat_models import OpenAIChatModel
-from .document_retrievers import ChromaDocumentRetriever
-from .text_splitters import SemanticTextSplitter
+import importlib
+
+# Resolved on first access (PEP 562): the adapters pull in LangChain,
+# Chroma and the model clients, which most entry points don't need yet.
+_EXPORTS = {
+    "OpenAIChatModel": ".chat_models",
+    "ChromaDocumentRetriever": ".document_retrievers",
+    "SemanticTextSplitter": ".text_splitters",
+}
 
 __all__ = [
     "OpenAIChatModel",
     "ChromaDocumentRetriever",
     "SemanticTextSplitter",
 ]
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,27 +1,30 @@
 import logging
-from typing import List
+from typing import AsyncIterator, Iterator, List
 
 from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import Runnable
-from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 
 from core.config import load_conf
 from core.types import QueryStr, ResponseStr
+from utilities import metrics
 
-logger: logging.Logger = logging.getLogger()
+logger: logging.Logger = logging.getLogger(__name__)
 
 
 # Interface: ports/ChatModel
 class OpenAIChatModel(Runnable):
     def __init__(self, model_name: str = None, api_key: SecretStr = None):
         logger.debug("Starting OpenAIChatModel initialization")
+        from langchain_openai import ChatOpenAI
+
         with load_conf() as conf:
             if model_name is None:
                 model_name = conf.models.chat_model_name
             if api_key is None:
                 api_key = conf.openai_api_key
+            self.model_name = model_name
             self._llm_model = ChatOpenAI(
                 model=model_name, base_url=conf.paths.hf_router_url, api_key=api_key
             )
@@ -30,12 +33,52 @@ class OpenAIChatModel(Runnable):
     def generate(
         self, prompt_templ: PromptTemplate, query: QueryStr, context: List[Document]
     ) -> ResponseStr:
-        logger.debug(f"Generating the answer for query: {query}")
+        logger.debug("Generating the answer for query: %s", query)
         chain = prompt_templ | self._llm_model
+        metrics.inc("rag_llm_calls_total", op="generate")
         return ResponseStr(
             chain.invoke({"query": query, "context": context}).content
         )
 
+    async def agenerate(
+        self, prompt_templ: PromptTemplate, query: QueryStr, context: List[Document]
+    ) -> ResponseStr:
+        logger.debug("Generating the answer for query: %s", query)
+        chain = prompt_templ | self._llm_model
+        metrics.inc("rag_llm_calls_total", op="generate")
+        return ResponseStr(
+            (await chain.ainvoke({"query": query, "context": context})).content
+        )
+
+    def generate_stream(
+        self, prompt_templ: PromptTemplate, query: QueryStr, context: List[Document]
+    ) -> Iterator[str]:
+        logger.debug("Streaming the answer for query: %s", query)
+        chain = prompt_templ | self._llm_model
+        metrics.inc("rag_llm_calls_total", op="generate_stream")
+        for chunk in chain.stream({"query": query, "context": context}):
+            if chunk.content:
+                yield chunk.content
+
+    async def agenerate_stream(
+        self, prompt_templ: PromptTemplate, query: QueryStr, context: List[Document]
+    ) -> AsyncIterator[str]:
+        logger.debug("Streaming the answer for query: %s", query)
+        chain = prompt_templ | self._llm_model
+        metrics.inc("rag_llm_calls_total", op="generate_stream")
+        async for chunk in chain.astream({"query": query, "context": context}):
+            if chunk.content:
+                yield chunk.content
+
+    def warm_up(self):
+        """Open the connection to the endpoint with a one-token request."""
+        self._llm_model.invoke("ping", max_tokens=1)
+
     # ! Used to make sure compatibility with LangChain pipelines.
     def invoke(self, input, *args, **kwargs):
+        metrics.inc("rag_llm_calls_total", op="invoke")
         return self._llm_model.invoke(input, *args, **kwargs)
+
+    async def ainvoke(self, input, *args, **kwargs):
+        metrics.inc("rag_llm_calls_total", op="invoke")
+        return await self._llm_model.ainvoke(input, *args, **kwargs)
@@ -0,0 +1,75 @@
+import logging
+import shutil
+from pathlib import Path
+from typing import Iterator, List
+
+from langchain_core.documents import Document
+
+from core.config import load_conf
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def _lazy_load_pdf(path: Path) -> Iterator[Document]:
+    """
+    Yields the pages' text layer, except for pages that have none (scans),
+    which are OCRed in parallel while the other pages are being read.
+    """
+    # The PDF loader is only needed once a PDF comes along.
+    from langchain_community.document_loaders import PyPDFLoader
+
+    pages = PyPDFLoader(str(path)).lazy_load()
+    with load_conf() as conf:
+        ocr_enabled = conf.ocr.enabled
+    if not ocr_enabled:
+        yield from pages
+        return
+    # And the OCR libraries (PyMuPDF, tesseract) only when OCR is on.
+    import pytesseract
+
+    from utilities import pdf
+
+    needs_ocr = pdf.triage_pdf_pages(str(path))
+    if not needs_ocr:
+        yield from pages
+        return
+    if shutil.which(pytesseract.pytesseract.tesseract_cmd) is None:
+        logger.warning(f"tesseract is not installed, skipping OCR of {len(needs_ocr)} pages in {path}")
+        yield from pages
+        return
+    logger.debug(f"OCR needed for {len(needs_ocr)} pages of {path}: {needs_ocr}")
+    ocr_texts = pdf.ocr_pdf_pages(str(path), needs_ocr)
+    pending = iter(needs_ocr)
+    next_ocr_page = next(pending, None)
+    for page in pages:
+        # Only wait for the OCR result once its page is reached.
+        if page.metadata.get("page") == next_ocr_page:
+            _, page.page_content = next(ocr_texts)
+            page.metadata["ocr"] = True
+            next_ocr_page = next(pending, None)
+        yield page
+
+
+def lazy_load_documents_from_file(fpath: str) -> Iterator[Document]:
+    """Yields one Document per PDF page (or one per text file) as it is read."""
+    path = Path(fpath)
+    suffix = path.suffix.lower()
+
+    if suffix == ".pdf":
+        yield from _lazy_load_pdf(path)
+        return
+
+    if suffix in {".txt", ".text", ".md"}:
+        yield Document(
+            page_content=path.read_text(encoding="utf-8"),
+            metadata={"source": str(path)},
+        )
+        return
+
+    raise ValueError(
+        f"Unsupported file type: {path.suffix}. Only PDF and text files are supported."
+    )
+
+
+def load_documents_from_file(fpath: str) -> List[Document]:
+    return list(lazy_load_documents_from_file(fpath))
@@ -1,18 +1,25 @@
+import asyncio
 import logging
-from typing import List
+import os
+from typing import Dict, Iterable, List, Set, Tuple
 
-from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
-from langchain_huggingface import HuggingFaceEndpointEmbeddings
 
 from core.config import load_conf
 from core.ports import TextSplitter
 from core.types import QueryStr
+from services.EmbeddingService import get_embedding_service
+from services.IndexManifest import IndexManifest
+from services.QueryEmbeddingCache import QueryEmbeddingCache
+from utilities import docutils
 
-# TODO: cache which documents have been indexed etc.
+logger: logging.Logger = logging.getLogger(__name__)
 
-logger: logging.Logger = logging.getLogger()
+# Chroma rejects upserts larger than its max batch size.
+_UPSERT_BATCH_SIZE = 1024
+# langchain_chroma's default, which existing indexes were created with.
+_COLLECTION_NAME = "langchain"
 
 
 # Interface: ports/DocumentRetriever
@@ -28,39 +35,179 @@ class ChromaDocumentRetriever:
         with load_conf() as conf:
             if chroma_index_dir is None:
                 chroma_index_dir = str(conf.paths.chroma_index_dir)
-            if emb_model is None:
-                emb_model = HuggingFaceEndpointEmbeddings(
-                    model=conf.models.emb_model_name,
-                    huggingfacehub_api_token=conf.hf_token.get_secret_value(),
-                )
+        if emb_model is None:
+            emb_model = get_embedding_service()
         self.persist_dir = chroma_index_dir
         self.emb_model = emb_model
+        # Queries repeat a lot; documents are deduplicated by the manifest instead.
+        self.query_embedder = QueryEmbeddingCache(emb_model)
         self.text_splitter = text_splitter
+        self.manifest = IndexManifest(os.path.join(self.persist_dir, "manifest.json"))
         self.vs = None
+        self.collection = None  # the same index, through chromadb's own API
         self._initialize_index(docs)
         logger.debug("ChromaDocumentRetriever initialized")
 
     def _initialize_index(self, docs: List[Document]):
-        """Initialize the vectorstore if hasn't been initialized yet."""
+        """Open the persisted index and bring it in sync with `docs`."""
         if self.vs is not None:
             return
-        logger.debug("Loading index")
-        chunks = self.text_splitter.split(docs)
-        self.vs = Chroma.from_documents(
-            chunks, self.emb_model, persist_directory=self.persist_dir
+        import chromadb
+        from langchain_chroma import Chroma
+
+        logger.debug("Loading index (%d documents indexed)", len(self.manifest))
+        client = chromadb.PersistentClient(path=self.persist_dir)
+        self.vs = Chroma(
+            client=client, collection_name=_COLLECTION_NAME, embedding_function=self.emb_model
+        )
+        # LangChain searches one query at a time; batched searches go to the collection.
+        self.collection = client.get_collection(_COLLECTION_NAME)
+        doc_hashes = self.upsert_docs(docs)
+        self.prune(
+            keep=set(doc_hashes),
+            sources={doc.metadata.get("source") for doc in docs},
         )
 
+    def warm_up(self):
+        """Open the collection and the embedding endpoint's connection before the first query."""
+        logger.debug("Index holds %d chunks", self.collection.count())
+        self.query_embedder.embed_query("warm-up")
+
+    @property
+    def index_version(self) -> int:
+        """Changes whenever documents are added to or removed from the index."""
+        return self.manifest.version
+
     def retrieve(self, query: QueryStr, top_k: int = 4) -> List[Document]:
-        logger.debug(f"Retrieving {query}")
-        return self.vs.as_retriever(search_kwargs={"k": top_k}).invoke(query)
+        logger.debug("Retrieving %s", query)
+        return [doc for doc, _ in self.retrieve_many([query], top_k=top_k)[0]]
+
+    async def aretrieve(self, query: QueryStr, top_k: int = 4) -> List[Document]:
+        return await asyncio.to_thread(self.retrieve, query, top_k)
+
+    def retrieve_many(
+        self, queries: Iterable[QueryStr], top_k: int = 4
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Embed all queries in one batch and search for all of them in a single
+        vector-store round. Returns one ranking of (document, distance) pairs
+        per query, closest first, in the order of `queries`.
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        logger.debug("Retrieving %d queries", len(queries))
+        query_embs = self.query_embedder.embed_documents(queries)
+        results = self.collection.query(
+            query_embeddings=query_embs,
+            n_results=top_k,
+            include=["documents", "metadatas", "distances"],
+        )
+        rankings: List[List[Tuple[Document, float]]] = []
+        for ids, texts, metas, dists in zip(
+            results["ids"], results["documents"], results["metadatas"], results["distances"]
+        ):
+            rankings.append([
+                (Document(id=doc_id, page_content=text, metadata=meta or {}), dist)
+                for doc_id, text, meta, dist in zip(ids, texts, metas, dists)
+            ])
+        return rankings
+
+    async def aretrieve_many(
+        self, queries: Iterable[QueryStr], top_k: int = 4
+    ) -> List[List[Tuple[Document, float]]]:
+        return await asyncio.to_thread(self.retrieve_many, queries, top_k)
 
     def add_docs(self, docs: List[Document], do_split: bool = False):
-        logger.debug(f"Adding {len(docs)} documents to the retriever")
+        logger.debug("Adding %d documents to the retriever", len(docs))
         if do_split:
-            docs = self.text_splitter.split(docs)
-        self.vs.add_documents(docs)
-        if callable(getattr(self.vs, "persist", None)):
-            self.vs.persist()
+            self.upsert_docs(docs)
+            return
+        _, new_docs = self.filter_new_docs(docs)
+        # Unsplit documents are indexed as their own single chunk.
+        self.index_chunks(new_docs)
+
+    def upsert_docs(self, docs: List[Document]) -> List[str]:
+        """
+        Split and index the documents that aren't in the index yet.
+        Returns the hashes of all given documents.
+        """
+        doc_hashes, new_docs = self.filter_new_docs(docs)
+        logger.debug("%d of %d documents are new or changed", len(new_docs), len(docs))
+        if new_docs:
+            self.index_chunks(self.text_splitter.split(new_docs))
+        return doc_hashes
+
+    def filter_new_docs(self, docs: List[Document]) -> Tuple[List[str], List[Document]]:
+        """
+        Returns the hashes of all `docs` and copies of those not indexed yet,
+        tagged with their hash in `metadata["doc_hash"]`. Chunks inherit the
+        parent's metadata, which is how `index_chunks` groups them.
+        """
+        doc_hashes: List[str] = []
+        new_docs: List[Document] = []
+        seen: Set[str] = set()
+        for doc in docs:
+            doc_hash = docutils.compute_doc_hash(doc)
+            doc_hashes.append(doc_hash)
+            if doc_hash in self.manifest or doc_hash in seen:
+                continue
+            seen.add(doc_hash)
+            new_docs.append(
+                Document(
+                    page_content=doc.page_content,
+                    metadata={**(doc.metadata or {}), "doc_hash": doc_hash},
+                )
+            )
+        return doc_hashes, new_docs
+
+    def index_chunks(self, chunks: List[Document]):
+        """Upsert chunks (produced by `filter_new_docs` + split) and record them."""
+        if not chunks:
+            return
+        unique: Dict[str, Document] = {}
+        for chunk in chunks:
+            chunk_id = docutils.compute_doc_hash(chunk)
+            chunk.metadata["chunk_id"] = chunk_id
+            unique.setdefault(chunk_id, chunk)
+        ids = list(unique.keys())
+        docs = list(unique.values())
+        for i in range(0, len(docs), _UPSERT_BATCH_SIZE):
+            self.vs.add_documents(
+                docs[i: i + _UPSERT_BATCH_SIZE], ids=ids[i: i + _UPSERT_BATCH_SIZE]
+            )
+        for chunk_id, chunk in unique.items():
+            self.manifest.add(
+                doc_hash=chunk.metadata.get("doc_hash", chunk_id),
+                chunk_ids=[chunk_id],
+                source=chunk.metadata.get("source"),
+            )
+        self.manifest.save()
+        logger.debug("Indexed %d chunks", len(docs))
+
+    def prune(self, keep: Set[str], sources: Set[str]):
+        """
+        Delete indexed documents that are stale: either one of `sources`
+        now has different content (its old hash isn't in `keep`), or the
+        source file no longer exists.
+        """
+        stale = []
+        for doc_hash in self.manifest.doc_hashes() - keep:
+            source = self.manifest.source_of(doc_hash)
+            if source is None:
+                continue
+            if source in sources or not os.path.exists(source):
+                stale.append(doc_hash)
+        chunk_ids = [cid for doc_hash in stale for cid in self.manifest.remove(doc_hash)]
+        if chunk_ids:
+            self.vs.delete(ids=chunk_ids)
+            logger.debug("Pruned %d stale documents (%d chunks)", len(stale), len(chunk_ids))
+        self.manifest.save()
+
+    def close(self):
+        """Shut down the text splitter's worker processes, if it has any."""
+        if (close := getattr(self.text_splitter, "close", None)) is not None:
+            close()
 
     # ! Used to make sure compatibility with LangChain pipelines.
     def invoke(self, input, *args, **kwargs):
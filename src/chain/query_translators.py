@@ -1,14 +1,43 @@
+import asyncio
+import json
 import logging
-from typing import Dict, Optional
+import threading
+import time
+from typing import Dict, List, Optional
 
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
 
 from core.config import load_conf
-from core.ports import ChatModel
-from core.types import QueryList, TranslationContext, TranslationRouter
+from core.ports import ChatModel, QueryTranslator
+from core.types import (
+    CacheAttr,
+    QueryList,
+    TranslationContext,
+    TranslationMethod,
+    TranslationRoute,
+    TranslationRouter,
+)
+from services.CacheManager import CacheManager
+from utilities import hashing, metrics
 
-logger: logging.Logger = logging.getLogger()
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Entries nobody asks for again are never read (and so never found to be
+# expired); they are swept out of the cache directory once per TTL.
+_prune_lock = threading.Lock()
+_next_prune_at: float = 0.0
+
+
+def _maybe_prune(cache: CacheManager, ttl_s: float):
+    global _next_prune_at
+    now = time.time()
+    with _prune_lock:
+        if now < _next_prune_at:
+            return
+        _next_prune_at = now + ttl_s
+    if removed := cache.prune(ttl_s):
+        logger.debug("Removed %d expired translations", removed)
 
 
 # Since all query translation methods share the same steps, I've implemented
@@ -22,17 +51,28 @@ class _QueryTranslatorImpl:
     ):
         self.chat_model = chat_model
         self.prompt_templ = prompt_templ
-
-    def run(self, ctx_dict: Dict) -> QueryList:
-        logger.debug("Running _QueryTranslatorImpl")
-        ctx_dict = ctx_dict or {}
-        chain = (
+        # Built once; a chain is stateless, so all calls can share it.
+        self._chain = (
             self.prompt_templ
             | self.chat_model
             | StrOutputParser()
             | (lambda x: x.split("\n"))
         )
-        llm_response = chain.invoke(ctx_dict)
+
+    def run(self, ctx_dict: Dict) -> QueryList:
+        logger.debug("Running _QueryTranslatorImpl")
+        ctx_dict = ctx_dict or {}
+        llm_response = self._chain.invoke(ctx_dict)
+        return self._to_querylist(ctx_dict, llm_response)
+
+    async def arun(self, ctx_dict: Dict) -> QueryList:
+        logger.debug("Running _QueryTranslatorImpl (async)")
+        ctx_dict = ctx_dict or {}
+        llm_response = await self._chain.ainvoke(ctx_dict)
+        return self._to_querylist(ctx_dict, llm_response)
+
+    @staticmethod
+    def _to_querylist(ctx_dict: Dict, llm_response: List[str]) -> QueryList:
         # Remove dupliates while preserving order.
         queries = []
         seen = set()
@@ -53,6 +93,9 @@ class BaseTranslator:
         self.chat_model = chat_model
         self.prompt_templ = prompt_templ
         self._impl: Optional[_QueryTranslatorImpl] = None
+        with load_conf() as conf:
+            self._cache_ttl_s = conf.translation_cache.ttl_s
+            self._cache = CacheManager("translations") if conf.translation_cache.enabled else None
 
     def initialize_impl(self):
         if self._impl is not None:
@@ -66,10 +109,73 @@ class BaseTranslator:
         ctx: TranslationContext,
         router: TranslationRouter = TranslationRouter.HEURISTIC,
     ) -> QueryList:
-        self.initialize_impl()
-        ctx_dict = ctx.to_dict()
-        ctx_dict["translation_router"] = router
-        return self._impl.run(ctx_dict)
+        with metrics.span("translator", translator=type(self).__name__):
+            cache_id = self._cache_id(ctx)
+            if (qlist := self._get_cached(cache_id, ctx, router)) is not None:
+                return qlist
+            self.initialize_impl()
+            ctx_dict = ctx.to_dict()
+            ctx_dict["translation_router"] = router
+            qlist = self._impl.run(ctx_dict)
+            self._set_cached(cache_id, qlist)
+            return qlist
+
+    async def atranslate(
+        self,
+        ctx: TranslationContext,
+        router: TranslationRouter = TranslationRouter.HEURISTIC,
+    ) -> QueryList:
+        with metrics.span("translator", translator=type(self).__name__):
+            cache_id = self._cache_id(ctx)
+            # The cache is on disk; keep its reads and writes off the event loop.
+            if self._cache is not None:
+                if (qlist := await asyncio.to_thread(self._get_cached, cache_id, ctx, router)) is not None:
+                    return qlist
+            self.initialize_impl()
+            ctx_dict = ctx.to_dict()
+            ctx_dict["translation_router"] = router
+            qlist = await self._impl.arun(ctx_dict)
+            if self._cache is not None:
+                await asyncio.to_thread(self._set_cached, cache_id, qlist)
+            return qlist
+
+    # The LLM output only depends on the prompt, the model and the
+    # context, so the same translation is reused across requests
+    # (and restarts) until it expires.
+    def _cache_id(self, ctx: TranslationContext) -> str:
+        return hashing.compute_hash({
+            "translator": type(self).__name__,
+            "prompt": hashing.compute_hash(self.prompt_templ.template),
+            "model": getattr(self.chat_model, "model_name", type(self.chat_model).__name__),
+            "ctx": ctx.to_dict(),
+        })
+
+    def _get_cached(
+        self, cache_id: str, ctx: TranslationContext, router: TranslationRouter
+    ) -> Optional[QueryList]:
+        if self._cache is None:
+            return None
+        try:
+            entry = json.loads(self._cache.get(cache_id, CacheAttr.TRANSLATION))
+        except (FileNotFoundError, json.JSONDecodeError):
+            metrics.cache_result("translation", hit=False)
+            return None
+        if time.time() - entry["created_at"] > self._cache_ttl_s:
+            metrics.cache_result("translation", hit=False)
+            self._cache.delete(cache_id)
+            return None
+        metrics.cache_result("translation", hit=True)
+        logger.debug("Using cached %s output for: %s", type(self).__name__, ctx.query)
+        return QueryList(original_query=ctx.query, queries=entry["queries"], translation_router=router)
+
+    def _set_cached(self, cache_id: str, qlist: QueryList):
+        if self._cache is None:
+            return
+        self._cache.set(
+            cache_id,
+            {CacheAttr.TRANSLATION: json.dumps({"created_at": time.time(), "queries": qlist.queries})},
+        )
+        _maybe_prune(self._cache, self._cache_ttl_s)
 
 
 class MultiQueryTranslator(BaseTranslator):
@@ -121,6 +227,9 @@ class IdentityTranslator(BaseTranslator):
         logger.debug("Starting IdentityTranslator initialization")
         # Identity translator doesn't need a chat model.
 
+    def initialize_impl(self):
+        pass
+
     def translate(
         self,
         ctx: TranslationContext,
@@ -129,3 +238,84 @@ class IdentityTranslator(BaseTranslator):
         return QueryList(
             original_query=ctx.query, queries=[ctx.query], translation_router=router
         )
+
+    async def atranslate(
+        self,
+        ctx: TranslationContext,
+        router: TranslationRouter = TranslationRouter.HEURISTIC,
+    ) -> QueryList:
+        return self.translate(ctx, router)
+
+
+class TranslatorRegistry:
+    """
+    One translator per method, set up once (prompt, chain, cache) and
+    shared by every query, so running a route costs nothing but the
+    translations themselves.
+    """
+
+    def __init__(self, chat_model: ChatModel):
+        self.chat_model = chat_model
+        self._translators: Dict[TranslationMethod, QueryTranslator] = {}
+        self.register(TranslationMethod.IDENTITY, IdentityTranslator())
+        self.register(TranslationMethod.MULTI_QUERY, MultiQueryTranslator(chat_model=chat_model))
+        self.register(TranslationMethod.HYDE, HyDETranslator(chat_model=chat_model))
+        self.register(TranslationMethod.STEPBACK, StepBackTranslator(chat_model=chat_model))
+        self.register(TranslationMethod.DECOMPOSITION, DecompositionTranslator(chat_model=chat_model))
+
+    def register(self, method: TranslationMethod, translator: QueryTranslator):
+        """Add (or replace) the translator for `method`."""
+        # Build the chain now rather than on the first query.
+        if hasattr(translator, "initialize_impl"):
+            translator.initialize_impl()
+        self._translators[method] = translator
+
+    def get(self, method: TranslationMethod) -> QueryTranslator:
+        try:
+            return self._translators[method]
+        except KeyError:
+            raise ValueError(f"No translator registered for {method.name}.") from None
+
+    def __contains__(self, method: TranslationMethod) -> bool:
+        return method in self._translators
+
+    def run(
+        self,
+        route: TranslationRoute,
+        ctx: TranslationContext,
+        router: TranslationRouter = TranslationRouter.HEURISTIC,
+    ) -> QueryList:
+        """Translate the query with each method of the route, in order."""
+        translators = [self.get(method) for method in route]
+        qlist = self._new_querylist(route, ctx, router)
+        for translator in translators:
+            qlist.extend(translator.translate(ctx, router))
+        return qlist
+
+    async def arun(
+        self,
+        route: TranslationRoute,
+        ctx: TranslationContext,
+        router: TranslationRouter = TranslationRouter.HEURISTIC,
+    ) -> QueryList:
+        """Like `run`, but the (independent) translators run concurrently."""
+        translators = [self.get(method) for method in route]
+        qlist = self._new_querylist(route, ctx, router)
+        # `gather` keeps the results in route order.
+        qlists = await asyncio.gather(
+            *(translator.atranslate(ctx, router) for translator in translators)
+        )
+        for translated in qlists:
+            qlist.extend(translated)
+        return qlist
+
+    @staticmethod
+    def _new_querylist(
+        route: TranslationRoute, ctx: TranslationContext, router: TranslationRouter
+    ) -> QueryList:
+        return QueryList(
+            original_query=ctx.query,
+            queries=[],
+            translation_router=router,
+            route=TranslationRoute(list(route)),
+        )
@@ -1,36 +1,130 @@
 """Analyzes a given query in order to determine the most suitable translation methods."""
 import logging
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Pattern, Tuple
 
-from core.types import QueryStr, HeuristicAnalysisParameters, HeuristicAnalysis
+from core.config import load_conf
+from core.types import AnalyzerRule, QueryStr, HeuristicAnalysisParameters, HeuristicAnalysis
 
-logger: logging.Logger = logging.getLogger()
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Features set by keyword rules. Every analysis has them all (False unless a
+# rule matched), so settings that leave one out never break the router.
+KEYWORD_FEATURES: Tuple[str, ...] = (
+    "has_logical_operators",
+    "is_comparative",
+    "is_how_to",
+    "is_ambiguous",
+)
+
+
+def _fold(text: str) -> str:
+    # str.lower() has no Turkish rules: "I" becomes "i" and "İ" becomes "i̇"
+    # (i + combining dot). Fold the dotted and the dotless i together on both
+    # sides, so that case never decides whether a keyword matches.
+    return text.lower().replace("i\u0307", "i").replace("ı", "i")
+
+
+def _keyword_pattern(keyword: str) -> str:
+    prefix = keyword.endswith("*")
+    words = _fold(keyword.rstrip("*")).split()
+    # Phrases match across any whitespace; "karşılaştır*" also matches "karşılaştırın".
+    return r"\s+".join(re.escape(word) for word in words) + (r"\w*" if prefix else "")
+
+
+class _RuleMatcher:
+    """
+    All keyword rules compiled into one regex with a named group per rule,
+    so a query is scanned once however many rules (and languages) there are.
+    A keyword should belong to one rule only: where two rules match at the
+    same position, the first one wins.
+    """
+
+    def __init__(self, rules: Tuple[AnalyzerRule, ...]):
+        unknown = sorted({rule.feature for rule in rules} - set(KEYWORD_FEATURES))
+        if unknown:
+            logger.warning(f"Heuristic analyzer rules set unknown features: {unknown}")
+        self.features: Tuple[str, ...] = tuple(
+            dict.fromkeys(KEYWORD_FEATURES + tuple(rule.feature for rule in rules))
+        )
+        self._group_features = {}
+        alternatives = []
+        for i, rule in enumerate(rules):
+            if not rule.keywords:
+                continue
+            group = f"r{i}"
+            self._group_features[group] = rule.feature
+            # Longest first, so that a phrase wins over a keyword it starts with.
+            keywords = "|".join(
+                _keyword_pattern(kw) for kw in sorted(rule.keywords, key=len, reverse=True)
+            )
+            anchor = r"^\s*" if rule.at_start else r"\b"
+            alternatives.append(f"(?P<{group}>{anchor}(?:{keywords})\\b)")
+        # Scanning can stop once every feature some rule sets has been found.
+        self._matchable = len(set(self._group_features.values()))
+        self._pattern: Optional[Pattern] = re.compile("|".join(alternatives)) if alternatives else None
+
+    def match(self, text: str) -> HeuristicAnalysis:
+        """`text` must already be folded with `_fold`."""
+        found = HeuristicAnalysis(dict.fromkeys(self.features, False))
+        if self._pattern is None:
+            return found
+        remaining = self._matchable
+        for m in self._pattern.finditer(text):
+            feature = self._group_features[m.lastgroup]
+            if not found[feature]:
+                found[feature] = True
+                remaining -= 1
+                if remaining == 0:
+                    break
+        return found
+
+
+@lru_cache(maxsize=8)
+def compile_rules(rules: Tuple[AnalyzerRule, ...]) -> _RuleMatcher:
+    return _RuleMatcher(rules)
+
+
+def _default_rules() -> Tuple[AnalyzerRule, ...]:
+    with load_conf() as conf:
+        return conf.heuristic_analyzer.rules
+
+
+def _analyze(query: str, params: HeuristicAnalysisParameters, matcher: _RuleMatcher) -> HeuristicAnalysis:
+    text = _fold(query.strip())
+    analysis = matcher.match(text)
+    analysis["is_question"] = text.endswith("?")
+    analysis["is_short"] = len(text.split()) <= params.short_len_le
+    return analysis
 
 
 class HeuristicAnalyzer:
-    def __init__(self, query: QueryStr, params: HeuristicAnalysisParameters):
+    def __init__(
+        self,
+        query: QueryStr,
+        params: HeuristicAnalysisParameters,
+        rules: Tuple[AnalyzerRule, ...] = None,
+    ):
         self.query = query
         self.params = params
+        self.rules = rules if rules is not None else _default_rules()
 
     def analyze(self) -> HeuristicAnalysis:
-        logger.debug(f"Analyzing query: {self.query}")
-        return HeuristicAnalysis({
-            "is_question": self.query.strip().endswith("?"),
-            "has_logical_operators": any(op in self.query.lower() for op in [" and ", " or ", " not "]),
-            "is_comparative": any(
-                comp in self.query.lower() for comp in [" better ", " worse ", " more ", " less ", " than "]),
-            "is_how_to": self.query.lower().startswith("how to"),
-            "is_short": len(self.query.split()) <= self.params.short_len_le,
-            "is_ambiguous": any(word in self.query.lower() for word in ["maybe", "possibly", "could", "might"])
-        })
+        logger.debug("Analyzing query: %s", self.query)
+        return _analyze(self.query, self.params, compile_rules(self.rules))
+
+    @staticmethod
+    def analyze_batch(
+        queries: Iterable[QueryStr],
+        params: HeuristicAnalysisParameters,
+        rules: Tuple[AnalyzerRule, ...] = None,
+    ) -> List[HeuristicAnalysis]:
+        """Analyze many queries with the same parameters, in order."""
+        matcher = compile_rules(rules if rules is not None else _default_rules())
+        return [_analyze(query, params, matcher) for query in queries]
 
     @staticmethod
     def check_format(analysis: HeuristicAnalysis) -> bool:
-        required_keys = [
-            "is_question",
-            "has_logical_operators",
-            "is_comparative",
-            "is_how_to",
-            "is_short",
-            "is_ambiguous"
-        ]
+        required_keys = ("is_question", "is_short") + KEYWORD_FEATURES
         return all(analysis.get(key) is not None for key in required_keys)
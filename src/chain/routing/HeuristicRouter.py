@@ -1,114 +1,57 @@
 import logging
-import os
-from datetime import datetime
-from typing import List
+from typing import Optional
 
-from chain.query_translators import (
-    MultiQueryTranslator,
-    HyDETranslator,
-    IdentityTranslator,
-    StepBackTranslator,
-    DecompositionTranslator,
-)
 from core.config import load_conf
-from core.ports import ChatModel
 from core.types import (
     QueryStr,
     QueryList,
     TranslationMethod,
-    TranslationContext,
-    TranslationRouter,
     TranslationRoute,
     HeuristicAnalysisParameters,
 )
 from chain.routing import HeuristicAnalyzer
-from utilities import fs
-
-logger: logging.Logger = logging.getLogger()
-
-# Ensure the router_sessions directory exists.
-# The program will store query translation results there for analysis.
-with load_conf() as conf:
-    SESSIONS_DIR = str(conf.paths.router_sessions_dir)
-    os.makedirs(SESSIONS_DIR, exist_ok=True)
+from services.SessionJournal import get_session_journal
 
+logger: logging.Logger = logging.getLogger(__name__)
 
-# Interface: ports/TranslationRouter
-class HeuristicRouter:
-    def __init__(self, ctx: TranslationContext, chat_model: ChatModel):
-        self.ctx = ctx
-        self.chat_model = chat_model
-        self.qlist: QueryList = QueryList(
-            original_query=self.ctx.query,
-            queries=[],
-            translation_router=TranslationRouter.HEURISTIC,
-            route=TranslationRoute([]),
-        )
-        self.route_constructed: bool = False
-        self.add_translation_step(TranslationMethod.IDENTITY)
-        self.translator_map = {
-            TranslationMethod.IDENTITY: IdentityTranslator(),
-            TranslationMethod.MULTI_QUERY: MultiQueryTranslator(
-                chat_model=self.chat_model
-            ),
-            TranslationMethod.HYDE: HyDETranslator(chat_model=self.chat_model),
-            TranslationMethod.STEPBACK: StepBackTranslator(chat_model=self.chat_model),
-            TranslationMethod.DECOMPOSITION: DecompositionTranslator(
-                chat_model=self.chat_model
-            ),
-        }
-        logger.debug(f"HeuristicRouter initialized (query='{self.ctx.query}')")
-
-    def route(self):
-        logger.debug("Routing the query...")
-        # Figure out the pipeline.
-        q = self.ctx.query
-        text: QueryStr = QueryStr(q.lower())
-        analyzer = HeuristicAnalyzer(
-            query=text,
-            params=HeuristicAnalysisParameters(
-                short_len_le=12,
-            ),
-        )
-        self.analysis = analyzer.analyze()
+# Where query translation results are journaled for analysis. Read from
+# the configuration on first use (tests point it elsewhere by setting it);
+# the journal creates the directory.
+SESSIONS_DIR: Optional[str] = None
 
-        if self.analysis["has_logical_operators"] or self.analysis["is_comparative"]:
-            self.add_translation_step(TranslationMethod.DECOMPOSITION)
-        if not self.analysis["is_short"]:
-            self.add_translation_step(TranslationMethod.MULTI_QUERY)
-        if self.analysis["is_ambiguous"]:
-            self.add_translation_step(TranslationMethod.STEPBACK)
-            self.add_translation_step(TranslationMethod.HYDE)
 
-        self.route_constructed = True
-        logger.debug(f"HeuristicRouter route: {self.qlist.route}")
+def _get_sessions_dir() -> str:
+    global SESSIONS_DIR
+    if SESSIONS_DIR is None:
+        with load_conf() as conf:
+            SESSIONS_DIR = str(conf.paths.router_sessions_dir)
+    return SESSIONS_DIR
 
-    def add_translation_step(self, method: TranslationMethod):
-        """Use to construct the route."""
-        logger.debug(f"Adding translation step: {method.name}")
-        if self.qlist is None:
-            raise ValueError("`qlist` hasn't been initialized yet.")
-        elif not isinstance(self.qlist, QueryList):
-            raise ValueError("`qlist` must be an instance of QueryList.")
-        elif not isinstance(method, TranslationMethod):
-            raise ValueError("`method` must be an instance of TranslationMethod Enum.")
-        self.qlist.route.append(method)
 
-    def run_route(self) -> QueryList:
-        """Execute the route."""
-        logger.debug("Running the constructed route...")
-        if not self.route_constructed:
-            raise RuntimeError(
-                "Route hasn't been constructed yet. Call `route()` first."
-            )
-        self.translators: List = [
-            self.translator_map[method] for method in self.qlist.route
-        ]
-        for translator in self.translators:
-            self.qlist.extend(translator.translate(self.ctx))
-        fs.save_session(
-            session_data=self.qlist.to_dict(),
-            path=SESSIONS_DIR,
-            session_id=f"{datetime.strftime(datetime.now(), "%Y%m%d_%H%M%S")}{self.ctx.query[:10]}",
-        )
-        return self.qlist
+# Interface: ports/QueryRouter
+class HeuristicRouter:
+    """
+    Stateless: picks the translation methods for a query (its route plan)
+    from a few cheap heuristics. The translations themselves are run by a
+    `TranslatorRegistry`, so one router serves every query.
+    """
+
+    def __init__(self, params: HeuristicAnalysisParameters = None):
+        self.params = params or HeuristicAnalysisParameters(short_len_le=12)
+
+    def route(self, query: QueryStr) -> TranslationRoute:
+        analysis = HeuristicAnalyzer(query=query, params=self.params).analyze()
+        route = TranslationRoute([TranslationMethod.IDENTITY])
+        if analysis["has_logical_operators"] or analysis["is_comparative"]:
+            route.append(TranslationMethod.DECOMPOSITION)
+        if not analysis["is_short"]:
+            route.append(TranslationMethod.MULTI_QUERY)
+        if analysis["is_ambiguous"]:
+            route.append(TranslationMethod.STEPBACK)
+            route.append(TranslationMethod.HYDE)
+        logger.debug("HeuristicRouter route: %s", route)
+        return route
+
+    def save_session(self, qlist: QueryList):
+        # Only queues the record; the journal's thread does the writing.
+        get_session_journal(_get_sessions_dir()).record("route", qlist.to_dict())
@@ -1,24 +1,62 @@
 import os
 import logging
-from typing import List, Dict, Tuple
-from datetime import datetime
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, List, Dict, Optional
 
 import numpy as np
 from langchain_core.documents import Document
 
 from core.config import load_conf
-from core.types import CacheAttr
+from core.types import CacheAttr, SplitterEmbeddingMode
 from services.CacheManager import CacheManager
-from utilities import string, vector, docutils, fs
+from services.SessionJournal import get_session_journal
+from utilities import string, vector, docutils
 
-logger: logging.Logger = logging.getLogger()
+logger: logging.Logger = logging.getLogger(__name__)
 
-with load_conf() as conf:
-    SESSIONS_DIR = conf.paths.splitter_sessions_dir
-    os.makedirs(SESSIONS_DIR, exist_ok=True)
+# Read from the configuration on first use (tests point it elsewhere by
+# setting it); the journal creates the directory.
+SESSIONS_DIR: Optional[str] = None
 
 
-# ! BUG: Caching does not account for configuration.
+def _get_sessions_dir() -> str:
+    global SESSIONS_DIR
+    if SESSIONS_DIR is None:
+        with load_conf() as conf:
+            SESSIONS_DIR = str(conf.paths.splitter_sessions_dir)
+    return SESSIONS_DIR
+
+
+def _chunk_document(
+    doc: Document, sentences: List[str], embs: np.ndarray, breakpoint_percentile_threshold: int
+) -> List[Document]:
+    """Runs in the worker processes, hence a module-level function."""
+    # Calculate distances between adjacent windows.
+    distances = vector.calc_pairwise_semantic_distances(embs)
+    if not distances:
+        return [doc]
+
+    # Determine breakpoints by percentile threshold.
+    # Basically, if the distance lies at the top N %
+    # of the list, we consider it to be too large and
+    # seperate the sentences at that particular point.
+    threshold = float(np.percentile(distances, breakpoint_percentile_threshold))
+    breakpoints = [i for i, d in enumerate(distances) if d > threshold]
+
+    # Create chunk strings and wrap as Documents, inheriting metadata
+    chunk_texts = SemanticTextSplitter.break_sentences_at_breakpoints(
+        sentences, breakpoints
+    )
+    return [
+        Document(
+            page_content=chunk_text,
+            metadata=SemanticTextSplitter.inherit_metadata(doc, idx),
+        )
+        for idx, chunk_text in enumerate(chunk_texts)
+    ]
+
 
 # Interface: ports/TextSplitter
 class SemanticTextSplitter:
@@ -26,6 +64,8 @@ class SemanticTextSplitter:
         self,
         bufsz: int = None,
         breakpoint_percentile_threshold: int = None,
+        embedding_mode: SplitterEmbeddingMode = None,
+        n_workers: int = None,
     ):
         logger.debug("Starting SemanticTextSplitter initialization")
 
@@ -34,8 +74,17 @@ class SemanticTextSplitter:
                 bufsz = conf.concat_bufsz
             if breakpoint_percentile_threshold is None:
                 breakpoint_percentile_threshold = conf.breakpoint_percentile_threshold
+            if embedding_mode is None:
+                embedding_mode = SplitterEmbeddingMode(conf.splitter_embedding_mode)
+            if n_workers is None:
+                n_workers = conf.splitter_workers
         self.bufsz = bufsz
         self.breakpoint_percentile_threshold = breakpoint_percentile_threshold
+        self.embedding_mode = embedding_mode
+        # 0 means one worker per core. Splitting is cheap next to embedding, so
+        # the pool (spawn start-up costs seconds) only pays off for large ingestions.
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
 
         logger.debug("SemanticTextSplitter initialized")
 
@@ -43,95 +92,109 @@ class SemanticTextSplitter:
         """
         Chunk each Document into semantically-cohesive pieces using sentence-level
         embedding distances. Works with LangChain Documents.
+        Sentence splitting and chunking fan out over a process pool when
+        `n_workers` > 1; cache lookups, embedding and cache write-back are
+        batched in this process. Chunks are returned in the order of `docs`.
         """
         logger.debug(f"Splitting {len(docs)} documents")
-        all_chunks: List[Document] = []
-        for doc in docs:
-            # * Try to retrieve chunks from cache in case was split before.
-            hit, cached_data = self.retrieve_from_cache(doc, self.get_conf())
-            if hit:
-                cached_splits = cached_data["splits"]
-                all_chunks.extend(cached_splits)
-                logger.debug("Hit: %s", doc.page_content[:40])
-                continue
-            logger.debug("No hit, splitting the doc: %s", doc.page_content[:40])
-            sentences = string.split_into_sentences(doc.page_content)
+        conf = self.get_conf()
+        doc_hashes = docutils.hash_documents(docs)
+        # * Try to retrieve chunks from cache in case was split before.
+        cached = self.retrieve_many_from_cache(doc_hashes, conf)
+        results: List[Optional[List[Document]]] = [cached.get(h) for h in doc_hashes]
+        pending = [i for i, splits in enumerate(results) if splits is None]
+        logger.debug(f"Split cache: {len(docs) - len(pending)} hits, {len(pending)} misses")
+
+        map_fn = self._get_map_fn(len(pending))
+        sentences_per_doc = list(
+            map_fn(string.split_into_sentences, [docs[i].page_content for i in pending])
+        )
+        to_chunk: List[int] = []
+        to_chunk_sentences: List[List[str]] = []
+        for i, sentences in zip(pending, sentences_per_doc):
             if len(sentences) <= 1:
                 # Nothing to chunk; keep as-is.
-                all_chunks.append(doc)
+                results[i] = [docs[i]]
                 continue
+            to_chunk.append(i)
+            to_chunk_sentences.append(sentences)
+
+        # One embedding call for all the documents.
+        embs_per_doc = self.embed_windows_many(to_chunk_sentences)
+        chunked = map_fn(
+            _chunk_document,
+            [docs[i] for i in to_chunk],
+            to_chunk_sentences,
+            embs_per_doc,
+            [self.breakpoint_percentile_threshold] * len(to_chunk),
+        )
+        new_splits: Dict[str, Dict] = {}
+        journal = get_session_journal(_get_sessions_dir())
+        for i, doc_splits in zip(to_chunk, chunked):
+            results[i] = doc_splits
+            new_splits[doc_hashes[i]] = {"conf": conf, "splits": doc_splits}
+            # One record per newly split document (cached ones were journaled before).
+            journal.record("split", {"doc_hash": doc_hashes[i], "splits": doc_splits})
+        CacheManager("documents").set_many(
+            CacheAttr.SPLITTER, new_splits, write_as_binary=True
+        )
+        return [chunk for splits in results for chunk in splits]
+
+    def retrieve_many_from_cache(self, doc_hashes: List[str], conf: Dict) -> Dict[str, List[Document]]:
+        """Returns the cached splits made with `conf`, keyed by document hash."""
+        cmng = CacheManager("documents")
+        hits = cmng.get_many(doc_hashes, attr=CacheAttr.SPLITTER, read_as_binary=True)
+        return {
+            doc_hash: cached["splits"]
+            for doc_hash, cached in hits.items()
+            if cached.get("conf") == conf
+        }
 
-            # Build local context windows per sentence and embed.
-            windowed = string.windowed_concat(sentences, self.bufsz)
-            embs_lst = vector.embed_texts(windowed)
-
-            # Calculate distances between adjacent windows.
-            distances = vector.calc_pairwise_semantic_distances(embs_lst)
-            if not distances:
-                all_chunks.append(doc)
-                continue
-
-            # Determine breakpoints by percentile threshold.
-            # Basically, if the distance lies at the top N %
-            # of the list, we consider it to be too large and
-            # seperate the sentences at that particular point.
-            threshold = float(
-                np.percentile(distances, self.breakpoint_percentile_threshold)
-            )
-            breakpoints = [i for i, d in enumerate(distances) if d > threshold]
-
-            # Create chunk strings and wrap as Documents, inheriting metadata
-            chunk_texts = SemanticTextSplitter.break_sentences_at_breakpoints(
-                sentences, breakpoints
-            )
-            doc_splits: List[Document] = []
-            for idx, chunk_text in enumerate(chunk_texts):
-                doc_splits.append(
-                    Document(
-                        page_content=chunk_text,
-                        metadata=SemanticTextSplitter.inherit_metadata(doc, idx),
-                    )
-                )
-            all_chunks.extend(doc_splits)
-            cmng = CacheManager("documents")
-            doc_hash = docutils.compute_doc_hash(doc)
-            payload = {
-                "conf": self.get_conf(),
-                "doc": doc_splits
-            }
-            cmng.set(
-                cache_id=doc_hash,
-                data={CacheAttr.SPLITTER: payload},
-                write_as_binary=True
-            )
-            fs.save_session(
-                session_data={"splits": all_chunks},
-                path=SESSIONS_DIR,
-                session_id=f"{datetime.strftime(datetime.now(), "%Y%m%d_%H%M%S")}"
-            )
-
-        return all_chunks
+    def embed_windows(self, sentences: List[str]) -> np.ndarray:
+        """Embed the local context window (+-bufsz sentences) of each sentence."""
+        return self.embed_windows_many([sentences])[0]
 
-    def retrieve_from_cache(self, doc: Document, conf: Dict) -> Tuple[bool, List[Document]]:
-        cmng = CacheManager("documents")
-        doc_hash = docutils.compute_doc_hash(doc)
-        try:
-            cached_splits = cmng.get(
-                cache_id=doc_hash,
-                attr=CacheAttr.SPLITTER,
-                read_as_binary=True
+    def embed_windows_many(self, sentences_per_doc: List[List[str]]) -> List[np.ndarray]:
+        """`embed_windows` for several documents with a single embedding call."""
+        if not sentences_per_doc:
+            return []
+        if self.embedding_mode == SplitterEmbeddingMode.SENTENCE:
+            # Each sentence is sent to the encoder once instead of
+            # once per window it appears in, i.e. (2 * bufsz + 1) times.
+            texts_per_doc = sentences_per_doc
+        else:
+            texts_per_doc = [string.windowed_concat(s, self.bufsz) for s in sentences_per_doc]
+        embs = vector.embed_texts([t for texts in texts_per_doc for t in texts])
+        offsets = np.cumsum([len(texts) for texts in texts_per_doc])[:-1]
+        embs_per_doc = np.split(embs, offsets)
+        if self.embedding_mode == SplitterEmbeddingMode.SENTENCE:
+            embs_per_doc = [vector.windowed_mean(e, self.bufsz) for e in embs_per_doc]
+        return embs_per_doc
+
+    def close(self):
+        """Shut down the worker processes, if any were started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _get_map_fn(self, n_tasks: int) -> Callable:
+        """An order-preserving `map`, backed by the process pool if it is worth it."""
+        if self.n_workers <= 1 or n_tasks <= 1:
+            return map
+        if self._pool is None:
+            # `spawn` since the parent runs threads (e.g. the embedding
+            # client), which don't mix well with `fork`.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.n_workers, mp_context=mp.get_context("spawn")
             )
-            for k, v in conf.items():
-                if cached_splits.get(k) != v:
-                    return False, []
-            return True, cached_splits
-        except FileNotFoundError:
-            return False, []
+        chunksize = max(1, n_tasks // (self.n_workers * 4))
+        return partial(self._pool.map, chunksize=chunksize)
 
     def get_conf(self):
         return {
             "buffer size": self.bufsz,
-            "breakpoint_percentile_threshold": self.breakpoint_percentile_threshold
+            "breakpoint_percentile_threshold": self.breakpoint_percentile_threshold,
+            "embedding mode": self.embedding_mode.value
         }
 
     @staticmethod
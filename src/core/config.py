@@ -5,11 +5,12 @@ import os
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 import dotenv
 from pydantic import SecretStr
 
+from core.types import AnalyzerRule
 from utilities import string
 
 
@@ -34,11 +35,94 @@ class _Models:
     emb_model_name: str
 
 
+@dataclass(frozen=True)
+class _Embeddings:
+    batch_size: int
+    max_in_flight: int
+    max_retries: int
+    retry_backoff_s: float
+    endpoint_url: Optional[str]  # a self-hosted endpoint to use instead of the HF Hub
+
+
+@dataclass(frozen=True)
+class _QueryEmbeddingCache:
+    max_entries: int
+    max_bytes: int
+    # Also look up and store query embeddings in the EmbeddingStore. It is
+    # append-only, so every distinct query (and variant) stays on disk for good.
+    disk_tier: bool
+
+
+@dataclass(frozen=True)
+class _AnswerCache:
+    enabled: bool
+    similarity_threshold: float  # cosine similarity of the normalized query embeddings
+    ttl_s: float
+    max_entries: int
+
+
+@dataclass(frozen=True)
+class _TranslationCache:
+    enabled: bool
+    ttl_s: float
+
+
+@dataclass(frozen=True)
+class _SessionJournal:
+    enabled: bool
+    max_bytes: int  # rotate the journal file once it grows past this
+    backup_count: int  # rotated files kept
+    max_queue: int  # records waiting to be written; more are dropped
+
+
+@dataclass(frozen=True)
+class _Logging:
+    level: str
+    modules: Dict[str, str]  # logger name (e.g. "chain.routing") -> level
+
+
+@dataclass(frozen=True)
+class _HeuristicAnalyzer:
+    rules: Tuple[AnalyzerRule, ...]
+
+
+@dataclass(frozen=True)
+class _Server:
+    host: str
+    port: int
+    max_in_flight: int  # queries answered concurrently
+    max_queue: int  # queries waiting for a slot before 429 is returned
+    ingest_root: Optional[Path]  # POST /ingest only reads files under it; None disables it
+
+
+@dataclass(frozen=True)
+class _Batch:
+    concurrency: int  # queries answered at once in --batch mode
+
+
+@dataclass(frozen=True)
+class _Ingestion:
+    batch_size: int
+    queue_size: int
+
+
+@dataclass(frozen=True)
+class _OCR:
+    enabled: bool
+    dpi: int
+    lang: str
+    workers: int
+    min_text_chars: int  # fewer extracted characters count as no text layer
+    min_glyph_density: float  # characters per square inch
+    min_image_coverage: float  # fraction of the page covered by images
+
+
 @dataclass(frozen=True)
 class _Paths:
     proj_dir: Path
     cache_dir: Path
     chroma_index_dir: Path
+    embeddings_cache_dir: Path
     logs_dir: Path
     sessions_dir: Path
     router_sessions_dir: Path
@@ -55,7 +139,20 @@ class _Config:
     models: _Models
     paths: _Paths
     prompt_templs: _PromptTempls
+    embeddings: _Embeddings
+    query_embedding_cache: _QueryEmbeddingCache
+    answer_cache: _AnswerCache
+    translation_cache: _TranslationCache
+    session_journal: _SessionJournal
+    logging: _Logging
+    heuristic_analyzer: _HeuristicAnalyzer
+    server: _Server
+    batch: _Batch
+    ingestion: _Ingestion
+    ocr: _OCR
     concat_bufsz: int
+    splitter_embedding_mode: str
+    splitter_workers: int
     breakpoint_percentile_threshold: int
 
     def __enter__(self):
@@ -102,6 +199,7 @@ def load_conf() -> _Config:
         proj_dir=proj_dir,
         cache_dir=Path(resolved["CACHE_DIR"]).resolve(),
         chroma_index_dir=Path(resolved["CHROMA_INDEX_DIR"]).resolve(),
+        embeddings_cache_dir=Path(resolved["EMBEDDINGS_CACHE_DIR"]).resolve(),
         logs_dir=Path(resolved["LOGS_DIR"]).resolve(),
         sessions_dir=Path(resolved["SESSIONS_DIR"]).resolve(),
         router_sessions_dir=Path(resolved["ROUTER_SESSIONS_DIR"]).resolve(),
@@ -135,6 +233,75 @@ def load_conf() -> _Config:
             template=resolved["PROMPT_TEMPLATES"]["STEP_BACK_RAG_PROMPT"]["TEMPLATE"],
         )
     )
+    embeddings = _Embeddings(
+        batch_size=resolved["EMBEDDINGS"]["BATCH_SIZE"],
+        max_in_flight=resolved["EMBEDDINGS"]["MAX_IN_FLIGHT"],
+        max_retries=resolved["EMBEDDINGS"]["MAX_RETRIES"],
+        retry_backoff_s=resolved["EMBEDDINGS"]["RETRY_BACKOFF_S"],
+        endpoint_url=resolved["EMBEDDINGS"].get("ENDPOINT_URL")
+    )
+    query_embedding_cache = _QueryEmbeddingCache(
+        max_entries=resolved["QUERY_EMBEDDING_CACHE"]["MAX_ENTRIES"],
+        max_bytes=resolved["QUERY_EMBEDDING_CACHE"]["MAX_BYTES"],
+        disk_tier=resolved["QUERY_EMBEDDING_CACHE"]["DISK_TIER"]
+    )
+    answer_cache = _AnswerCache(
+        enabled=resolved["ANSWER_CACHE"]["ENABLED"],
+        similarity_threshold=resolved["ANSWER_CACHE"]["SIMILARITY_THRESHOLD"],
+        ttl_s=resolved["ANSWER_CACHE"]["TTL_S"],
+        max_entries=resolved["ANSWER_CACHE"]["MAX_ENTRIES"]
+    )
+    translation_cache = _TranslationCache(
+        enabled=resolved["TRANSLATION_CACHE"]["ENABLED"],
+        ttl_s=resolved["TRANSLATION_CACHE"]["TTL_S"]
+    )
+    session_journal = _SessionJournal(
+        enabled=resolved["SESSION_JOURNAL"]["ENABLED"],
+        max_bytes=resolved["SESSION_JOURNAL"]["MAX_BYTES"],
+        backup_count=resolved["SESSION_JOURNAL"]["BACKUP_COUNT"],
+        max_queue=resolved["SESSION_JOURNAL"]["MAX_QUEUE"]
+    )
+    logging = _Logging(
+        level=resolved["LOGGING"]["LEVEL"],
+        modules=dict(resolved["LOGGING"]["MODULES"])
+    )
+    heuristic_analyzer = _HeuristicAnalyzer(
+        rules=tuple(
+            AnalyzerRule(
+                feature=rule["FEATURE"],
+                keywords=tuple(rule["KEYWORDS"]),
+                at_start=rule.get("AT_START", False)
+            )
+            for rule in resolved["HEURISTIC_ANALYZER"]["RULES"]
+        )
+    )
+    server = _Server(
+        host=resolved["SERVER"]["HOST"],
+        port=resolved["SERVER"]["PORT"],
+        max_in_flight=resolved["SERVER"]["MAX_IN_FLIGHT"],
+        max_queue=resolved["SERVER"]["MAX_QUEUE"],
+        # Relative to the project directory.
+        ingest_root=(
+            (proj_dir / resolved["SERVER"]["INGEST_ROOT"]).resolve()
+            if resolved["SERVER"].get("INGEST_ROOT") else None
+        )
+    )
+    batch = _Batch(
+        concurrency=resolved["BATCH"]["CONCURRENCY"]
+    )
+    ingestion = _Ingestion(
+        batch_size=resolved["INGESTION"]["BATCH_SIZE"],
+        queue_size=resolved["INGESTION"]["QUEUE_SIZE"]
+    )
+    ocr = _OCR(
+        enabled=resolved["OCR"]["ENABLED"],
+        dpi=resolved["OCR"]["DPI"],
+        lang=resolved["OCR"]["LANG"],
+        workers=resolved["OCR"]["WORKERS"],
+        min_text_chars=resolved["OCR"]["MIN_TEXT_CHARS"],
+        min_glyph_density=resolved["OCR"]["MIN_GLYPH_DENSITY"],
+        min_image_coverage=resolved["OCR"]["MIN_IMAGE_COVERAGE"]
+    )
     return _Config(
         openai_api_key=SecretStr(openai_api_key),
         hf_token=SecretStr(hf_token),
@@ -142,7 +309,20 @@ def load_conf() -> _Config:
         models=models,
         paths=paths,
         prompt_templs=prompt_templs,
+        embeddings=embeddings,
+        query_embedding_cache=query_embedding_cache,
+        answer_cache=answer_cache,
+        translation_cache=translation_cache,
+        session_journal=session_journal,
+        logging=logging,
+        heuristic_analyzer=heuristic_analyzer,
+        server=server,
+        batch=batch,
+        ingestion=ingestion,
+        ocr=ocr,
         concat_bufsz=resolved["SENTENCE_CONCAT_BUFSZ"],
+        splitter_embedding_mode=resolved["SPLITTER_EMBEDDING_MODE"],
+        splitter_workers=resolved["SPLITTER_WORKERS"],
         breakpoint_percentile_threshold=resolved["BREAKPOINT_PERCENTILE_THRESHOLD"]
     )
 
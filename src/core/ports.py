@@ -3,7 +3,7 @@ Provides a common interface for the application, so the background processes cou
 be modified, different techniques could be used without the need to refactor.
 """
 
-from typing import Protocol, List
+from typing import AsyncIterator, Iterable, Iterator, Protocol, List, Tuple
 
 from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
@@ -13,6 +13,7 @@ from core.types import (
     ResponseStr,
     QueryList,
     TranslationContext,
+    TranslationRoute,
     TranslationRouter,
 )
 
@@ -22,10 +23,40 @@ class ChatModel(Protocol):
         self, prompt_templ: PromptTemplate, query: QueryStr, context: List[Document]
     ) -> ResponseStr: ...
 
+    async def agenerate(
+        self, prompt_templ: PromptTemplate, query: QueryStr, context: List[Document]
+    ) -> ResponseStr: ...
+
+    # Yield the answer's tokens as they are generated.
+    def generate_stream(
+        self, prompt_templ: PromptTemplate, query: QueryStr, context: List[Document]
+    ) -> Iterator[str]: ...
+
+    def agenerate_stream(
+        self, prompt_templ: PromptTemplate, query: QueryStr, context: List[Document]
+    ) -> AsyncIterator[str]: ...
+
+    def warm_up(self): ...
+
 
 class DocumentRetriever(Protocol):
+    @property
+    def index_version(self) -> int: ...
+
+    def warm_up(self): ...
+
     def retrieve(self, query: QueryStr, top_k: int = 4) -> List[Document]: ...
 
+    async def aretrieve(self, query: QueryStr, top_k: int = 4) -> List[Document]: ...
+
+    def retrieve_many(
+        self, queries: Iterable[QueryStr], top_k: int = 4
+    ) -> List[List[Tuple[Document, float]]]: ...
+
+    async def aretrieve_many(
+        self, queries: Iterable[QueryStr], top_k: int = 4
+    ) -> List[List[Tuple[Document, float]]]: ...
+
 
 class TextSplitter(Protocol):
     def split(self, docs: List[Document]) -> List[Document]: ...
@@ -35,3 +66,14 @@ class QueryTranslator(Protocol):
     def translate(
         self, ctx: TranslationContext, router: TranslationRouter
     ) -> QueryList: ...
+
+    async def atranslate(
+        self, ctx: TranslationContext, router: TranslationRouter
+    ) -> QueryList: ...
+
+
+class QueryRouter(Protocol):
+    # Which translation methods to run for the query, in order.
+    def route(self, query: QueryStr) -> TranslationRoute: ...
+
+    def save_session(self, qlist: QueryList): ...
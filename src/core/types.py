@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import NewType, List, Optional, Dict
+from typing import NewType, List, Optional, Dict, Tuple
 
 QueryStr = NewType("QueryStr", str)
 ResponseStr = NewType("ResponseStr", str)
@@ -40,6 +40,13 @@ class HeuristicAnalysisParameters:
     short_len_le: int = 12  # queries with length <= this are considered short
 
 
+@dataclass(frozen=True)
+class AnalyzerRule:
+    feature: str  # the HeuristicAnalysis key set when a keyword matches
+    keywords: Tuple[str, ...]  # whole words or phrases; a trailing "*" also matches any suffix
+    at_start: bool = False  # only match at the start of the query
+
+
 HeuristicAnalysis = NewType("HeuristicAnalysis", Dict[str, bool])
 
 
@@ -85,6 +92,88 @@ class QueryList:
             raise ValueError(f"Method {method} already in the route: {self.route}")
 
 
+class SplitterEmbeddingMode(Enum):
+    SENTENCE = "sentence"  # embed each sentence once, average into windows
+    WINDOW = "window"  # embed each concatenated window of sentences
+
+
 class CacheAttr(Enum):
     SPLITTER = "splitter"
     EMBEDDINGS = "embeddings"
+    OCR_TEXT = "ocr_text"
+    OCR_PDF = "ocr_pdf"
+    TRANSLATION = "translation"
+
+
+@dataclass
+class EmbeddingStats:
+    texts: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def texts_per_s(self) -> float:
+        return self.texts / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    disk_hits: int = 0  # included in `hits`
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+@dataclass
+class IngestionProgress:
+    files_total: int = 0
+    files_loaded: int = 0
+    pages_loaded: int = 0
+    pages_skipped: int = 0  # already indexed and unchanged
+    chunks_indexed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_s(self) -> float:
+        return self.pages_loaded / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class BatchProgress:
+    total: int = 0
+    skipped: int = 0  # answered by a previous run
+    done: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def queries_per_s(self) -> float:
+        return self.done / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class OCRProgress:
+    pages_done: int = 0
+    pages_total: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_s(self) -> float:
+        return self.pages_done / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class AnswerTrace:
+    """What happened while answering one query."""
+    query: QueryStr
+    answer: Optional[ResponseStr] = None
+    route: List[str] = field(default_factory=list)  # TranslationMethod values
+    chunk_ids: List[str] = field(default_factory=list)  # after RRF, in rank order
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per stage
+    cached: bool = False  # served from the answer cache
@@ -0,0 +1,235 @@
+"""
+A headless HTTP API in front of one shared RAGEngine.
+
+Endpoints:
+    POST /query    {"query": str, "top_k": int, "stream": bool}
+                   -> {"answer": str}, or the answer's tokens as a
+                      chunked text/plain stream when "stream" is true
+    POST /ingest   {"filepaths": [str, ...]} -> ingestion summary; paths are
+                   relative to (and must stay inside) `ingest_root`
+    GET  /healthz  the process is up
+    GET  /readyz   the engine is built and warmed up
+    GET  /metrics  stage latencies, cache and call counters (Prometheus text format)
+
+At most `max_in_flight` queries run at once; up to `max_queue` more
+wait for a slot. Anything beyond that is turned away right away with
+429, so an overloaded server sheds load instead of piling up latency.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import AsyncIterator, Callable, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from core.config import load_conf
+from core.types import IngestionProgress, QueryStr
+from services.IngestionPipeline import IngestionPipeline
+from services.RAGEngine import RAGEngine
+from utilities import metrics
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class _QueryRequest(BaseModel):
+    query: str = Field(min_length=1)
+    top_k: int = Field(default=4, ge=1, le=50)
+    stream: bool = False
+
+
+class _IngestRequest(BaseModel):
+    filepaths: List[str] = Field(min_length=1)
+
+
+class _Overloaded(Exception):
+    pass
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """
+    Releases the admission however the response ends. The token generator
+    alone can't: if the client is gone before the body is sent, it never
+    starts, so its `finally` never runs.
+    """
+
+    def __init__(self, content: AsyncIterator[str], release: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self._tokens = content
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                # Frees the query slot if the stream was cut short.
+                await self._tokens.aclose()
+            finally:
+                self._release()
+
+
+class APIServer:
+    def __init__(
+        self,
+        rag_engine: RAGEngine,
+        max_in_flight: int = None,
+        max_queue: int = None,
+        ingest_fn: Callable[[List[str]], IngestionProgress] = None,
+        ingest_root: Optional[str] = None,
+    ):
+        with load_conf() as conf:
+            if max_in_flight is None:
+                max_in_flight = conf.server.max_in_flight
+            if max_queue is None:
+                max_queue = conf.server.max_queue
+            if ingest_root is None and conf.server.ingest_root is not None:
+                ingest_root = str(conf.server.ingest_root)
+        if max_in_flight < 1 or max_queue < 0:
+            raise ValueError("`max_in_flight` must be positive and `max_queue` non-negative.")
+        if ingest_fn is None:
+            # A pipeline runs once, so each request gets its own.
+            def ingest_fn(filepaths: List[str]) -> IngestionProgress:
+                return IngestionPipeline(rag_engine.doc_retriever).run(filepaths)
+        self.rag_engine = rag_engine
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.ingest_fn = ingest_fn
+        # Clients can only have files under this directory ingested (and
+        # then read back through /query); without one, /ingest is off.
+        self.ingest_root = os.path.realpath(ingest_root) if ingest_root is not None else None
+        self.ready = False
+        # Queries admitted (running or waiting for a slot). Only touched
+        # from the event loop, so it needs no lock.
+        self._admitted = 0
+        # Asyncio primitives bind to the loop that first uses them.
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._ingest_lock = asyncio.Lock()
+        self._warm_up_task: asyncio.Task = None
+        self.app = self._create_app()
+
+    @property
+    def in_flight(self) -> int:
+        return min(self._admitted, self.max_in_flight)
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._admitted - self.max_in_flight)
+
+    def serve(self, host: str = None, port: int = None):
+        import uvicorn
+
+        with load_conf() as conf:
+            if host is None:
+                host = conf.server.host
+            if port is None:
+                port = conf.server.port
+        logger.info(f"Serving the RAG API on {host}:{port}")
+        uvicorn.run(self.app, host=host, port=port, log_config=None)
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title="RAG Assistant API", lifespan=self._lifespan)
+
+        @app.exception_handler(_Overloaded)
+        async def overloaded(request, exc):
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests in flight, try again later."},
+                headers={"Retry-After": "1"},
+            )
+
+        @app.get("/healthz")
+        async def healthz():
+            return {"status": "ok"}
+
+        @app.get("/readyz")
+        async def readyz():
+            if not self.ready:
+                raise HTTPException(status_code=503, detail="Warming up.")
+            return {"status": "ready", "in_flight": self.in_flight, "queued": self.queued}
+
+        @app.get("/metrics")
+        async def get_metrics():
+            metrics.set_gauge("rag_server_in_flight", self.in_flight)
+            metrics.set_gauge("rag_server_queued", self.queued)
+            return PlainTextResponse(
+                metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+            )
+
+        @app.post("/query")
+        async def query(req: _QueryRequest):
+            self._admit()
+            if req.stream:
+                # The slot is held until the last token has been sent.
+                return _SlotStreamingResponse(
+                    self._stream_answer(QueryStr(req.query), req.top_k),
+                    release=self._release,
+                    media_type="text/plain",
+                )
+            try:
+                async with self._slots:
+                    answer = await self.rag_engine.agenerate_answer(QueryStr(req.query), top_k=req.top_k)
+            finally:
+                self._release()
+            return {"answer": answer}
+
+        @app.post("/ingest")
+        async def ingest(req: _IngestRequest):
+            filepaths = self._resolve_ingest_paths(req.filepaths)
+            # One ingestion at a time; queries keep being served meanwhile.
+            async with self._ingest_lock:
+                progress = await asyncio.to_thread(self.ingest_fn, filepaths)
+            return asdict(progress)
+
+        return app
+
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        # Warm up in the background, so /healthz answers right away
+        # while /readyz keeps the load balancer away until it is done.
+        self._warm_up_task = asyncio.create_task(self._warm_up())
+        yield
+        self.ready = False
+
+    async def _warm_up(self):
+        await asyncio.to_thread(self.rag_engine.warm_up)
+        self.ready = True
+
+    def _resolve_ingest_paths(self, filepaths: List[str]) -> List[str]:
+        if self.ingest_root is None:
+            raise HTTPException(status_code=403, detail="Ingestion over HTTP is disabled.")
+        resolved: List[str] = []
+        outside: List[str] = []
+        for fpath in filepaths:
+            # Symlinks and ".." are resolved before the check.
+            real = os.path.realpath(os.path.join(self.ingest_root, fpath))
+            if os.path.commonpath([self.ingest_root, real]) != self.ingest_root:
+                outside.append(fpath)
+            resolved.append(real)
+        if outside:
+            logger.warning(f"Refusing to ingest files outside {self.ingest_root}: {outside}")
+            raise HTTPException(status_code=403, detail=f"Files outside the ingest root: {outside}")
+        missing = [fpath for fpath, real in zip(filepaths, resolved) if not os.path.isfile(real)]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Files not found: {missing}")
+        return resolved
+
+    def _admit(self):
+        if self._admitted >= self.max_in_flight + self.max_queue:
+            logger.warning(f"Rejecting query: {self._admitted} already admitted")
+            metrics.inc("rag_server_rejected_total")
+            raise _Overloaded()
+        self._admitted += 1
+
+    def _release(self):
+        self._admitted -= 1
+
+    async def _stream_answer(self, query: QueryStr, top_k: int) -> AsyncIterator[str]:
+        # Admission is released by the response (`_SlotStreamingResponse`).
+        async with self._slots:
+            async for token in self.rag_engine.agenerate_answer_stream(query, top_k=top_k):
+                yield token
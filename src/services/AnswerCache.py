@@ -0,0 +1,167 @@
+"""
+A semantic cache of generated answers.
+
+A question close enough to one answered recently (cosine similarity of
+their normalized embeddings above a threshold) gets the stored answer,
+skipping routing, translation, retrieval and generation altogether.
+Answers are only valid for the index they were generated from, so the
+whole cache is dropped when the index version changes. Entries expire
+after a TTL, and the least recently used ones are evicted first.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.config import load_conf
+from core.types import CacheStats, QueryStr, ResponseStr
+from utilities import metrics
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Slots allocated up front; grows by doubling up to `max_entries`.
+_INITIAL_CAPACITY = 64
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        embedder: Embeddings,
+        similarity_threshold: float = None,
+        ttl_s: float = None,
+        max_entries: int = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        with load_conf() as conf:
+            if similarity_threshold is None:
+                similarity_threshold = conf.answer_cache.similarity_threshold
+            if ttl_s is None:
+                ttl_s = conf.answer_cache.ttl_s
+            if max_entries is None:
+                max_entries = conf.answer_cache.max_entries
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._clock = clock
+        # One slot per entry: a row of the (unit length) embedding matrix,
+        # so a lookup is a single matrix-vector product.
+        self._embs: Optional[np.ndarray] = None  # allocated on the first `put`
+        self._used = np.zeros(0, dtype=bool)
+        self._top_k = np.zeros(0, dtype=np.int64)
+        self._created_at = np.zeros(0, dtype=np.float64)
+        self._last_used = np.zeros(0, dtype=np.int64)  # for LRU eviction
+        self._answers: List[Optional[ResponseStr]] = []
+        self._tick: int = 0
+        self._index_version: Optional[int] = None
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**vars(self._stats))
+
+    def __len__(self) -> int:
+        return int(self._used.sum())
+
+    def get(self, query: QueryStr, top_k: int, index_version: int) -> Optional[ResponseStr]:
+        """Returns the answer to the most similar cached question, if similar enough."""
+        emb = self._embed(query)
+        with self._lock:
+            self._sync_version(index_version)
+            self._drop_expired()
+            candidates = self._used & (self._top_k == top_k)
+            if not candidates.any():
+                return self._miss()
+            sims = np.where(candidates, self._embs @ emb, -np.inf)
+            best = int(np.argmax(sims))
+            if sims[best] < self.similarity_threshold:
+                return self._miss()
+            self._stats.hits += 1
+            metrics.cache_result("answer", hit=True)
+            self._last_used[best] = self._next_tick()
+            logger.debug("Answer cache hit (similarity %.3f) for: %s", sims[best], query)
+            return self._answers[best]
+
+    def put(self, query: QueryStr, top_k: int, index_version: int, answer: ResponseStr):
+        emb = self._embed(query)
+        with self._lock:
+            self._sync_version(index_version)
+            self._drop_expired()
+            slot = self._free_slot(emb.shape[0])
+            self._embs[slot] = emb
+            self._used[slot] = True
+            self._top_k[slot] = top_k
+            self._created_at[slot] = self._clock()
+            self._last_used[slot] = self._next_tick()
+            self._answers[slot] = answer
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _embed(self, query: QueryStr) -> np.ndarray:
+        emb = np.asarray(self.embedder.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(emb)
+        return emb / norm if norm > 0 else emb
+
+    def _miss(self) -> None:
+        self._stats.misses += 1
+        metrics.cache_result("answer", hit=False)
+        return None
+
+    def _next_tick(self) -> int:
+        self._tick += 1
+        return self._tick
+
+    def _free_slot(self, dim: int) -> int:
+        if self._embs is None or self._embs.shape[1] != dim:
+            # First entry (or the embedder changed): start over at this dimension.
+            self._embs = np.zeros((0, dim), dtype=np.float32)
+            self._resize(min(_INITIAL_CAPACITY, self.max_entries))
+        free = np.flatnonzero(~self._used)
+        if free.size:
+            return int(free[0])
+        if len(self._used) < self.max_entries:
+            slot = len(self._used)
+            self._resize(min(2 * len(self._used), self.max_entries))
+            return slot
+        # Full: evict the least recently used entry.
+        slot = int(np.argmin(self._last_used))
+        self._used[slot] = False
+        self._answers[slot] = None
+        self._stats.evictions += 1
+        return slot
+
+    def _resize(self, capacity: int):
+        n = len(self._used)
+        grow = capacity - n
+        self._embs = np.vstack([self._embs, np.zeros((grow, self._embs.shape[1]), dtype=np.float32)])
+        self._used = np.concatenate([self._used, np.zeros(grow, dtype=bool)])
+        self._top_k = np.concatenate([self._top_k, np.zeros(grow, dtype=np.int64)])
+        self._created_at = np.concatenate([self._created_at, np.zeros(grow, dtype=np.float64)])
+        self._last_used = np.concatenate([self._last_used, np.zeros(grow, dtype=np.int64)])
+        self._answers.extend([None] * grow)
+
+    def _clear(self):
+        self._used[:] = False
+        self._answers = [None] * len(self._answers)
+
+    def _sync_version(self, index_version: int):
+        # Answers generated from an older index may be wrong now.
+        if index_version != self._index_version:
+            if self._used.any():
+                logger.debug("Index version changed to %s, dropping cached answers", index_version)
+            self._clear()
+            self._index_version = index_version
+
+    def _drop_expired(self):
+        expired = self._used & (self._clock() - self._created_at > self.ttl_s)
+        for slot in np.flatnonzero(expired):
+            self._answers[slot] = None
+        self._used &= ~expired
@@ -0,0 +1,143 @@
+"""
+Answers a JSONL file of queries with bounded concurrency.
+
+Input, one object per line:
+    {"id": <str|int, optional>, "query": <str>, "top_k": <int, optional>}
+    (lines without an "id" are identified by their line number)
+
+Output, one object per line, in completion order:
+    {"id", "query", "answer", "route", "chunk_ids", "timings", "cached"}
+    or {"id", "query", "error"} when answering failed.
+
+The output file doubles as the checkpoint: each record is flushed as
+soon as it is written, and a rerun skips the ids already answered
+successfully, so an interrupted run resumes where it stopped (failed
+queries are retried).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Set, TextIO
+
+from core.config import load_conf
+from core.types import BatchProgress, QueryStr
+from services.RAGEngine import RAGEngine
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        rag_engine: RAGEngine,
+        concurrency: int = None,
+        top_k: int = 4,
+        on_progress: Optional[Callable[[BatchProgress], None]] = None,
+    ):
+        with load_conf() as conf:
+            if concurrency is None:
+                concurrency = conf.batch.concurrency
+        if concurrency < 1:
+            raise ValueError("`concurrency` must be a positive integer.")
+        self.rag_engine = rag_engine
+        self.concurrency = concurrency
+        self.top_k = top_k
+        self.on_progress = on_progress
+
+    def run(self, input_path: str, output_path: str) -> BatchProgress:
+        return asyncio.run(self.arun(input_path, output_path))
+
+    async def arun(self, input_path: str, output_path: str) -> BatchProgress:
+        items = self._read_input(input_path)
+        answered = self._read_checkpoint(output_path)
+        pending = [item for item in items if item["id"] not in answered]
+        progress = BatchProgress(total=len(items), skipped=len(items) - len(pending))
+        logger.info(
+            f"Batch: {len(pending)} of {len(items)} queries to answer "
+            f"({progress.skipped} already in {output_path})"
+        )
+        start = time.perf_counter()
+        slots = asyncio.Semaphore(self.concurrency)
+        with open(output_path, "a", encoding="utf-8") as out:
+            if out.tell() > 0:
+                self._terminate_last_line(output_path, out)
+
+            async def answer(item: Dict):
+                async with slots:
+                    record = await self._answer(item)
+                # Writes happen on the event loop thread, one at a time.
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if "error" in record:
+                    progress.failed += 1
+                else:
+                    progress.done += 1
+                progress.seconds = time.perf_counter() - start
+                if self.on_progress is not None:
+                    self.on_progress(progress)
+
+            await asyncio.gather(*(answer(item) for item in pending))
+        progress.seconds = time.perf_counter() - start
+        logger.info(
+            f"Batch: answered {progress.done}, failed {progress.failed} in {progress.seconds:.1f}s "
+            f"({progress.queries_per_s:.2f} queries/s)"
+        )
+        return progress
+
+    async def _answer(self, item: Dict) -> Dict:
+        try:
+            trace = await self.rag_engine.agenerate_answer_traced(
+                QueryStr(item["query"]), top_k=item.get("top_k", self.top_k)
+            )
+        except Exception as e:
+            logger.error(f"Batch: query {item['id']} failed: {e}")
+            return {"id": item["id"], "query": item["query"], "error": str(e)}
+        return {"id": item["id"], **asdict(trace)}
+
+    @staticmethod
+    def _read_input(input_path: str) -> List[Dict]:
+        items: List[Dict] = []
+        seen: Set[str] = set()
+        with open(input_path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if not item.get("query"):
+                    raise ValueError(f"{input_path}:{line_no}: missing `query`.")
+                # Ids are compared as strings, the way they come back from the output file.
+                item["id"] = str(item.get("id", line_no))
+                if item["id"] in seen:
+                    raise ValueError(f"{input_path}:{line_no}: duplicate id {item['id']!r}.")
+                seen.add(item["id"])
+                items.append(item)
+        return items
+
+    @staticmethod
+    def _read_checkpoint(output_path: str) -> Set[str]:
+        """Ids answered successfully by previous runs."""
+        answered: Set[str] = set()
+        if not os.path.exists(output_path):
+            return answered
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The line being written when the run was interrupted.
+                    continue
+                if "error" not in record:
+                    answered.add(str(record["id"]))
+        return answered
+
+    @staticmethod
+    def _terminate_last_line(output_path: str, out: TextIO):
+        # An interrupted write may have left a partial line; start a new one.
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                out.write("\n")
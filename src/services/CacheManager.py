@@ -8,28 +8,46 @@ Structure:
             <cache_key>/  # document hash
                 splits/
                     <split_hash>.pkl
+        ocr/
+            <cache_key>/  # hash of the rendered page + dpi + lang
+                ocr_text.txt
+                ocr_pdf.pkl
+        translations/
+            <cache_key>/  # hash of translator + prompt + model + context
+                translation.txt
 """
 
 import os
-from typing import Text, Optional, Dict, Any, Union
+import shutil
+import time
+from typing import Text, Optional, Dict, Any, Union, List
 import pickle
 
 from core.config import load_conf
 from core.types import CacheAttr
 
-with load_conf() as conf:
-    CACHE_DIR = conf.paths.cache_dir
-    os.makedirs(CACHE_DIR, exist_ok=True)
+# Read from the configuration when the first CacheManager is created
+# (tests point it elsewhere by setting it).
+CACHE_DIR: Optional[str] = None
 
 # All the components that might rely on this:
 # - ChromaDocumentRetriever
 # - QueryTranslators
 # - TextSplitters
+# - OCR (utilities/pdf)
+
+
+def _get_cache_dir() -> str:
+    global CACHE_DIR
+    if CACHE_DIR is None:
+        with load_conf() as conf:
+            CACHE_DIR = str(conf.paths.cache_dir)
+    return CACHE_DIR
 
 
 class CacheManager:
     def __init__(self, dir_path: str):
-        self._dir = os.path.join(CACHE_DIR, dir_path)
+        self._dir = os.path.join(_get_cache_dir(), dir_path)
         os.makedirs(self._dir, exist_ok=True)
 
     def get(self, cache_id: str, attr: CacheAttr, read_as_binary: bool = False) -> Optional[Union[Text, Any]]:
@@ -37,7 +55,8 @@ class CacheManager:
         if not os.path.exists(path):
             raise FileNotFoundError(path)
         path = os.path.join(path, attr.value + ('.pkl' if read_as_binary else '.txt'))
-        with open(path, 'rb' if read_as_binary else 'r') as f:
+        # Text entries (e.g. OCR output) may hold non-ASCII characters.
+        with open(path, 'rb' if read_as_binary else 'r', encoding=None if read_as_binary else 'utf-8') as f:
             if read_as_binary:
                 return pickle.load(f)
             else:
@@ -56,11 +75,49 @@ class CacheManager:
         os.makedirs(os.path.join(self._path(cache_id)), exist_ok=True)
         cache_val = data[cache_t]
         path = os.path.join(self._path(cache_id), cache_t.value + ('.pkl' if write_as_binary else '.txt'))
-        with open(path, 'wb' if write_as_binary else 'w') as f:
+        with open(path, 'wb' if write_as_binary else 'w', encoding=None if write_as_binary else 'utf-8') as f:
             if write_as_binary:
                 pickle.dump(cache_val, f)
             else:
                 f.write(str(cache_val))
 
+    def get_many(self, cache_ids: List[str], attr: CacheAttr, read_as_binary: bool = False) -> Dict[str, Any]:
+        """Look up several entries at once; returns only the hits, keyed by cache_id."""
+        hits: Dict[str, Any] = {}
+        for cache_id in cache_ids:
+            if cache_id in hits:
+                continue
+            try:
+                hits[cache_id] = self.get(cache_id, attr, read_as_binary=read_as_binary)
+            except FileNotFoundError:
+                continue
+        return hits
+
+    def set_many(self, attr: CacheAttr, data: Dict[str, Any], write_as_binary: bool = False):
+        """Set one entry of type `attr` per cache_id in `data`."""
+        for cache_id, cache_val in data.items():
+            self.set(cache_id, {attr: cache_val}, write_as_binary=write_as_binary)
+
+    def delete(self, cache_id: str):
+        """Remove an entry (all its attributes); a missing entry is not an error."""
+        shutil.rmtree(self._path(cache_id), ignore_errors=True)
+
+    def prune(self, max_age_s: float) -> int:
+        """Remove the entries last written more than `max_age_s` ago; returns how many."""
+        cutoff = time.time() - max_age_s
+        removed = 0
+        for entry in os.scandir(self._dir):
+            if not entry.is_dir():
+                continue
+            try:
+                written_at = max((f.stat().st_mtime for f in os.scandir(entry.path)), default=0.0)
+            except FileNotFoundError:
+                # Removed concurrently.
+                continue
+            if written_at < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
     def _path(self, cache_id: str) -> str:
         return os.path.join(self._dir, cache_id)
@@ -0,0 +1,155 @@
+"""
+One shared client for the embedding endpoint.
+
+Splits work into batches and keeps up to `max_in_flight` of them in
+flight on a thread pool, since ingestion time is dominated by embedding
+round trips. A failed batch is retried on its own, without resending
+the batches that succeeded.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from core.config import load_conf
+from core.types import EmbeddingStats
+from utilities import metrics
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+# Interface: langchain_core.embeddings.Embeddings
+class _EndpointEmbeddings(Embeddings):
+    """
+    Feature extraction on a self-hosted endpoint (e.g. TEI), given by URL.
+    `HuggingFaceEndpointEmbeddings` only accepts Hub model ids.
+    """
+
+    def __init__(self, endpoint_url: str, token: str):
+        from huggingface_hub import InferenceClient
+
+        self._client = InferenceClient(model=endpoint_url, token=token)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._client.feature_extraction(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# Interface: langchain_core.embeddings.Embeddings
+class EmbeddingService(Embeddings):
+    def __init__(
+        self,
+        model_name: str = None,
+        batch_size: int = None,
+        max_in_flight: int = None,
+        max_retries: int = None,
+        retry_backoff_s: float = None,
+        client: Embeddings = None,
+    ):
+        logger.debug("Starting EmbeddingService initialization")
+        with load_conf() as conf:
+            if model_name is None:
+                model_name = conf.models.emb_model_name
+            if batch_size is None:
+                batch_size = conf.embeddings.batch_size
+            if max_in_flight is None:
+                max_in_flight = conf.embeddings.max_in_flight
+            if max_retries is None:
+                max_retries = conf.embeddings.max_retries
+            if retry_backoff_s is None:
+                retry_backoff_s = conf.embeddings.retry_backoff_s
+            if client is None and conf.embeddings.endpoint_url:
+                client = _EndpointEmbeddings(
+                    conf.embeddings.endpoint_url, conf.hf_token.get_secret_value()
+                )
+            elif client is None:
+                from langchain_huggingface import HuggingFaceEndpointEmbeddings
+
+                client = HuggingFaceEndpointEmbeddings(
+                    model=model_name,
+                    huggingfacehub_api_token=conf.hf_token.get_secret_value(),
+                )
+        if batch_size < 1 or max_in_flight < 1:
+            raise ValueError("`batch_size` and `max_in_flight` must be positive integers.")
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self._client = client
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="embedding"
+        )
+        self._stats = EmbeddingStats()
+        self._stats_lock = threading.Lock()
+        logger.debug("EmbeddingService initialized")
+
+    @property
+    def stats(self) -> EmbeddingStats:
+        with self._stats_lock:
+            return EmbeddingStats(**vars(self._stats))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        batches = [
+            texts[i: i + self.batch_size] for i in range(0, len(texts), self.batch_size)
+        ]
+        # `map` yields results in submission order, so the output lines up
+        # with `texts` no matter which batch finishes first.
+        embs: List[List[float]] = []
+        for batch_embs in self._executor.map(self._embed_batch, batches):
+            embs.extend(batch_embs)
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._stats.texts += len(texts)
+            self._stats.batches += len(batches)
+            self._stats.seconds += elapsed
+        logger.info(
+            f"Embedded {len(texts)} texts in {len(batches)} batches "
+            f"({len(texts) / elapsed if elapsed > 0 else 0.0:.1f} texts/s)"
+        )
+        return embs
+
+    def embed_query(self, text: str) -> List[float]:
+        metrics.inc("rag_embedding_calls_total")
+        metrics.inc("rag_embedded_texts_total")
+        return self._client.embed_query(text)
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            metrics.inc("rag_embedding_calls_total")
+            metrics.inc("rag_embedded_texts_total", len(batch))
+            try:
+                return self._client.embed_documents(batch)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                with self._stats_lock:
+                    self._stats.retries += 1
+                delay = self.retry_backoff_s * 2 ** attempt
+                logger.warning(
+                    f"Embedding batch of {len(batch)} failed ({e}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+
+@lru_cache(maxsize=None)
+def _get_embedding_service(model_name: str) -> EmbeddingService:
+    return EmbeddingService(model_name=model_name)
+
+
+def get_embedding_service(model_name: str = None) -> EmbeddingService:
+    """Share one client (and its connection pool) per model across all callers."""
+    if model_name is None:
+        with load_conf() as conf:
+            model_name = conf.models.emb_model_name
+    return _get_embedding_service(model_name)
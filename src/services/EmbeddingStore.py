@@ -0,0 +1,159 @@
+"""
+A content-addressed, append-only store for embedding vectors.
+
+Replaces one pickle file per text with a single float32 matrix that is
+memory-mapped from disk, so looking up thousands of embeddings costs one
+mmap and a vectorized gather instead of thousands of file opens.
+
+Structure:
+    <embeddings_cache_dir>/
+        <model_slug>/
+            meta.json     # {"dim": <int>}
+            vectors.f32   # row-major float32 matrix, one row per key
+            keys.txt      # one key per line; line i <-> row i
+"""
+
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import load_conf
+from utilities import string
+
+# Read from the configuration by the first store opened without a
+# `root_dir` (tests point it elsewhere by setting it).
+EMBEDDINGS_DIR: Optional[str] = None
+
+_DTYPE = np.float32
+
+
+def _get_embeddings_dir() -> str:
+    global EMBEDDINGS_DIR
+    if EMBEDDINGS_DIR is None:
+        with load_conf() as conf:
+            EMBEDDINGS_DIR = str(conf.paths.embeddings_cache_dir)
+    return EMBEDDINGS_DIR
+
+
+class EmbeddingStore:
+    def __init__(self, model_name: str, root_dir: Optional[str] = None):
+        if root_dir is None:
+            root_dir = _get_embeddings_dir()
+        # Embeddings of different models must never be mixed up.
+        self._dir = os.path.join(root_dir, string.slugify(model_name))
+        os.makedirs(self._dir, exist_ok=True)
+        self._meta_path = os.path.join(self._dir, "meta.json")
+        self._vectors_path = os.path.join(self._dir, "vectors.f32")
+        self._keys_path = os.path.join(self._dir, "keys.txt")
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._index: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._load()
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._dim
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def get_many(self, keys: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Look up the embeddings stored under `keys`.
+        Returns a boolean hit mask of shape (len(keys),) and a matrix of
+        shape (mask.sum(), dim) holding the hits in the order of `keys`.
+        """
+        with self._lock:
+            rows = np.fromiter(
+                (self._index.get(k, -1) for k in keys), dtype=np.int64, count=len(keys)
+            )
+            hit_mask = rows >= 0
+            if not hit_mask.any():
+                return hit_mask, np.empty((0, self._dim or 0), dtype=_DTYPE)
+            matrix = self._get_matrix()
+            return hit_mask, np.asarray(matrix[rows[hit_mask]], dtype=_DTYPE)
+
+    def put_many(self, keys: Sequence[str], embs: np.ndarray):
+        """Append the embeddings of keys that are not stored yet."""
+        embs = np.asarray(embs, dtype=_DTYPE)
+        if embs.ndim != 2 or embs.shape[0] != len(keys):
+            raise ValueError(
+                f"Expected a ({len(keys)}, dim) matrix, got shape {embs.shape}."
+            )
+        with self._lock:
+            if self._dim is None:
+                self._dim = int(embs.shape[1])
+                with open(self._meta_path, "w") as f:
+                    json.dump({"dim": self._dim}, f)
+            elif embs.shape[1] != self._dim:
+                raise ValueError(
+                    f"Embedding dimension mismatch: store has {self._dim}, got {embs.shape[1]}."
+                )
+            new_keys: List[str] = []
+            new_rows: List[int] = []
+            for i, k in enumerate(keys):
+                if k in self._index:
+                    continue
+                self._index[k] = len(self._index)
+                new_keys.append(k)
+                new_rows.append(i)
+            if not new_keys:
+                return
+            # Vectors are written before keys: a crash in between leaves
+            # orphan rows, which `_load` truncates.
+            with open(self._vectors_path, "ab") as f:
+                f.write(embs[new_rows].tobytes())
+            with open(self._keys_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{k}\n" for k in new_keys))
+            # The file grew, so the current mapping is stale.
+            self._matrix = None
+
+    def _load(self):
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path) as f:
+            self._dim = int(json.load(f)["dim"])
+        keys: List[str] = []
+        if os.path.exists(self._keys_path):
+            with open(self._keys_path, encoding="utf-8") as f:
+                keys = f.read().splitlines()
+        n_rows = min(len(keys), self._count_rows())
+        if n_rows != len(keys) or n_rows != self._count_rows():
+            # An interrupted `put_many`; drop the unpaired tail so that
+            # later appends keep keys and rows aligned.
+            keys = keys[:n_rows]
+            with open(self._keys_path, "w", encoding="utf-8") as f:
+                f.write("".join(f"{k}\n" for k in keys))
+            if os.path.exists(self._vectors_path):
+                with open(self._vectors_path, "r+b") as f:
+                    f.truncate(n_rows * self._dim * np.dtype(_DTYPE).itemsize)
+        self._index = {k: row for row, k in enumerate(keys)}
+
+    def _count_rows(self) -> int:
+        if self._dim is None or not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (self._dim * np.dtype(_DTYPE).itemsize)
+
+    def _get_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.memmap(
+                self._vectors_path,
+                dtype=_DTYPE,
+                mode="r",
+                shape=(self._count_rows(), self._dim),
+            )
+        return self._matrix
+
+
+@lru_cache(maxsize=None)
+def get_embedding_store(model_name: str) -> EmbeddingStore:
+    """Share one store per model, so there is a single writer per process."""
+    return EmbeddingStore(model_name)
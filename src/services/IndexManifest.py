@@ -0,0 +1,75 @@
+"""
+A persisted record of what has been indexed into the vector store, so a
+restart only has to embed and insert what changed.
+
+Structure (<chroma_index_dir>/manifest.json):
+    {
+        "version": <int>,  # bumped whenever the indexed content changes
+        "documents": {
+            <doc_hash>: {"source": <str|null>, "chunk_ids": [<chunk_hash>, ...]}
+        }
+    }
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Set
+
+
+class IndexManifest:
+    def __init__(self, path: str):
+        self._path = path
+        self._version: int = 0
+        self._docs: Dict[str, Dict] = {}
+        self._dirty: bool = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._version = data.get("version", 0)
+            self._docs = data.get("documents", {})
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __contains__(self, doc_hash: str) -> bool:
+        return doc_hash in self._docs
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def doc_hashes(self) -> Set[str]:
+        return set(self._docs)
+
+    def source_of(self, doc_hash: str) -> Optional[str]:
+        return self._docs[doc_hash]["source"]
+
+    def add(self, doc_hash: str, chunk_ids: List[str], source: Optional[str] = None):
+        entry = self._docs.setdefault(doc_hash, {"source": source, "chunk_ids": []})
+        entry["chunk_ids"].extend(cid for cid in chunk_ids if cid not in entry["chunk_ids"])
+        self._mark_dirty()
+
+    def remove(self, doc_hash: str) -> List[str]:
+        """Forget a document; returns the ids of its chunks."""
+        entry = self._docs.pop(doc_hash, None)
+        if entry is None:
+            return []
+        self._mark_dirty()
+        return entry["chunk_ids"]
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        # Write to a temporary file first, so a crash never leaves
+        # a half-written manifest behind.
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self._version, "documents": self._docs}, f)
+        os.replace(tmp_path, self._path)
+        self._dirty = False
+
+    def _mark_dirty(self):
+        if not self._dirty:
+            self._version += 1
+        self._dirty = True
@@ -0,0 +1,169 @@
+"""
+Streams documents from files into the vector store:
+
+    load pages -> split batch -> embed + upsert batch
+
+Each stage runs on its own thread and the stages are connected by bounded
+queues, so they overlap and memory stays constant no matter how large the
+corpus is. Chunks become searchable as soon as their batch is upserted,
+while later pages are still being loaded.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Iterator, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from chain.document_loaders import lazy_load_documents_from_file
+from chain.document_retrievers import ChromaDocumentRetriever
+from core.config import load_conf
+from core.types import IngestionProgress
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output.
+_DONE = object()
+
+
+class _Aborted(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+class IngestionPipeline:
+    def __init__(
+        self,
+        retriever: ChromaDocumentRetriever,
+        batch_size: int = None,
+        queue_size: int = None,
+        on_progress: Optional[Callable[[IngestionProgress], None]] = None,
+        load_fn: Callable[[str], Iterator[Document]] = lazy_load_documents_from_file,
+    ):
+        with load_conf() as conf:
+            if batch_size is None:
+                batch_size = conf.ingestion.batch_size
+            if queue_size is None:
+                queue_size = conf.ingestion.queue_size
+        self.retriever = retriever
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.on_progress = on_progress
+        self.load_fn = load_fn
+        self._progress = IngestionProgress()
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._errors: List[BaseException] = []
+        self._threads: List[threading.Thread] = []
+        self._start_time: float = 0.0
+        self._seen_hashes: Set[str] = set()
+        self._sources: Set[str] = set()
+
+    @property
+    def progress(self) -> IngestionProgress:
+        with self._lock:
+            self._progress.seconds = time.perf_counter() - self._start_time
+            return IngestionProgress(**vars(self._progress))
+
+    def run(self, filepaths: List[str]) -> IngestionProgress:
+        """Ingest `filepaths` and block until everything is indexed."""
+        self.start(filepaths)
+        return self.wait()
+
+    def start(self, filepaths: List[str]):
+        """Start ingesting in the background; see `wait`."""
+        if self._threads:
+            raise RuntimeError("The pipeline has already been started.")
+        logger.info(f"Ingesting {len(filepaths)} files")
+        self._progress.files_total = len(filepaths)
+        self._start_time = time.perf_counter()
+        pages: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        chunks: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._threads = [
+            threading.Thread(target=self._run_stage, args=(self._load, filepaths, pages), name="ingest-load"),
+            threading.Thread(target=self._run_stage, args=(self._split, pages, chunks), name="ingest-split"),
+            threading.Thread(target=self._run_stage, args=(self._index, chunks), name="ingest-index"),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def wait(self) -> IngestionProgress:
+        for t in self._threads:
+            t.join()
+        if self._errors:
+            raise self._errors[0]
+        # Only now is the whole corpus known, so stale entries can go.
+        self.retriever.prune(keep=self._seen_hashes, sources=self._sources)
+        progress = self.progress
+        logger.info(
+            f"Ingested {progress.pages_loaded} pages ({progress.pages_skipped} unchanged) "
+            f"into {progress.chunks_indexed} chunks in {progress.seconds:.1f}s"
+        )
+        return progress
+
+    def _run_stage(self, stage: Callable, *args):
+        try:
+            stage(*args)
+        except _Aborted:
+            pass
+        except BaseException as e:
+            logger.error(f"Ingestion stage {threading.current_thread().name} failed: {e}")
+            self._errors.append(e)
+            self._abort.set()
+
+    def _load(self, filepaths: List[str], out: queue.Queue):
+        batch: List[Document] = []
+        for fpath in filepaths:
+            logger.debug(f"Loading document from {fpath}")
+            for page in self.load_fn(fpath):
+                batch.append(page)
+                if len(batch) >= self.batch_size:
+                    self._put(out, batch)
+                    batch = []
+            with self._lock:
+                self._progress.files_loaded += 1
+        if batch:
+            self._put(out, batch)
+        self._put(out, _DONE)
+
+    def _split(self, inp: queue.Queue, out: queue.Queue):
+        while (batch := self._get(inp)) is not _DONE:
+            doc_hashes, new_docs = self.retriever.filter_new_docs(batch)
+            self._seen_hashes.update(doc_hashes)
+            self._sources.update(doc.metadata.get("source") for doc in batch)
+            with self._lock:
+                self._progress.pages_loaded += len(batch)
+                self._progress.pages_skipped += len(batch) - len(new_docs)
+            if new_docs:
+                self._put(out, self.retriever.text_splitter.split(new_docs))
+        self._put(out, _DONE)
+
+    def _index(self, inp: queue.Queue):
+        while (chunks := self._get(inp)) is not _DONE:
+            self.retriever.index_chunks(chunks)
+            with self._lock:
+                self._progress.chunks_indexed += len(chunks)
+            if self.on_progress is not None:
+                self.on_progress(self.progress)
+
+    def _put(self, q: queue.Queue, item):
+        # Blocks while the next stage is busy (backpressure), but gives up
+        # when another stage has failed, instead of waiting forever.
+        while True:
+            if self._abort.is_set():
+                raise _Aborted()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue):
+        while True:
+            if self._abort.is_set():
+                raise _Aborted()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
@@ -0,0 +1,150 @@
+"""
+An in-process LRU cache in front of the query embedder.
+
+Support traffic repeats the same questions, and the router keeps
+producing the same LLM-generated variants of them, so most queries
+have been embedded before. Entries are bounded both by count and by
+the bytes their vectors take up. The optional disk tier (off by default)
+is the model's `EmbeddingStore`, which the splitter fills as well, so
+embeddings survive restarts. That store is never evicted from, so the
+tier suits a bounded set of recurring queries, not open-ended traffic.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.config import load_conf
+from core.types import CacheStats
+from services.EmbeddingStore import EmbeddingStore, get_embedding_store
+from utilities import metrics
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+def _get_model_name(emb_model: Embeddings) -> str:
+    for attr in ("model_name", "model"):
+        if isinstance(name := getattr(emb_model, attr, None), str):
+            return name
+    return type(emb_model).__name__
+
+
+# Interface: langchain_core.embeddings.Embeddings
+class QueryEmbeddingCache(Embeddings):
+    def __init__(
+        self,
+        emb_model: Embeddings,
+        model_name: str = None,
+        max_entries: int = None,
+        max_bytes: int = None,
+        disk_tier: Optional[bool] = None,
+        store: EmbeddingStore = None,
+    ):
+        with load_conf() as conf:
+            if max_entries is None:
+                max_entries = conf.query_embedding_cache.max_entries
+            if max_bytes is None:
+                max_bytes = conf.query_embedding_cache.max_bytes
+            if disk_tier is None:
+                disk_tier = conf.query_embedding_cache.disk_tier
+        if model_name is None:
+            model_name = _get_model_name(emb_model)
+        self.emb_model = emb_model
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        if disk_tier and store is None:
+            store = get_embedding_store(model_name)
+        self._store = store if disk_tier else None
+        # Keyed by (model name, text hash): vectors of different models never mix.
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._nbytes: int = 0
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**vars(self._stats))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed `texts`, sending only the ones not cached to the model, in one batch."""
+        if not texts:
+            return []
+        keys = [self._key(text) for text in texts]
+        embs: List[Optional[np.ndarray]] = [self._get(key) for key in keys]
+        missing = [i for i, emb in enumerate(embs) if emb is None]
+        if missing and self._store is not None:
+            hit_mask, hits = self._store.get_many([keys[i] for i in missing])
+            for i, emb in zip(np.asarray(missing)[hit_mask], hits):
+                embs[i] = self._put(keys[i], emb)
+            with self._lock:
+                self._stats.disk_hits += int(hit_mask.sum())
+            missing = [i for i in missing if embs[i] is None]
+        with self._lock:
+            self._stats.hits += len(texts) - len(missing)
+            self._stats.misses += len(missing)
+        metrics.inc("rag_cache_requests_total", len(texts) - len(missing), cache="query_embedding", result="hit")
+        metrics.inc("rag_cache_requests_total", len(missing), cache="query_embedding", result="miss")
+        if missing:
+            logger.debug("Query embedding cache: %d of %d missed", len(missing), len(texts))
+            # Each distinct text is embedded once, even if it repeats in `texts`.
+            distinct = list(dict.fromkeys(keys[i] for i in missing))
+            text_of = {keys[i]: texts[i] for i in missing}
+            new_embs = np.asarray(
+                self.emb_model.embed_documents([text_of[k] for k in distinct]), dtype=np.float32
+            )
+            if self._store is not None:
+                self._store.put_many(distinct, new_embs)
+            emb_of = {k: self._put(k, emb) for k, emb in zip(distinct, new_embs)}
+            for i in missing:
+                embs[i] = emb_of[keys[i]]
+        return [emb.tolist() for emb in embs]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _key(self, text: str) -> str:
+        # Same scheme as `vector.embed_texts`, so both share the disk tier
+        # (which is already separated by model).
+        return hashlib.md5(text.encode()).hexdigest()
+
+    def _get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            emb = self._entries.get((self.model_name, key))
+            if emb is not None:
+                self._entries.move_to_end((self.model_name, key))
+            return emb
+
+    def _put(self, key: str, emb: np.ndarray) -> np.ndarray:
+        emb = np.array(emb, dtype=np.float32)
+        # Cached vectors are shared between callers; nobody may modify them.
+        emb.flags.writeable = False
+        with self._lock:
+            if (old := self._entries.pop((self.model_name, key), None)) is not None:
+                self._nbytes -= old.nbytes
+            self._entries[(self.model_name, key)] = emb
+            self._nbytes += emb.nbytes
+            # Evict the least recently used entries until both bounds hold.
+            while len(self._entries) > self.max_entries or self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self._stats.evictions += 1
+        return emb
@@ -1,36 +1,179 @@
+import asyncio
 import logging
-from typing import List
+import time
+from typing import AsyncIterator, Iterator, List, Optional
 
 from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
 
-from core.ports import DocumentRetriever, ChatModel
-from core.types import QueryStr, QueryList, TranslationContext
-from utilities import fusion
+from core.ports import DocumentRetriever, ChatModel, QueryRouter
+from core.types import AnswerTrace, QueryStr, QueryList, TranslationContext, TranslationRoute
+from services.AnswerCache import AnswerCache
+from utilities import fusion, metrics
+from chain.query_translators import TranslatorRegistry
 from chain.routing import HeuristicRouter
 
-logger: logging.Logger = logging.getLogger()
+logger: logging.Logger = logging.getLogger(__name__)
 
 
 class RAGEngine:
     def __init__(
-        self, doc_retriever: DocumentRetriever, chat_model: ChatModel, sys_prompt_template: PromptTemplate
+        self,
+        doc_retriever: DocumentRetriever,
+        chat_model: ChatModel,
+        sys_prompt_template: PromptTemplate,
+        answer_cache: Optional[AnswerCache] = None,
+        router: QueryRouter = None,
+        translators: TranslatorRegistry = None,
     ):
         self.doc_retriever = doc_retriever
         self.chat_model = chat_model
         self.sys_prompt_template = sys_prompt_template
+        self.answer_cache = answer_cache
+        # Both are built once and shared by all queries.
+        self.router = router or HeuristicRouter()
+        self.translators = translators or TranslatorRegistry(chat_model)
+
+    def warm_up(self):
+        """
+        Pay the one-off costs (opening the index, connecting to the
+        embedding and LLM endpoints) up front instead of on the first
+        request. A failing endpoint is logged, not raised: the engine
+        still works and simply connects on first use.
+        """
+        start = time.perf_counter()
+        for component in (self.doc_retriever, self.chat_model):
+            try:
+                component.warm_up()
+            except Exception as e:
+                logger.warning(f"Warming up {type(component).__name__} failed: {e}")
+        logger.info(f"RAG engine warmed up in {time.perf_counter() - start:.1f}s")
+
+    def close(self):
+        """Release what the retriever holds (e.g. the splitter's worker processes)."""
+        if (close := getattr(self.doc_retriever, "close", None)) is not None:
+            close()
 
     def generate_answer(self, query: QueryStr, top_k: int = 4) -> str:
-        logger.debug(f"Generating answer for query: {query}")
-        router = HeuristicRouter(
-            ctx=TranslationContext(query=query, quantity=top_k, max_tokens=256),
-            chat_model=self.chat_model
-        )
-        router.route()
-        qlist: QueryList = router.run_route()
-        docs: List[List[Document]] = []
-        for q in qlist:
-            docs.append(self.doc_retriever.retrieve(q, top_k=top_k))
-        # Weed out the most relevant documents using Reciprocal Rank Fusion.
-        ranked_docs: List[Document] = fusion.perform_rrf(docs)
-        return self.chat_model.generate(self.sys_prompt_template, query, ranked_docs)
+        return self.generate_answer_traced(query, top_k).answer
+
+    async def agenerate_answer(self, query: QueryStr, top_k: int = 4) -> str:
+        """
+        Same pipeline as `generate_answer`, but the translators run
+        concurrently and retrieval doesn't block the event loop.
+        """
+        return (await self.agenerate_answer_traced(query, top_k)).answer
+
+    def generate_answer_traced(self, query: QueryStr, top_k: int = 4) -> AnswerTrace:
+        """Like `generate_answer`, but also reports the route, the chunks used and stage timings."""
+        logger.debug("Generating answer for query: %s", query)
+        trace = AnswerTrace(query=query)
+        with metrics.span("total", trace.timings):
+            if self.answer_cache is not None:
+                index_version = self.doc_retriever.index_version
+                with metrics.span("answer_cache", trace.timings):
+                    trace.answer = self.answer_cache.get(query, top_k, index_version)
+                if trace.answer is not None:
+                    trace.cached = True
+                    return trace
+            ranked_docs = self._retrieve_context(query, top_k, trace)
+            with metrics.span("generate", trace.timings):
+                trace.answer = self.chat_model.generate(self.sys_prompt_template, query, ranked_docs)
+            if self.answer_cache is not None:
+                self.answer_cache.put(query, top_k, index_version, trace.answer)
+        return trace
+
+    async def agenerate_answer_traced(self, query: QueryStr, top_k: int = 4) -> AnswerTrace:
+        logger.debug("Generating answer for query (async): %s", query)
+        trace = AnswerTrace(query=query)
+        with metrics.span("total", trace.timings):
+            if self.answer_cache is not None:
+                index_version = self.doc_retriever.index_version
+                with metrics.span("answer_cache", trace.timings):
+                    trace.answer = await asyncio.to_thread(
+                        self.answer_cache.get, query, top_k, index_version
+                    )
+                if trace.answer is not None:
+                    trace.cached = True
+                    return trace
+            ranked_docs = await self._aretrieve_context(query, top_k, trace)
+            with metrics.span("generate", trace.timings):
+                trace.answer = await self.chat_model.agenerate(
+                    self.sys_prompt_template, query, ranked_docs
+                )
+            if self.answer_cache is not None:
+                await asyncio.to_thread(self.answer_cache.put, query, top_k, index_version, trace.answer)
+        return trace
+
+    def generate_answer_stream(self, query: QueryStr, top_k: int = 4) -> Iterator[str]:
+        """Like `generate_answer`, but yields the answer token by token as it is generated."""
+        logger.debug("Streaming answer for query: %s", query)
+        if self.answer_cache is not None:
+            index_version = self.doc_retriever.index_version
+            if (answer := self.answer_cache.get(query, top_k, index_version)) is not None:
+                yield answer
+                return
+        ranked_docs = self._retrieve_context(query, top_k, AnswerTrace(query=query))
+        tokens: List[str] = []
+        # Covers the whole stream, including the time the consumer takes.
+        with metrics.span("generate_stream"):
+            for token in self.chat_model.generate_stream(self.sys_prompt_template, query, ranked_docs):
+                tokens.append(token)
+                yield token
+        if self.answer_cache is not None:
+            self.answer_cache.put(query, top_k, index_version, "".join(tokens))
+
+    async def agenerate_answer_stream(self, query: QueryStr, top_k: int = 4) -> AsyncIterator[str]:
+        logger.debug("Streaming answer for query (async): %s", query)
+        if self.answer_cache is not None:
+            index_version = self.doc_retriever.index_version
+            answer = await asyncio.to_thread(self.answer_cache.get, query, top_k, index_version)
+            if answer is not None:
+                yield answer
+                return
+        ranked_docs = await self._aretrieve_context(query, top_k, AnswerTrace(query=query))
+        tokens: List[str] = []
+        with metrics.span("generate_stream"):
+            async for token in self.chat_model.agenerate_stream(self.sys_prompt_template, query, ranked_docs):
+                tokens.append(token)
+                yield token
+        if self.answer_cache is not None:
+            await asyncio.to_thread(self.answer_cache.put, query, top_k, index_version, "".join(tokens))
+
+    def _plan(self, query: QueryStr, trace: AnswerTrace) -> TranslationRoute:
+        with metrics.span("route", trace.timings):
+            route = self.router.route(query)
+        trace.route = [method.value for method in route]
+        return route
+
+    @staticmethod
+    def _translation_context(query: QueryStr, top_k: int) -> TranslationContext:
+        return TranslationContext(query=query, quantity=top_k, max_tokens=256)
+
+    def _retrieve_context(self, query: QueryStr, top_k: int, trace: AnswerTrace) -> List[Document]:
+        route = self._plan(query, trace)
+        with metrics.span("translate", trace.timings):
+            qlist: QueryList = self.translators.run(route, self._translation_context(query, top_k))
+        self.router.save_session(qlist)
+        with metrics.span("retrieve", trace.timings):
+            # One batched embedding call and search round for all the queries.
+            rankings = self.doc_retriever.retrieve_many(qlist, top_k=top_k)
+        return self._fuse(rankings, trace)
+
+    async def _aretrieve_context(self, query: QueryStr, top_k: int, trace: AnswerTrace) -> List[Document]:
+        route = self._plan(query, trace)
+        with metrics.span("translate", trace.timings):
+            qlist: QueryList = await self.translators.arun(route, self._translation_context(query, top_k))
+        self.router.save_session(qlist)
+        with metrics.span("retrieve", trace.timings):
+            rankings = await self.doc_retriever.aretrieve_many(qlist, top_k=top_k)
+        return self._fuse(rankings, trace)
+
+    @staticmethod
+    def _fuse(rankings, trace: AnswerTrace) -> List[Document]:
+        docs: List[List[Document]] = [[doc for doc, _ in ranking] for ranking in rankings]
+        with metrics.span("rrf", trace.timings):
+            # Weed out the most relevant documents using Reciprocal Rank Fusion.
+            ranked_docs: List[Document] = fusion.perform_rrf(docs)
+        trace.chunk_ids = [doc.id or doc.metadata.get("chunk_id") for doc in ranked_docs]
+        return ranked_docs
@@ -0,0 +1,188 @@
+"""
+An append-only JSONL journal of what the pipeline did (routes taken,
+chunks produced), written off the hot path.
+
+`record` only puts the record on a bounded queue; a background thread
+serializes and appends it. When the queue is full the record is dropped
+(and counted) rather than blocking the caller. If the file cannot be
+written, rotated or reopened the journal disables itself instead of
+taking the writer thread down. Files are rotated by size:
+
+    <directory>/
+        journal.jsonl      # being written
+        journal.1.jsonl    # the previous one, up to `backup_count` of them
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from core.config import load_conf
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+_FILENAME = "journal"
+_CLOSE = object()
+_TIMEOUT_S = 5.0
+
+
+def _to_jsonable(obj: Any) -> Any:
+    # Documents (and anything else shaped like them), enums, paths, ...
+    if hasattr(obj, "page_content"):
+        return {"page_content": obj.page_content, "metadata": getattr(obj, "metadata", {})}
+    if hasattr(obj, "value"):
+        return obj.value
+    return str(obj)
+
+
+class SessionJournal:
+    def __init__(
+        self,
+        directory: str,
+        enabled: Optional[bool] = None,
+        max_bytes: int = None,
+        backup_count: int = None,
+        max_queue: int = None,
+    ):
+        with load_conf() as conf:
+            if enabled is None:
+                enabled = conf.session_journal.enabled
+            if max_bytes is None:
+                max_bytes = conf.session_journal.max_bytes
+            if backup_count is None:
+                backup_count = conf.session_journal.backup_count
+            if max_queue is None:
+                max_queue = conf.session_journal.max_queue
+        self.directory = directory
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.path = os.path.join(directory, f"{_FILENAME}.jsonl")
+        self.dropped: int = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._writer: Optional[threading.Thread] = None
+        if enabled:
+            os.makedirs(directory, exist_ok=True)
+            self._writer = threading.Thread(
+                target=self._write_loop, name="session-journal", daemon=True
+            )
+            self._writer.start()
+
+    def record(self, kind: str, data: Dict) -> bool:
+        """Queue a record for writing. Never blocks; returns False if it had to be dropped."""
+        if not self.enabled or self._writer is None or not self._writer.is_alive():
+            return False
+        try:
+            self._queue.put_nowait({"ts": datetime.now().isoformat(), "kind": kind, **data})
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout: float = _TIMEOUT_S) -> bool:
+        """Wait until everything queued so far is on disk; False if it did not get there in time."""
+        if self._writer is None or not self._writer.is_alive():
+            return False
+        flushed = threading.Event()
+        try:
+            self._queue.put(flushed, timeout=timeout)
+        except queue.Full:
+            return False
+        return flushed.wait(timeout)
+
+    def close(self, timeout: float = _TIMEOUT_S):
+        if self._writer is None:
+            return
+        writer, self._writer = self._writer, None
+        if writer.is_alive():
+            try:
+                self._queue.put(_CLOSE, timeout=timeout)
+            except queue.Full:
+                logger.warning(f"Session journal {self.path}: writer did not drain the queue, not waiting for it")
+            else:
+                writer.join(timeout)
+        if self.dropped:
+            logger.warning(f"Session journal {self.path}: dropped {self.dropped} records (queue full)")
+
+    def _open(self):
+        try:
+            return open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            self._disable(e)
+            return None
+
+    def _disable(self, error: Exception):
+        # Keep draining the queue (so flush and close return), but stop taking records.
+        self.enabled = False
+        logger.error(f"Session journal {self.path}: disabled after an I/O error: {error}")
+
+    def _write_loop(self):
+        f = self._open()
+        while True:
+            item = self._queue.get()
+            # Write everything that is already waiting, then flush once.
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = any(record is _CLOSE for record in batch)
+            try:
+                if f is not None:
+                    for record in batch:
+                        if not isinstance(record, dict):
+                            continue
+                        try:
+                            f.write(json.dumps(record, ensure_ascii=False, default=_to_jsonable) + "\n")
+                        except Exception as e:
+                            logger.warning(f"Session journal: could not write a {record.get('kind')} record: {e}")
+                    f.flush()
+                    if f.tell() >= self.max_bytes:
+                        f.close()
+                        f = None
+                        self._rotate()
+                        f = self._open()
+            except Exception as e:
+                self._disable(e)
+                if f is not None:
+                    try:
+                        f.close()
+                    except OSError:
+                        pass
+                    f = None
+            finally:
+                for record in batch:
+                    if isinstance(record, threading.Event):
+                        record.set()
+                    self._queue.task_done()
+            if closing:
+                break
+        if f is not None:
+            f.close()
+
+    def _rotate(self):
+        # journal.jsonl -> journal.1.jsonl -> ... -> journal.<backup_count>.jsonl (dropped)
+        for i in range(self.backup_count - 1, 0, -1):
+            src = os.path.join(self.directory, f"{_FILENAME}.{i}.jsonl")
+            if os.path.exists(src):
+                os.replace(src, os.path.join(self.directory, f"{_FILENAME}.{i + 1}.jsonl"))
+        if self.backup_count > 0:
+            os.replace(self.path, os.path.join(self.directory, f"{_FILENAME}.1.jsonl"))
+        else:
+            os.remove(self.path)
+        logger.debug(f"Rotated session journal {self.path}")
+
+
+@lru_cache(maxsize=None)
+def get_session_journal(directory: str) -> SessionJournal:
+    """One journal (and writer thread) per directory, flushed when the process exits."""
+    journal = SessionJournal(str(directory))
+    atexit.register(journal.close)
+    return journal
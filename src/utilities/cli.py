@@ -20,6 +20,31 @@ def parse_args(sys_args: Sequence[str] | None = None) -> argparse.Namespace:
     parser.add_argument(
         "--shell", action="store_true", help="Run the assistant in shell mode."
     )
+    parser.add_argument(
+        "--serve", action="store_true", help="Serve the assistant as an HTTP API."
+    )
+    parser.add_argument(
+        "--host", default=None, help="Host to bind in --serve mode (default: from settings)."
+    )
+    parser.add_argument(
+        "--port", type=int, default=None, help="Port to bind in --serve mode (default: from settings)."
+    )
+    parser.add_argument(
+        "--batch", metavar="QUERIES_JSONL", default=None,
+        help="Answer the queries in a JSONL file and exit.",
+    )
+    parser.add_argument(
+        "--batch-output", metavar="ANSWERS_JSONL", default=None,
+        help="Where --batch writes (and resumes) answers (default: <QUERIES_JSONL>.answers.jsonl).",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=None,
+        help="Queries answered at once in --batch mode (default: from settings).",
+    )
+    parser.add_argument(
+        "--import-profile", action="store_true",
+        help="Report how long importing each dependency takes at startup, and exit.",
+    )
     return parser.parse_args(list(sys_args))
 
 
@@ -38,6 +63,11 @@ def with_temp_message(message: str):
     return decorator
 
 
+def show_temp_message(message: str):
+    """Replace the current terminal line with `message`."""
+    print(f"\r\033[K{message}", end="", flush=True)
+
+
 class TempMsg:
     def __enter__(self, msg: str):
         print(f"\r{msg}", end="", flush=True)
@@ -5,7 +5,7 @@ from langchain_core.documents import Document
 
 from utilities import cli
 
-logger: logging.Logger = logging.getLogger()
+logger: logging.Logger = logging.getLogger(__name__)
 
 
 @cli.with_temp_message(message="Performing reciprocal rank fusion...")
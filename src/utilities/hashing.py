@@ -5,3 +5,11 @@ import json
 def compute_hash(data: object, *args, **kwargs) -> str:
     json_bytes = json.dumps(data, *args, **kwargs).encode("utf-8")
     return hashlib.sha256(json_bytes).hexdigest()
+
+
+def compute_bytes_hash(data: bytes, *salt: object) -> str:
+    """Hash raw bytes together with parameters that affect their meaning."""
+    h = hashlib.sha256(data)
+    for s in salt:
+        h.update(b"\0" + str(s).encode("utf-8"))
+    return h.hexdigest()
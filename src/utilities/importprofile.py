@@ -0,0 +1,79 @@
+"""
+Where startup time goes: imports the given modules in a fresh interpreter
+under `python -X importtime` and summarizes its report by top-level
+package (the time a package's modules spent executing themselves) and by
+the modules imported directly (their cumulative time).
+"""
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    module: str
+    depth: int  # 0: imported by the profiled statement itself
+    self_us: int
+    cumulative_us: int
+
+
+def parse_importtime(report: str) -> List[ImportTiming]:
+    """Parse `-X importtime` output: `import time: <self> | <cumulative> | <indented name>`."""
+    timings: List[ImportTiming] = []
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line.
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip(" ")
+        timings.append(
+            ImportTiming(
+                module=stripped,
+                # The name is indented by two spaces per level, after one separator space.
+                depth=(len(name) - len(stripped) - 1) // 2,
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+            )
+        )
+    return timings
+
+
+def format_report(timings: List[ImportTiming], top: int = 15) -> str:
+    total_us = sum(t.self_us for t in timings)
+    by_package: Dict[str, int] = {}
+    for t in timings:
+        package = t.module.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + t.self_us
+    direct = sorted((t for t in timings if t.depth == 0), key=lambda t: t.cumulative_us, reverse=True)
+
+    lines = [f"Imported {len(timings)} modules in {total_us / 1e6:.2f}s", "", f"{'package':<40}{'ms':>10}{'share':>8}"]
+    for package, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        lines.append(f"{package:<40}{us / 1e3:>10.1f}{us / max(total_us, 1):>8.0%}")
+    lines += ["", f"{'imported directly':<40}{'cumulative ms':>18}"]
+    for t in direct[:top]:
+        lines.append(f"{t.module:<40}{t.cumulative_us / 1e3:>18.1f}")
+    return "\n".join(lines)
+
+
+def profile_imports(modules: Sequence[str], top: int = 15) -> str:
+    """
+    Import `modules` (in order) in a child interpreter, which sees the
+    same `sys.path`, and return the summarized report.
+    """
+    statement = "; ".join(f"import {module}" for module in modules)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(p for p in sys.path if p)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Profiling imports failed:\n{proc.stderr[-2000:]}")
+    return format_report(parse_importtime(proc.stderr), top=top)
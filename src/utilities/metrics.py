@@ -0,0 +1,209 @@
+"""
+In-process metrics: counters, gauges and latency histograms, exposed in
+the Prometheus text format (`render_prometheus`) or as a short summary
+for terminal mode (`format_summary`). No network involved; all state
+lives in this module and is safe to update from any thread.
+
+Series are identified by a name and a set of labels:
+
+    with metrics.span("retrieve", trace.timings):
+        ...
+    metrics.inc("rag_cache_requests_total", cache="answer", result="hit")
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Seconds; covers everything from a cache lookup to a slow LLM call.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+STAGE_SECONDS = "rag_stage_seconds"
+
+_HELP: Dict[str, str] = {
+    STAGE_SECONDS: "Time spent in each pipeline stage.",
+    "rag_cache_requests_total": "Cache lookups by cache and result (hit/miss).",
+    "rag_llm_calls_total": "Calls to the chat model endpoint.",
+    "rag_embedding_calls_total": "Calls to the embedding endpoint.",
+    "rag_embedded_texts_total": "Texts sent to the embedding endpoint.",
+    "rag_server_in_flight": "Queries being answered by the API server.",
+    "rag_server_queued": "Queries waiting for a slot in the API server.",
+    "rag_server_rejected_total": "Queries turned away with 429.",
+}
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * len(buckets)  # per bucket, not cumulative
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate, interpolating linearly within the bucket (like PromQL's histogram_quantile)."""
+        if self.count == 0:
+            return math.nan
+        rank = q * self.count
+        seen, lower = 0, 0.0
+        for upper, n in zip(self.buckets, self.counts):
+            if n and seen + n >= rank:
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = upper
+        # Beyond the last bucket.
+        return self.buckets[-1]
+
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, _Labels], float] = {}
+_gauges: Dict[Tuple[str, _Labels], float] = {}
+_histograms: Dict[Tuple[str, _Labels], _Histogram] = {}
+
+
+def _key(name: str, labels: Dict[str, object]) -> Tuple[str, _Labels]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels):
+    key = _key(name, labels)
+    with _lock:
+        if (hist := _histograms.get(key)) is None:
+            hist = _histograms[key] = _Histogram(buckets)
+        hist.observe(value)
+
+
+@contextmanager
+def span(stage: str, timings: Optional[Dict[str, float]] = None, **labels) -> Iterator[None]:
+    """
+    Time the block into the `rag_stage_seconds` histogram, even if it raises,
+    and also into `timings[stage]` when given (e.g. an `AnswerTrace`'s).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if timings is not None:
+            timings[stage] = seconds
+        observe(STAGE_SECONDS, seconds, stage=stage, **labels)
+
+
+def cache_result(cache: str, hit: bool):
+    inc("rag_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def get_counter(name: str, **labels) -> float:
+    with _lock:
+        return _counters.get(_key(name, labels), 0.0)
+
+
+def get_histogram_count(name: str, **labels) -> int:
+    with _lock:
+        hist = _histograms.get(_key(name, labels))
+        return hist.count if hist is not None else 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: _Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def render_prometheus() -> str:
+    """All series in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {
+            k: (h.buckets, list(h.counts), h.sum, h.count) for k, h in _histograms.items()
+        }
+    lines: List[str] = []
+
+    def header(name: str, kind: str):
+        if name in _HELP:
+            lines.append(f"# HELP {name} {_HELP[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for kind, series in (("counter", counters), ("gauge", gauges)):
+        for name in sorted({name for name, _ in series}):
+            header(name, kind)
+            for (n, labels), value in sorted(series.items()):
+                if n == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for name in sorted({name for name, _ in histograms}):
+        header(name, "histogram")
+        for (n, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for upper, c in zip(buckets, counts):
+                cumulative += c
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, ('le', _format_value(upper)))} {cumulative}"
+                )
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def format_summary() -> str:
+    """A human-readable digest: latency per stage and all counters."""
+    with _lock:
+        stages = [
+            (labels, h.count, h.sum, h.quantile(0.5), h.quantile(0.95))
+            for (name, labels), h in sorted(_histograms.items()) if name == STAGE_SECONDS
+        ]
+        counters = sorted(_counters.items())
+    lines = [f"{'stage':<40}{'count':>8}{'mean ms':>10}{'~p50 ms':>10}{'~p95 ms':>10}"]
+    for labels, count, total, p50, p95 in stages:
+        label = ",".join(v if k == "stage" else f"{k}={v}" for k, v in labels)
+        lines.append(
+            f"{label:<40}{count:>8}{total / count * 1000:>10.1f}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}"
+        )
+    for (name, labels), value in counters:
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    return "\n".join(lines)
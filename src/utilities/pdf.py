@@ -1,24 +1,196 @@
 # ! requires pymupdf pillow pytesseract pypdf
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
+from itertools import repeat
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple
 
-import fitz
 import pytesseract
 from PIL import Image
 from pypdf import PdfReader, PdfWriter
 
+from core.config import load_conf
+from core.types import CacheAttr, OCRProgress
+from services.CacheManager import CacheManager
+from utilities import hashing
+
+# PyMuPDF is imported where it is used, so that `page_needs_ocr` works without it.
+if TYPE_CHECKING:
+    import fitz
+
+# The source document, opened once per worker process.
+_worker_doc: Optional["fitz.Document"] = None
+
+
+def _init_ocr_worker(src_path: str):
+    import fitz
+
+    global _worker_doc
+    _worker_doc = fitz.open(src_path)
+    # Parallelism comes from the pool; keep each tesseract
+    # process single-threaded to avoid oversubscribing the cores.
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _render_page(page_idx: int, dpi: int, lang: str) -> Tuple[Image.Image, str]:
+    """Returns the rendered page and its OCR cache key."""
+    pix = _worker_doc[page_idx].get_pixmap(dpi=dpi)
+    cache_id = hashing.compute_bytes_hash(pix.samples, pix.width, pix.height, dpi, lang)
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples), cache_id
+
+
+def _ocr_page_to_pdf(page_idx: int, dpi: int, lang: str) -> bytes:
+    img, cache_id = _render_page(page_idx, dpi, lang)
+    cmng = CacheManager("ocr")
+    try:
+        return cmng.get(cache_id, CacheAttr.OCR_PDF, read_as_binary=True)
+    except FileNotFoundError:
+        pass
+    pdf_bytes = pytesseract.image_to_pdf_or_hocr(img, extension="pdf", lang=lang)
+    cmng.set(cache_id, {CacheAttr.OCR_PDF: pdf_bytes}, write_as_binary=True)
+    return pdf_bytes
+
+
+def _ocr_page_to_text(page_idx: int, dpi: int, lang: str) -> str:
+    img, cache_id = _render_page(page_idx, dpi, lang)
+    cmng = CacheManager("ocr")
+    try:
+        return cmng.get(cache_id, CacheAttr.OCR_TEXT)
+    except FileNotFoundError:
+        pass
+    text = pytesseract.image_to_string(img, lang=lang)
+    cmng.set(cache_id, {CacheAttr.OCR_TEXT: text})
+    return text
+
+
+def _create_ocr_pool(src_path: str, n_workers: int, n_pages: int) -> ProcessPoolExecutor:
+    # 0 means one worker per core.
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, n_pages))
+    return ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_ocr_worker,
+        initargs=(src_path,),
+    )
+
+
+def page_needs_ocr(
+    n_chars: int,
+    page_area: float,
+    image_area: float,
+    min_text_chars: int,
+    min_glyph_density: float,
+    min_image_coverage: float,
+) -> bool:
+    """
+    Decide whether a page lacks a usable text layer. Areas are in points^2.
+    A page qualifies when images cover a large part of it (i.e. it is a scan)
+    and its extracted text is either too short or too sparse for its size.
+    """
+    if page_area <= 0:
+        return False
+    if image_area / page_area < min_image_coverage:
+        return False
+    glyph_density = n_chars / (page_area / 72 ** 2)
+    return n_chars < min_text_chars or glyph_density < min_glyph_density
+
+
+def triage_pdf_pages(src_path: str) -> List[int]:
+    """Returns the indices of the pages that need OCR."""
+    import fitz
+
+    with load_conf() as conf:
+        params = conf.ocr
+    needs_ocr: List[int] = []
+    with fitz.open(src_path) as doc:
+        for idx, page in enumerate(doc):
+            image_area = sum(
+                abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info()
+            )
+            if page_needs_ocr(
+                n_chars=len(page.get_text().strip()),
+                page_area=abs(page.rect),
+                # Overlapping images must not add up to more than the page.
+                image_area=min(image_area, abs(page.rect)),
+                min_text_chars=params.min_text_chars,
+                min_glyph_density=params.min_glyph_density,
+                min_image_coverage=params.min_image_coverage,
+            ):
+                needs_ocr.append(idx)
+    return needs_ocr
+
+
+def ocr_pdf_pages(
+    src_path: str,
+    page_indices: List[int],
+    dpi: int = None,
+    lang: str = None,
+    n_workers: int = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    OCR the given pages on a process pool; returns an iterator over
+    (page index, text) in order. Work starts right away, before the
+    iterator is consumed.
+    """
+    if not page_indices:
+        return iter(())
+    with load_conf() as conf:
+        if dpi is None:
+            dpi = conf.ocr.dpi
+        if lang is None:
+            lang = conf.ocr.lang
+        if n_workers is None:
+            n_workers = conf.ocr.workers
+    pool = _create_ocr_pool(src_path, n_workers, len(page_indices))
+    texts = pool.map(_ocr_page_to_text, page_indices, repeat(dpi), repeat(lang))
+
+    def _results() -> Iterator[Tuple[int, str]]:
+        try:
+            yield from zip(page_indices, texts)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    return _results()
+
 
 # ! Writes to the directory instead of returning binary.
 def perform_ocr_on_pdf(
-    src_path: str, dest_path: str, dpi: int = 300, lang: str = "tur+eng"
+    src_path: str,
+    dest_path: str,
+    dpi: int = None,
+    lang: str = None,
+    n_workers: int = None,
+    on_progress: Optional[Callable[[OCRProgress], None]] = None,
 ) -> None:
-    doc = fitz.open(src_path)
+    """
+    Rasterize and OCR the pages of `src_path` on a process pool and write
+    the searchable result to `dest_path`. Pages are added to the output in
+    their original order as soon as they (and all pages before them) are done.
+    """
+    import fitz
+
+    with load_conf() as conf:
+        if dpi is None:
+            dpi = conf.ocr.dpi
+        if lang is None:
+            lang = conf.ocr.lang
+        if n_workers is None:
+            n_workers = conf.ocr.workers
+    with fitz.open(src_path) as doc:
+        n_pages = doc.page_count
+    progress = OCRProgress(pages_total=n_pages)
+    start = time.perf_counter()
     writer = PdfWriter()
-    for page in doc:
-        pix = page.get_pixmap(dpi=dpi)
-        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
-        pdf_bytes = pytesseract.image_to_pdf_or_hocr(img, extension="pdf", lang=lang)
-        reader = PdfReader(BytesIO(pdf_bytes))
-        for p in reader.pages:
-            writer.add_page(p)
+    with _create_ocr_pool(src_path, n_workers, n_pages) as pool:
+        page_pdfs = pool.map(_ocr_page_to_pdf, range(n_pages), repeat(dpi), repeat(lang))
+        for pdf_bytes in page_pdfs:
+            for p in PdfReader(BytesIO(pdf_bytes)).pages:
+                writer.add_page(p)
+            progress.pages_done += 1
+            progress.seconds = time.perf_counter() - start
+            if on_progress is not None:
+                on_progress(progress)
     with open(dest_path, "wb") as f:
         writer.write(f)
@@ -1,8 +1,10 @@
 import re
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List
 
 _PLACEHOLDER_RE = re.compile(r"\$\{(\w+)\}")
 _SPLIT_SENTENCES_RE = re.compile(r"(?<=[.!?])\s+")
+_SLUG_UNSAFE_RE = re.compile(r"[^\w.-]+")
+_LONE_STAR_RE = re.compile(r"(?<!\*)\*(?!\*)")
 
 
 def replace_placeholders(string: str, mapping: Dict[str, str]) -> str:
@@ -74,6 +76,22 @@ def windowed_concat(sentences: List[str], bufsz: int) -> List[str]:
     return windowed
 
 
+def slugify(string: str) -> str:
+    """
+    Makes a string safe to be used as a single path component.
+
+    Every run of characters other than letters, digits, '_', '.' and '-' is
+    replaced with a single underscore, e.g. 'BAAI/bge-m3' -> 'BAAI_bge-m3'.
+
+    Args:
+        string (str): The input string, e.g. a model name.
+
+    Returns:
+        str: The sanitized string.
+    """
+    return _SLUG_UNSAFE_RE.sub("_", string).strip("_")
+
+
 def format_response(response: str) -> str:
     """
     Convert simple asterisk-based markup to ANSI terminal formatting:
@@ -101,3 +119,54 @@ def format_response(response: str) -> str:
         _format_segment(p) if i % 2 == 0 else p for i, p in enumerate(parts)
     )
     return formatted
+
+
+def _complete_markup_len(text: str) -> int:
+    """Length of the longest prefix of `text` with no markup span left open."""
+    i = 0
+    while i < len(text):
+        if text[i] == "`":
+            marker = "`"
+        elif text.startswith("**", i):
+            marker = "**"
+        elif text[i] == "*":
+            marker = "*"
+        else:
+            i += 1
+            continue
+        if marker == "*":
+            # A lone star; the halves of a "**" don't close an italic span.
+            m = _LONE_STAR_RE.search(text, i + 1)
+            # A star at the very end may still turn out to be half of a "**".
+            close = m.start() if m and m.end() < len(text) else -1
+        else:
+            close = text.find(marker, i + len(marker))
+        line_end = text.find("\n", i)
+        if close == -1:
+            if line_end == -1:
+                # The span may still be closed by the text to come.
+                return i
+            # Spans don't cross lines, so this is a literal character.
+            i += len(marker)
+        elif line_end != -1 and line_end < close:
+            i += len(marker)
+        else:
+            i = close + len(marker)
+    return len(text)
+
+
+def format_response_stream(tokens: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming counterpart of `format_response`.
+
+    Yields formatted text as soon as it is known not to be part
+    of an unfinished markup span; only such a span is held back.
+    """
+    pending = ""
+    for token in tokens:
+        pending += token
+        if (n := _complete_markup_len(pending)) > 0:
+            yield format_response(pending[:n])
+            pending = pending[n:]
+    if pending:
+        yield format_response(pending)
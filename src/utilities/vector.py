@@ -1,14 +1,11 @@
 import hashlib
-from typing import List, Optional
+from typing import Dict, List
 
 import numpy as np
-from langchain_huggingface import HuggingFaceEndpointEmbeddings
 
 from core.config import load_conf
-from core.types import CacheAttr
-from services.CacheManager import CacheManager
-
-conf = load_conf()
+from services.EmbeddingService import get_embedding_service
+from services.EmbeddingStore import get_embedding_store
 
 
 def cosine_similarity(v1: np.ndarray, v2: np.ndarray) -> float:
@@ -25,56 +22,63 @@ def calc_pairwise_semantic_distances(embs: np.ndarray) -> List[float]:
     # One element or empty.
     if embs.shape[0] <= 1:
         return []
-    dists: List[float] = []
-    for i in range(embs.shape[0] - 1):
-        d = 1.0 - cosine_similarity(embs[i], embs[i + 1])
-        dists.append(float(d))
-    return dists
+    unit = embs / np.linalg.norm(embs, axis=1, keepdims=True)
+    # Row-wise dot product of each vector with its successor.
+    sims = np.einsum("ij,ij->i", unit[:-1], unit[1:])
+    return (1.0 - sims).astype(float).tolist()
+
+
+def windowed_mean(embs: np.ndarray, bufsz: int) -> np.ndarray:
+    """
+    Embedding counterpart of `string.windowed_concat`:
+    row i is the mean of embs[i - bufsz : i + bufsz + 1],
+    clipped at the edges. Computed with a prefix sum,
+    so the cost does not depend on `bufsz`.
+    """
+    if bufsz < 0:
+        raise ValueError("`bufsz` must be a positive integer.")
+    n = embs.shape[0]
+    prefix = np.zeros((n + 1, embs.shape[1]), dtype=np.float64)
+    np.cumsum(embs, axis=0, out=prefix[1:])
+    idx = np.arange(n)
+    start = np.maximum(0, idx - bufsz)
+    end = np.minimum(n, idx + bufsz + 1)
+    sums = prefix[end] - prefix[start]
+    return (sums / (end - start)[:, None]).astype(np.float32)
 
 
 def embed_texts(texts: List[str], model_name: str = None) -> np.ndarray:
     """
     Returns a list of embedded strings (vectors) for
     each corresponding element in the original list.
+    Embeddings are looked up in and written back to
+    the model's `EmbeddingStore`, so each distinct
+    text is sent to the encoder only once.
     """
     if not texts:
         return np.empty((0,))
-    embs: List[np.ndarray] = [None] * len(texts)
-    hashed: List[Optional[str]] = [None] * len(texts)
-    cache_hit_idx = set()
-    cmng = CacheManager("texts")
-    for i, text in enumerate(texts):
-        hashed[i] = hashlib.md5(text.encode()).hexdigest()
-        try:
-            hit, cached_emb = cmng.get(
-                cache_id=hashed[i],
-                attr=CacheAttr.EMBEDDINGS,
-                read_as_binary=True
-            )
-            cache_hit_idx.add(i)
-            if isinstance(cached_emb, (bytes, bytearray)):
-                arr = np.frombuffer(cached_emb, dtype=np.float32).copy()
-            else:
-                arr = np.array(cached_emb, dtype=np.float32)
-            embs[i] = arr
-        except FileNotFoundError:
-            continue
-    # If all texts have been retrieved from cache, return cached data.
-    if len(cache_hit_idx) == len(texts):
-        return np.vstack(embs).astype(np.float32)
-    # Otherwise, run the encoder for some texts.
     if model_name is None:
         # Use the default embedding model if not specified.
-        model_name = conf.models.emb_model_name
-    encoder = HuggingFaceEndpointEmbeddings(
-        model=model_name,
-        huggingfacehub_api_token=conf.hf_token.get_secret_value()
-    )
-    missing_indices = [i for i in range(len(texts)) if i not in cache_hit_idx]
-    missing_texts = [texts[i] for i in missing_indices]
-    if missing_texts:
-        new_embs = encoder.embed_documents(missing_texts)
-        for idx, new_emb in zip(missing_indices, new_embs):
-            arr = np.array(new_emb, dtype=np.float32)
-            embs[idx] = arr
-    return np.vstack(embs).astype(np.float32)
+        with load_conf() as conf:
+            model_name = conf.models.emb_model_name
+    store = get_embedding_store(model_name)
+    hashed: List[str] = [hashlib.md5(text.encode()).hexdigest() for text in texts]
+    hit_mask, hit_embs = store.get_many(hashed)
+    # If all texts have been retrieved from cache, return cached data.
+    if hit_mask.all():
+        return hit_embs
+    # Otherwise, run the encoder for the missing texts, each distinct text once.
+    missing_indices = np.flatnonzero(~hit_mask)
+    missing: Dict[str, str] = {}
+    for i in missing_indices:
+        missing.setdefault(hashed[i], texts[i])
+    encoder = get_embedding_service(model_name)
+    new_embs = np.asarray(encoder.embed_documents(list(missing.values())), dtype=np.float32)
+    store.put_many(list(missing.keys()), new_embs)
+    row_of = {h: row for row, h in enumerate(missing.keys())}
+    embs = np.empty((len(texts), new_embs.shape[1]), dtype=np.float32)
+    # A store without a single vector yet doesn't know its dimension.
+    if hit_mask.any():
+        embs[hit_mask] = hit_embs
+    embs[missing_indices] = new_embs[[row_of[hashed[i]] for i in missing_indices]]
+    return embs
@@ -0,0 +1,102 @@
+from services.AnswerCache import AnswerCache
+
+
+class DictEmbedder:
+    """Embeds the texts it knows with fixed vectors."""
+
+    VECTORS = {
+        "how much does it cost": [1.0, 0.0],
+        "how much does it cost?": [0.99, 0.01],
+        "who is the ceo": [0.0, 1.0],
+    }
+
+    def embed_query(self, text):
+        return self.VECTORS[text]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def create_cache(clock=None, max_entries=8):
+    return AnswerCache(
+        DictEmbedder(),
+        similarity_threshold=0.95,
+        ttl_s=60,
+        max_entries=max_entries,
+        clock=clock or FakeClock(),
+    )
+
+
+def test_similar_question_hits_and_different_one_misses():
+    cache = create_cache()
+    cache.put("how much does it cost", top_k=4, index_version=1, answer="$10")
+
+    assert cache.get("how much does it cost?", top_k=4, index_version=1) == "$10"
+    assert cache.get("who is the ceo", top_k=4, index_version=1) is None
+    assert cache.get("how much does it cost", top_k=8, index_version=1) is None
+    assert (cache.stats.hits, cache.stats.misses) == (1, 2)
+
+
+def test_index_version_change_invalidates_answers():
+    cache = create_cache()
+    cache.put("how much does it cost", top_k=4, index_version=1, answer="$10")
+
+    assert cache.get("how much does it cost", top_k=4, index_version=2) is None
+    assert len(cache) == 0
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = create_cache(clock)
+    cache.put("how much does it cost", top_k=4, index_version=1, answer="$10")
+
+    clock.now = 61.0
+
+    assert cache.get("how much does it cost", top_k=4, index_version=1) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = create_cache(max_entries=1)
+    cache.put("how much does it cost", top_k=4, index_version=1, answer="$10")
+    cache.put("who is the ceo", top_k=4, index_version=1, answer="Ada")
+
+    assert cache.get("how much does it cost", top_k=4, index_version=1) is None
+    assert cache.get("who is the ceo", top_k=4, index_version=1) == "Ada"
+    assert cache.stats.evictions == 1
+
+
+class OneHotEmbedder:
+    """"q<i>" -> the i-th unit vector."""
+
+    def embed_query(self, text):
+        emb = [0.0] * 128
+        emb[int(text[1:])] = 1.0
+        return emb
+
+
+def test_cache_grows_past_its_initial_capacity():
+    cache = AnswerCache(OneHotEmbedder(), similarity_threshold=0.95, ttl_s=60, max_entries=100, clock=FakeClock())
+    for i in range(100):
+        cache.put(f"q{i}", top_k=4, index_version=1, answer=f"a{i}")
+
+    assert len(cache) == 100
+    assert [cache.get(f"q{i}", top_k=4, index_version=1) for i in (0, 63, 64, 99)] == ["a0", "a63", "a64", "a99"]
+    assert cache.stats.evictions == 0
+
+
+def test_recently_hit_entry_survives_eviction():
+    cache = AnswerCache(OneHotEmbedder(), similarity_threshold=0.95, ttl_s=60, max_entries=2, clock=FakeClock())
+    cache.put("q0", top_k=4, index_version=1, answer="a0")
+    cache.put("q1", top_k=4, index_version=1, answer="a1")
+    assert cache.get("q0", top_k=4, index_version=1) == "a0"
+
+    cache.put("q2", top_k=4, index_version=1, answer="a2")
+
+    assert cache.get("q1", top_k=4, index_version=1) is None
+    assert cache.get("q0", top_k=4, index_version=1) == "a0"
+    assert cache.get("q2", top_k=4, index_version=1) == "a2"
@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+from core.types import IngestionProgress
+from services.APIServer import APIServer
+
+
+class DummyEngine:
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.block = False
+
+    def warm_up(self):
+        pass
+
+    async def agenerate_answer(self, query, top_k=4):
+        if self.block:
+            await self.release.wait()
+        return f"answer to {query}"
+
+    async def agenerate_answer_stream(self, query, top_k=4):
+        for token in ["answer ", "to ", query]:
+            yield token
+
+
+def create_server(engine, max_in_flight=2, max_queue=1, ingest_root=None):
+    return APIServer(
+        engine,
+        max_in_flight=max_in_flight,
+        max_queue=max_queue,
+        ingest_fn=lambda filepaths: IngestionProgress(files_total=len(filepaths)),
+        ingest_root=ingest_root,
+    )
+
+
+@pytest.fixture
+def client(tmp_path):
+    with TestClient(create_server(DummyEngine(), ingest_root=str(tmp_path)).app) as client:
+        yield client
+
+
+def test_query_returns_json_or_a_token_stream(client):
+    assert client.post("/query", json={"query": "hi"}).json() == {"answer": "answer to hi"}
+
+    with client.stream("POST", "/query", json={"query": "hi", "stream": True}) as resp:
+        assert resp.headers["content-type"].startswith("text/plain")
+        assert "".join(resp.iter_text()) == "answer to hi"
+
+
+def test_health_readiness_and_ingest(client, tmp_path):
+    doc = tmp_path / "doc.txt"
+    doc.write_text("text")
+
+    assert client.get("/healthz").status_code == 200
+    # Warm-up runs in the background after startup.
+    for _ in range(100):
+        if (ready := client.get("/readyz")).status_code == 200:
+            break
+        time.sleep(0.01)
+    assert ready.json()["status"] == "ready"
+    assert client.post("/ingest", json={"filepaths": [str(doc)]}).json()["files_total"] == 1
+    assert client.post("/ingest", json={"filepaths": ["doc.txt"]}).json()["files_total"] == 1
+    assert client.post("/ingest", json={"filepaths": [str(tmp_path / "missing.pdf")]}).status_code == 400
+
+
+def test_ingest_only_reads_files_under_the_ingest_root(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    (root / "doc.txt").write_text("text")
+    secret = tmp_path / "secret.txt"
+    secret.write_text("secret")
+    (root / "link.txt").symlink_to(secret)
+    server = create_server(DummyEngine(), ingest_root=str(root))
+
+    with TestClient(server.app) as client:
+        assert client.post("/ingest", json={"filepaths": ["doc.txt"]}).status_code == 200
+        for fpath in [str(secret), "../secret.txt", "link.txt", "/etc/passwd"]:
+            assert client.post("/ingest", json={"filepaths": ["doc.txt", fpath]}).status_code == 403
+
+
+def test_ingest_is_disabled_without_a_root(tmp_path, monkeypatch):
+    (tmp_path / "doc.txt").write_text("text")
+    server = create_server(DummyEngine())
+    monkeypatch.setattr(server, "ingest_root", None)
+
+    with TestClient(server.app) as client:
+        assert client.post("/ingest", json={"filepaths": [str(tmp_path / "doc.txt")]}).status_code == 403
+
+
+def test_rejects_queries_beyond_in_flight_and_queue_limits():
+    engine = DummyEngine()
+    engine.block = True
+    server = create_server(engine, max_in_flight=2, max_queue=1)
+
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            pending = [
+                asyncio.create_task(client.post("/query", json={"query": f"q{i}"})) for i in range(3)
+            ]
+            while server.in_flight + server.queued < 3:
+                await asyncio.sleep(0.01)
+            assert (server.in_flight, server.queued) == (2, 1)
+            rejected = await client.post("/query", json={"query": "one too many"})
+            engine.release.set()
+            return rejected, await asyncio.gather(*pending)
+
+    rejected, accepted = asyncio.run(run())
+
+    assert rejected.status_code == 429
+    assert rejected.headers["retry-after"] == "1"
+    assert [resp.status_code for resp in accepted] == [200, 200, 200]
+    assert server.in_flight + server.queued == 0
+
+
+def test_metrics_are_exposed_in_prometheus_format(client):
+    resp = client.get("/metrics")
+
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "# TYPE rag_server_in_flight gauge" in resp.text
+    assert "rag_server_queued 0.0" in resp.text
+
+
+def test_stream_slot_is_released_when_the_body_is_never_sent():
+    server = create_server(DummyEngine())
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/query",
+        "raw_path": b"/query",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    messages = [
+        {"type": "http.request", "body": b'{"query": "hi", "stream": true}', "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        # The client is gone before the response starts.
+        raise OSError("connection closed")
+
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(server.app(scope, receive, send))
+
+    assert server.in_flight + server.queued == 0
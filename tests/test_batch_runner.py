@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+from core.types import AnswerTrace
+from services.BatchRunner import BatchRunner
+
+
+class DummyEngine:
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.answered = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def agenerate_answer_traced(self, query, top_k=4):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if query in self.fail_on:
+            raise ConnectionError("endpoint unavailable")
+        self.answered.append(query)
+        return AnswerTrace(
+            query=query,
+            answer=f"answer to {query}",
+            route=["identity"],
+            chunk_ids=["c1"],
+            timings={"total": 0.01},
+        )
+
+
+def write_queries(path, queries):
+    path.write_text("".join(json.dumps(q) + "\n" for q in queries))
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_answers_all_queries_with_bounded_concurrency(tmp_path):
+    inp, out = tmp_path / "q.jsonl", tmp_path / "a.jsonl"
+    write_queries(inp, [{"id": i, "query": f"q{i}"} for i in range(10)])
+    engine = DummyEngine()
+
+    progress = BatchRunner(engine, concurrency=3).run(str(inp), str(out))
+
+    records = read_records(out)
+    assert progress.done == 10
+    assert engine.max_in_flight == 3
+    assert sorted(r["id"] for r in records) == sorted(str(i) for i in range(10))
+    assert records[0]["route"] == ["identity"]
+    assert records[0]["chunk_ids"] == ["c1"]
+    assert "total" in records[0]["timings"]
+
+
+def test_resumes_from_the_output_file(tmp_path):
+    inp, out = tmp_path / "q.jsonl", tmp_path / "a.jsonl"
+    # The second line has no id, so it is identified by its line number.
+    write_queries(inp, [{"id": "a", "query": "qa"}, {"query": "qb"}, {"id": "c", "query": "qc"}])
+    BatchRunner(DummyEngine(fail_on={"qc"}), concurrency=2).run(str(inp), str(out))
+    # Simulate a run interrupted in the middle of a write.
+    with open(out, "a") as f:
+        f.write('{"id": "trunc')
+
+    engine = DummyEngine()
+    progress = BatchRunner(engine, concurrency=2).run(str(inp), str(out))
+
+    assert engine.answered == ["qc"]  # only the failed query is retried
+    assert (progress.skipped, progress.done) == (2, 1)
+    lines = out.read_text().splitlines()
+    assert lines[3] == '{"id": "trunc'  # left in place, but ended with a newline
+    assert json.loads(lines[-1])["id"] == "c"
+    assert "error" not in json.loads(lines[-1])
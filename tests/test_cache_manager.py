@@ -1,3 +1,4 @@
+import os
 import pickle
 
 import pytest
@@ -57,3 +58,31 @@ def test_get_raises_file_not_found_for_missing_cache(init_cache_manager):
     cmng = init_cache_manager
     with pytest.raises(FileNotFoundError):
         cmng.get("nonexistent_cache_key", CacheAttr.SPLITTER, read_as_binary=True)
+
+
+def test_get_many_returns_only_hits(init_cache_manager):
+    cmng = init_cache_manager
+    cmng.set_many(CacheAttr.SPLITTER, {"k1": [1], "k2": [2]}, write_as_binary=True)
+
+    hits = cmng.get_many(["k2", "missing", "k1"], CacheAttr.SPLITTER, read_as_binary=True)
+    assert hits == {"k1": [1], "k2": [2]}
+
+
+def test_text_entries_round_trip_non_ascii(init_cache_manager):
+    cmng = init_cache_manager
+    text = "Belge içeriği: İstanbul, ğüşöç"
+    cmng.set("page_hash", {CacheAttr.OCR_TEXT: text})
+    assert cmng.get("page_hash", CacheAttr.OCR_TEXT) == text
+
+
+def test_prune_removes_only_old_entries(init_cache_manager):
+    cmng = init_cache_manager
+    cmng.set("old", {CacheAttr.TRANSLATION: "stale"})
+    cmng.set("new", {CacheAttr.TRANSLATION: "fresh"})
+    old_file = os.path.join(cmng._path("old"), CacheAttr.TRANSLATION.value + ".txt")
+    os.utime(old_file, (0, 0))
+
+    assert cmng.prune(max_age_s=3600) == 1
+    with pytest.raises(FileNotFoundError):
+        cmng.get("old", CacheAttr.TRANSLATION)
+    assert cmng.get("new", CacheAttr.TRANSLATION) == "fresh"
@@ -0,0 +1,28 @@
+import dataclasses
+import sys
+
+from pypdf import PdfWriter
+
+import chain.document_loaders as loaders
+import utilities
+from core.config import load_conf
+
+
+def test_pdfs_load_without_the_ocr_modules_when_ocr_is_disabled(tmp_path, monkeypatch):
+    path = tmp_path / "blank.pdf"
+    writer = PdfWriter()
+    writer.add_blank_page(width=612, height=792)
+    with open(path, "wb") as f:
+        writer.write(f)
+    conf = load_conf()
+    monkeypatch.setattr(
+        loaders, "load_conf", lambda: dataclasses.replace(conf, ocr=dataclasses.replace(conf.ocr, enabled=False))
+    )
+    # Importing utilities.pdf now fails.
+    monkeypatch.delattr(utilities, "pdf", raising=False)
+    monkeypatch.setitem(sys.modules, "utilities.pdf", None)
+
+    docs = loaders.load_documents_from_file(str(path))
+
+    assert len(docs) == 1
+    assert docs[0].metadata["page"] == 0
@@ -0,0 +1,105 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import services.EmbeddingStore as es_module
+from chain.document_retrievers import ChromaDocumentRetriever
+
+
+class CountingSplitter:
+    """Keeps each document as a single chunk and records what it was asked to split."""
+
+    def __init__(self):
+        self.seen = []
+
+    def split(self, docs):
+        self.seen.extend(doc.page_content for doc in docs)
+        return docs
+
+
+@pytest.fixture(autouse=True)
+def embeddings_dir(tmp_path, monkeypatch):
+    # Keep the query embedding cache's disk tier out of the repo.
+    monkeypatch.setattr(es_module, "EMBEDDINGS_DIR", str(tmp_path / "embeddings"))
+    es_module.get_embedding_store.cache_clear()
+    yield
+    es_module.get_embedding_store.cache_clear()
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("placeholder")
+    return str(path)
+
+
+def create_retriever(tmp_path, docs, splitter):
+    return ChromaDocumentRetriever(
+        docs=docs,
+        text_splitter=splitter,
+        chroma_index_dir=str(tmp_path / "index"),
+        emb_model=DeterministicFakeEmbedding(size=8),
+    )
+
+
+def count_chunks(retriever):
+    return len(retriever.vs.get()["ids"])
+
+
+def test_unchanged_corpus_is_not_reindexed(tmp_path, source_file):
+    docs = [
+        Document(page_content="first page", metadata={"source": source_file, "page": 0}),
+        Document(page_content="second page", metadata={"source": source_file, "page": 1}),
+    ]
+    create_retriever(tmp_path, docs, CountingSplitter())
+
+    splitter = CountingSplitter()
+    retriever = create_retriever(tmp_path, docs, splitter)
+
+    assert splitter.seen == []
+    assert count_chunks(retriever) == 2
+
+
+def test_changed_document_replaces_old_chunks(tmp_path, source_file):
+    old = Document(page_content="old text", metadata={"source": source_file, "page": 0})
+    create_retriever(tmp_path, [old], CountingSplitter())
+
+    new = Document(page_content="new text", metadata={"source": source_file, "page": 0})
+    splitter = CountingSplitter()
+    retriever = create_retriever(tmp_path, [new], splitter)
+
+    assert splitter.seen == ["new text"]
+    assert retriever.vs.get()["documents"] == ["new text"]
+    assert len(retriever.manifest) == 1
+
+
+def test_removed_source_is_pruned(tmp_path, source_file):
+    gone = str(tmp_path / "gone.txt")
+    docs = [
+        Document(page_content="kept", metadata={"source": source_file}),
+        Document(page_content="gone", metadata={"source": gone}),
+    ]
+    create_retriever(tmp_path, docs, CountingSplitter())
+
+    # Starting without any documents keeps what still exists on disk.
+    retriever = create_retriever(tmp_path, [], CountingSplitter())
+
+    assert retriever.vs.get()["documents"] == ["kept"]
+
+
+def test_retrieve_many_returns_one_ranking_per_query(tmp_path, source_file):
+    docs = [
+        Document(page_content=text, metadata={"source": source_file, "page": i})
+        for i, text in enumerate(["alpha", "beta", "gamma"])
+    ]
+    retriever = create_retriever(tmp_path, docs, CountingSplitter())
+
+    rankings = retriever.retrieve_many(["beta", "gamma"], top_k=2)
+
+    assert len(rankings) == 2
+    for query, ranking in zip(["beta", "gamma"], rankings):
+        assert len(ranking) == 2
+        # The fake embedding is deterministic per text, so exact matches come first.
+        assert ranking[0][0].page_content == query
+        assert ranking[0][1] <= ranking[1][1]
+    assert [d.page_content for d in retriever.retrieve("alpha", top_k=1)] == ["alpha"]
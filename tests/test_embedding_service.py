@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from services.EmbeddingService import EmbeddingService
+
+
+class DummyClient:
+    """Embeds a text as [len(text)] and records the batches it receives."""
+
+    def __init__(self, fail_first_call_for: str = None):
+        self.batches = []
+        self.fail_first_call_for = fail_first_call_for
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            if self.fail_first_call_for in texts and not self._failed:
+                self._failed = True
+                raise ConnectionError("endpoint unavailable")
+        return [[float(len(t))] for t in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+def create_service(client, batch_size=2, max_in_flight=3, max_retries=2):
+    return EmbeddingService(
+        model_name="dummy",
+        batch_size=batch_size,
+        max_in_flight=max_in_flight,
+        max_retries=max_retries,
+        retry_backoff_s=0.0,
+        client=client,
+    )
+
+
+def test_batches_and_preserves_order():
+    client = DummyClient()
+    svc = create_service(client, batch_size=2)
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    embs = svc.embed_documents(texts)
+
+    assert embs == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert sorted(len(b) for b in client.batches) == [1, 2, 2]
+    assert svc.stats.texts == 5
+    assert svc.stats.batches == 3
+
+
+def test_failed_batch_is_retried_alone():
+    client = DummyClient(fail_first_call_for="ccc")
+    svc = create_service(client, batch_size=2)
+
+    embs = svc.embed_documents(["a", "bb", "ccc", "dddd"])
+
+    assert embs == [[1.0], [2.0], [3.0], [4.0]]
+    # Only the batch containing "ccc" has been sent twice.
+    assert sum(b == ["ccc", "dddd"] for b in client.batches) == 2
+    assert sum(b == ["a", "bb"] for b in client.batches) == 1
+    assert svc.stats.retries == 1
+
+
+def test_raises_after_exhausting_retries():
+    class AlwaysFails(DummyClient):
+        def embed_documents(self, texts):
+            raise ConnectionError("endpoint unavailable")
+
+    svc = create_service(AlwaysFails(), max_retries=1)
+    with pytest.raises(ConnectionError):
+        svc.embed_documents(["a"])
+
+
+def test_invalid_batch_size_raises():
+    with pytest.raises(ValueError):
+        create_service(DummyClient(), batch_size=0)
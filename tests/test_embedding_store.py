@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from services.EmbeddingStore import EmbeddingStore
+
+
+@pytest.fixture
+def init_store(tmp_path):
+    return EmbeddingStore("BAAI/bge-m3", root_dir=str(tmp_path))
+
+
+def test_put_then_get_many_preserves_order(init_store):
+    store = init_store
+    embs = np.arange(12, dtype=np.float32).reshape(3, 4)
+    store.put_many(["a", "b", "c"], embs)
+
+    hit_mask, hits = store.get_many(["c", "missing", "a"])
+    assert hit_mask.tolist() == [True, False, True]
+    assert np.array_equal(hits, embs[[2, 0]])
+
+
+def test_get_many_all_missing(init_store):
+    hit_mask, hits = init_store.get_many(["x", "y"])
+    assert not hit_mask.any()
+    assert hits.shape[0] == 0
+
+
+def test_entries_survive_reopening(init_store, tmp_path):
+    embs = np.random.rand(5, 8).astype(np.float32)
+    init_store.put_many([f"k{i}" for i in range(5)], embs)
+
+    reopened = EmbeddingStore("BAAI/bge-m3", root_dir=str(tmp_path))
+    assert len(reopened) == 5
+    hit_mask, hits = reopened.get_many(["k4", "k1"])
+    assert hit_mask.all()
+    assert np.array_equal(hits, embs[[4, 1]])
+
+
+def test_put_many_skips_known_keys(init_store):
+    store = init_store
+    store.put_many(["a"], np.ones((1, 2), dtype=np.float32))
+    store.put_many(["a", "b"], np.full((2, 2), 7, dtype=np.float32))
+
+    assert len(store) == 2
+    _, hits = store.get_many(["a", "b"])
+    assert hits.tolist() == [[1, 1], [7, 7]]
+
+
+def test_put_many_raises_on_dim_mismatch(init_store):
+    store = init_store
+    store.put_many(["a"], np.ones((1, 2), dtype=np.float32))
+    with pytest.raises(ValueError):
+        store.put_many(["b"], np.ones((1, 3), dtype=np.float32))
+
+
+def test_interrupted_write_is_truncated(init_store, tmp_path):
+    init_store.put_many(["a", "b"], np.ones((2, 2), dtype=np.float32))
+    # Simulate a crash between writing the vectors and the keys.
+    with open(init_store._vectors_path, "ab") as f:
+        f.write(np.zeros((1, 2), dtype=np.float32).tobytes())
+
+    reopened = EmbeddingStore("BAAI/bge-m3", root_dir=str(tmp_path))
+    reopened.put_many(["c"], np.full((1, 2), 3, dtype=np.float32))
+    _, hits = reopened.get_many(["c"])
+    assert hits.tolist() == [[3, 3]]
@@ -1,7 +1,10 @@
+import importlib
+
 import pytest
 
 from chain.routing import HeuristicAnalyzer
 from chain.routing.HeuristicRouter import HeuristicRouter
+from core.types import AnalyzerRule, TranslationMethod
 
 
 class DummyParams:
@@ -38,3 +41,99 @@ def test_route_name_conflict_masks_method():
     with pytest.raises(TypeError):
         # Attempting to call the attribute (which is a list) should raise.
         inst.route()
+
+
+def test_route_plan_depends_only_on_the_query():
+    router = HeuristicRouter()
+
+    assert router.route("What is RAG?") == [TranslationMethod.IDENTITY]
+    assert router.route(
+        "Could the new plan maybe be better than the old one and what does it cost for a large team?"
+    ) == [
+        TranslationMethod.IDENTITY,
+        TranslationMethod.DECOMPOSITION,
+        TranslationMethod.MULTI_QUERY,
+        TranslationMethod.STEPBACK,
+        TranslationMethod.HYDE,
+    ]
+    # Nothing carries over between queries.
+    assert router.route("What is RAG?") == [TranslationMethod.IDENTITY]
+
+
+def test_keywords_match_whole_words_only():
+    params = DummyParams(short_len_le=3)
+
+    analysis = HeuristicAnalyzer("Is organic nothing mightier?", params).analyze()
+    assert analysis["has_logical_operators"] is False
+    assert analysis["is_ambiguous"] is False
+
+    analysis = HeuristicAnalyzer("Cats OR dogs, maybe?", params).analyze()
+    assert analysis["has_logical_operators"] is True
+    assert analysis["is_ambiguous"] is True
+
+
+def test_turkish_keywords():
+    params = DummyParams(short_len_le=3)
+
+    analysis = HeuristicAnalyzer("Belki de yeni plan eskisinden daha iyidir?", params).analyze()
+    assert analysis["is_ambiguous"] is True
+    assert analysis["is_comparative"] is True
+    assert analysis["has_logical_operators"] is False
+    assert HeuristicAnalyzer("Kek nasıl yapılır?", params).analyze()["is_how_to"] is True
+
+
+def test_turkish_keywords_in_upper_case():
+    params = DummyParams(short_len_le=3)
+
+    assert HeuristicAnalyzer("PLANLARI KARŞILAŞTIRIN", params).analyze()["is_comparative"] is True
+    assert HeuristicAnalyzer("BELKİ YARIN", params).analyze()["is_ambiguous"] is True
+    assert HeuristicAnalyzer("KEK NASIL YAPILIR?", params).analyze()["is_how_to"] is True
+    assert HeuristicAnalyzer("HOW TO FIX IT", params).analyze()["is_how_to"] is True
+
+
+def test_custom_rules():
+    rules = (
+        AnalyzerRule(feature="is_how_to", keywords=("how to",), at_start=True),
+        AnalyzerRule(feature="is_comparative", keywords=("karşılaştır*", "compared to")),
+    )
+    params = DummyParams(short_len_le=3)
+
+    assert HeuristicAnalyzer("How  to start?", params, rules).analyze()["is_how_to"] is True
+    # Only at the start.
+    assert HeuristicAnalyzer("Tell me how to start", params, rules).analyze()["is_how_to"] is False
+    # Prefix keywords take any suffix; phrases any whitespace.
+    assert HeuristicAnalyzer("Planları karşılaştırın", params, rules).analyze()["is_comparative"] is True
+    assert HeuristicAnalyzer("A compared\nto B", params, rules).analyze()["is_comparative"] is True
+    assert HeuristicAnalyzer("Planları karşı", params, rules).analyze() == {
+        "has_logical_operators": False,
+        "is_how_to": False,
+        "is_comparative": False,
+        "is_ambiguous": False,
+        "is_question": False,
+        "is_short": True,
+    }
+
+
+def test_router_works_with_rules_missing_features(monkeypatch):
+    # Only how-to rules configured: the router still reads every feature.
+    analyzer_module = importlib.import_module("chain.routing.HeuristicAnalyzer")
+    rules = (AnalyzerRule(feature="is_how_to", keywords=("how to",), at_start=True),)
+    monkeypatch.setattr(analyzer_module, "_default_rules", lambda: rules)
+
+    analysis = HeuristicAnalyzer("How to compare A and B, maybe?", DummyParams()).analyze()
+    assert HeuristicAnalyzer.check_format(analysis) is True
+    assert HeuristicRouter().route("How to compare A and B, maybe?") == [TranslationMethod.IDENTITY]
+
+
+def test_analyze_batch_matches_analyze():
+    params = DummyParams(short_len_le=4)
+    queries = [
+        "How to bake a cake?",
+        "Is tea better than coffee or not?",
+        "Acaba hangisi daha ucuz?",
+        "",
+    ]
+
+    assert HeuristicAnalyzer.analyze_batch(queries, params) == [
+        HeuristicAnalyzer(query, params).analyze() for query in queries
+    ]
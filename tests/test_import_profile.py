@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+from utilities import importprofile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   numpy.core
+import time:       300 |        400 | numpy
+import time:        50 |         50 |     chromadb.api
+import time:       200 |        250 |   chromadb.config
+import time:      1000 |       1250 | chromadb
+"""
+
+
+def test_parse_importtime_reads_depth_and_times():
+    timings = importprofile.parse_importtime(REPORT)
+
+    assert [(t.module, t.depth) for t in timings] == [
+        ("numpy.core", 1), ("numpy", 0), ("chromadb.api", 2), ("chromadb.config", 1), ("chromadb", 0),
+    ]
+    assert timings[-1].self_us == 1000
+    assert timings[-1].cumulative_us == 1250
+
+
+def test_report_groups_self_time_by_package():
+    report = importprofile.format_report(importprofile.parse_importtime(REPORT))
+
+    assert report.startswith("Imported 5 modules in 0.00s")
+    lines = report.splitlines()
+    # chromadb (1.25ms of own time) before numpy (0.4ms).
+    assert lines[3].split()[:2] == ["chromadb", "1.2"]
+    assert lines[4].split()[:2] == ["numpy", "0.4"]
+
+
+def test_startup_does_not_import_the_pipeline():
+    code = (
+        "import sys, app_composition, chain; "
+        "print(sorted(m for m in ('langchain_openai', 'langchain_chroma', 'chromadb', 'fitz') if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=SRC_DIR, capture_output=True, text=True, check=True
+    ).stdout
+
+    assert out.strip() == "[]"
@@ -0,0 +1,43 @@
+import json
+
+from services.IndexManifest import IndexManifest
+
+
+def test_add_and_remove(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    manifest.add("doc1", ["c1", "c2"], source="a.pdf")
+    manifest.add("doc1", ["c2", "c3"], source="a.pdf")
+
+    assert "doc1" in manifest
+    assert manifest.source_of("doc1") == "a.pdf"
+    assert manifest.remove("doc1") == ["c1", "c2", "c3"]
+    assert manifest.remove("doc1") == []
+    assert len(manifest) == 0
+
+
+def test_save_and_reload(tmp_path):
+    path = tmp_path / "index" / "manifest.json"
+    manifest = IndexManifest(str(path))
+    manifest.add("doc1", ["c1"], source="a.pdf")
+    manifest.save()
+
+    data = json.loads(path.read_text())
+    assert data["documents"]["doc1"]["chunk_ids"] == ["c1"]
+
+    reloaded = IndexManifest(str(path))
+    assert reloaded.doc_hashes() == {"doc1"}
+    assert reloaded.version == manifest.version
+
+
+def test_version_bumps_once_per_saved_change(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    assert manifest.version == 0
+    manifest.add("doc1", ["c1"])
+    manifest.add("doc2", ["c2"])
+    manifest.save()
+    assert manifest.version == 1
+    # Nothing changed, nothing to bump.
+    manifest.save()
+    assert manifest.version == 1
+    manifest.remove("doc1")
+    assert manifest.version == 2
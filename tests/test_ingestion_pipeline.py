@@ -0,0 +1,80 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import services.EmbeddingStore as es_module
+from chain.document_retrievers import ChromaDocumentRetriever
+from services.IngestionPipeline import IngestionPipeline
+
+
+class IdentitySplitter:
+    def split(self, docs):
+        return docs
+
+
+def fake_load(fpath):
+    for page in range(5):
+        yield Document(page_content=f"{fpath} page {page}", metadata={"source": fpath, "page": page})
+
+
+@pytest.fixture
+def retriever(tmp_path, monkeypatch):
+    # Keep the query embedding cache's disk tier out of the repo.
+    monkeypatch.setattr(es_module, "EMBEDDINGS_DIR", str(tmp_path / "embeddings"))
+    es_module.get_embedding_store.cache_clear()
+    yield ChromaDocumentRetriever(
+        docs=[],
+        text_splitter=IdentitySplitter(),
+        chroma_index_dir=str(tmp_path / "index"),
+        emb_model=DeterministicFakeEmbedding(size=8),
+    )
+    es_module.get_embedding_store.cache_clear()
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = [tmp_path / "a.txt", tmp_path / "b.txt"]
+    for p in paths:
+        p.write_text("placeholder")
+    return [str(p) for p in paths]
+
+
+def create_pipeline(retriever, **kwargs):
+    return IngestionPipeline(retriever, batch_size=2, queue_size=1, load_fn=fake_load, **kwargs)
+
+
+def test_ingests_every_page(retriever, files):
+    reported = []
+    progress = create_pipeline(retriever, on_progress=reported.append).run(files)
+
+    assert progress.files_loaded == 2
+    assert progress.pages_loaded == 10
+    assert progress.chunks_indexed == 10
+    assert len(retriever.vs.get()["ids"]) == 10
+    # Progress is reported per indexed batch, not only at the end.
+    assert len(reported) > 1
+
+
+def test_rerun_skips_indexed_pages(retriever, files):
+    create_pipeline(retriever).run(files)
+    progress = create_pipeline(retriever).run(files)
+
+    assert progress.pages_skipped == 10
+    assert progress.chunks_indexed == 0
+
+
+def test_stage_failure_is_raised(retriever, files):
+    def broken_load(fpath):
+        yield Document(page_content="ok", metadata={"source": fpath})
+        raise OSError("corrupted file")
+
+    pipeline = IngestionPipeline(retriever, batch_size=1, queue_size=1, load_fn=broken_load)
+    with pytest.raises(OSError):
+        pipeline.run(files)
+
+
+def test_cannot_start_twice(retriever, files):
+    pipeline = create_pipeline(retriever)
+    pipeline.run(files)
+    with pytest.raises(RuntimeError):
+        pipeline.start(files)
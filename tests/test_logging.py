@@ -0,0 +1,28 @@
+import logging
+from logging.handlers import QueueHandler
+
+import app_composition
+
+
+def test_logs_go_through_a_queue_with_per_module_levels(tmp_path):
+    root = app_composition.init_logs(
+        logs_dir=str(tmp_path), level="info", modules={"chain.routing": "DEBUG", "httpx": "WARNING"}
+    )
+    try:
+        assert [type(h) for h in root.handlers] == [QueueHandler]
+        assert root.level == logging.INFO
+        logging.getLogger("services.RAGEngine").debug("dropped %s", "debug")
+        logging.getLogger("services.RAGEngine").info("kept %s", "info")
+        logging.getLogger("chain.routing.HeuristicRouter").debug("kept %s", "override")
+        logging.getLogger("httpx").info("dropped info")
+    finally:
+        app_composition._stop_log_listener()
+        logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+        for name in ("chain.routing", "httpx"):
+            logging.getLogger(name).setLevel(logging.NOTSET)
+
+    (log_file,) = tmp_path.glob("*.log")
+    text = log_file.read_text(encoding="utf-8")
+    assert "services.RAGEngine: kept info" in text
+    assert "chain.routing.HeuristicRouter: kept override" in text
+    assert "dropped" not in text
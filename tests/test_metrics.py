@@ -0,0 +1,70 @@
+import re
+import threading
+
+import pytest
+
+from utilities import metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_counters_are_summed_per_label_set():
+    metrics.cache_result("answer", hit=True)
+    metrics.cache_result("answer", hit=True)
+    metrics.cache_result("answer", hit=False)
+
+    assert metrics.get_counter("rag_cache_requests_total", cache="answer", result="hit") == 2
+    assert metrics.get_counter("rag_cache_requests_total", cache="answer", result="miss") == 1
+
+
+def test_span_records_even_when_the_block_raises():
+    with metrics.span("retrieve"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.span("retrieve"):
+            raise ValueError()
+
+    assert metrics.get_histogram_count(metrics.STAGE_SECONDS, stage="retrieve") == 2
+
+
+def test_prometheus_histogram_buckets_are_cumulative():
+    for seconds in (0.002, 0.02, 0.02, 100.0):
+        metrics.observe(metrics.STAGE_SECONDS, seconds, stage="generate")
+    text = metrics.render_prometheus()
+
+    assert "# TYPE rag_stage_seconds histogram" in text
+    buckets = re.findall(r'rag_stage_seconds_bucket\{stage="generate",le="([^"]+)"\} (\d+)', text)
+    counts = [int(c) for _, c in buckets]
+    assert counts == sorted(counts)
+    assert dict(buckets)["0.005"] == "1"
+    assert dict(buckets)["0.025"] == "3"
+    assert buckets[-1] == ("+Inf", "4")
+    assert 'rag_stage_seconds_count{stage="generate"} 4' in text
+
+
+def test_label_values_are_escaped():
+    metrics.inc("rag_llm_calls_total", op='say "hi"\n')
+
+    assert 'rag_llm_calls_total{op="say \\"hi\\"\\n"} 1.0' in metrics.render_prometheus()
+
+
+def test_concurrent_updates_are_not_lost():
+    def work():
+        for _ in range(1000):
+            metrics.inc("rag_embedding_calls_total")
+            metrics.observe(metrics.STAGE_SECONDS, 0.01, stage="rrf")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert metrics.get_counter("rag_embedding_calls_total") == 8000
+    assert metrics.get_histogram_count(metrics.STAGE_SECONDS, stage="rrf") == 8000
+    assert "rrf" in metrics.format_summary()
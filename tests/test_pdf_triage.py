@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utilities.pdf import page_needs_ocr
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# US Letter in points^2.
+LETTER = 612 * 792
+PARAMS = dict(min_text_chars=32, min_glyph_density=2.0, min_image_coverage=0.5)
+
+
+@pytest.mark.parametrize(
+    "n_chars, image_area, expected",
+    [
+        (3000, 0, False),  # born-digital text page
+        (0, 0, False),  # blank page, nothing to recognize
+        (0, LETTER, True),  # full-page scan without a text layer
+        (10, LETTER * 0.9, True),  # scan with a tiny stamp or page number
+        (100, LETTER, True),  # scan with a sparse header only
+        (3000, LETTER, False),  # scan that already has an OCR text layer
+        (0, LETTER * 0.2, False),  # mostly empty page with a small figure
+    ],
+)
+def test_page_needs_ocr(n_chars, image_area, expected):
+    assert page_needs_ocr(n_chars, LETTER, image_area, **PARAMS) is expected
+
+
+def test_zero_area_page_is_skipped():
+    assert page_needs_ocr(0, 0, 0, **PARAMS) is False
+
+
+def test_triage_module_does_not_import_pymupdf():
+    code = "import sys, utilities.pdf; print('fitz' in sys.modules)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=SRC_DIR, capture_output=True, text=True, check=True
+    ).stdout
+
+    assert out.strip() == "False"
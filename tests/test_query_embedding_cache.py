@@ -0,0 +1,95 @@
+import pytest
+
+from services.EmbeddingStore import EmbeddingStore
+from services.QueryEmbeddingCache import QueryEmbeddingCache
+
+
+class CountingEmbedder:
+    """Embeds a text as [len(text), 1.0] and records every text it embeds."""
+
+    def __init__(self, model_name="dummy"):
+        self.model_name = model_name
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def create_cache(embedder, max_entries=8, max_bytes=1024, store=None):
+    return QueryEmbeddingCache(
+        embedder,
+        max_entries=max_entries,
+        max_bytes=max_bytes,
+        disk_tier=store is not None,
+        store=store,
+    )
+
+
+def test_repeated_queries_are_embedded_once():
+    embedder = CountingEmbedder()
+    cache = create_cache(embedder)
+
+    first = cache.embed_documents(["a", "bb", "a"])
+    second = cache.embed_documents(["bb", "ccc"])
+
+    assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert second == [[2.0, 1.0], [3.0, 1.0]]
+    assert embedder.calls == [["a", "bb"], ["ccc"]]
+    assert (cache.stats.hits, cache.stats.misses) == (1, 4)
+
+
+def test_evicts_least_recently_used_by_count_and_bytes():
+    embedder = CountingEmbedder()
+    cache = create_cache(embedder, max_entries=2)
+    cache.embed_documents(["a", "b"])
+    cache.embed_query("a")  # "b" is now the least recently used
+    cache.embed_query("c")
+
+    assert len(cache) == 2
+    cache.embed_query("a")
+    cache.embed_query("b")
+    assert embedder.calls[-1] == ["b"]
+
+    # Each vector takes 2 float32 = 8 bytes.
+    small = create_cache(CountingEmbedder(), max_entries=100, max_bytes=16)
+    small.embed_documents(["x", "y", "z"])
+    assert len(small) == 2
+    assert small.nbytes <= 16
+    assert small.stats.evictions == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    embedder = CountingEmbedder()
+    create_cache(embedder, store=EmbeddingStore("dummy", root_dir=str(tmp_path))).embed_query("a")
+
+    restarted = create_cache(embedder, store=EmbeddingStore("dummy", root_dir=str(tmp_path)))
+    emb = restarted.embed_query("a")
+
+    assert emb == [1.0, 1.0]
+    assert embedder.calls == [["a"]]
+    assert restarted.stats.disk_hits == 1
+
+
+def test_caches_of_different_models_do_not_share_vectors(tmp_path):
+    old = create_cache(CountingEmbedder("old"), store=EmbeddingStore("old", root_dir=str(tmp_path)))
+    old.embed_query("a")
+
+    new_embedder = CountingEmbedder("new")
+    new = create_cache(new_embedder, store=EmbeddingStore("new", root_dir=str(tmp_path)))
+    new.embed_query("a")
+
+    assert new_embedder.calls == [["a"]]
+    assert new.stats.misses == 1
+
+
+def test_cached_vectors_cannot_be_modified():
+    cache = create_cache(CountingEmbedder())
+    cache.embed_query("a")
+    entry = next(iter(cache._entries.values()))
+
+    with pytest.raises(ValueError):
+        entry[0] = 0.0
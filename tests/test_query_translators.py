@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable
+
+import services.CacheManager as cm_module
+from chain.query_translators import MultiQueryTranslator, StepBackTranslator, TranslatorRegistry
+from core.types import CacheAttr, TranslationContext, TranslationMethod, TranslationRoute
+
+CTX = TranslationContext(query="What does the premium plan cost?", quantity=2)
+
+
+class CountingChatModel(Runnable):
+    def __init__(self, model_name="dummy"):
+        self.model_name = model_name
+        self.calls = 0
+
+    def invoke(self, input, *args, **kwargs):
+        self.calls += 1
+        return AIMessage(content="variant one\nvariant two")
+
+    async def ainvoke(self, input, *args, **kwargs):
+        return self.invoke(input)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cm_module, "CACHE_DIR", str(tmp_path))
+
+
+def test_translation_is_reused_across_translator_instances():
+    chat_model = CountingChatModel()
+
+    first = MultiQueryTranslator(chat_model).translate(CTX)
+    second = asyncio.run(MultiQueryTranslator(chat_model).atranslate(CTX))
+
+    assert chat_model.calls == 1
+    assert second.queries == first.queries == ["variant one", "variant two"]
+    assert second.original_query == CTX.query
+
+
+def test_cache_key_covers_translator_model_and_context():
+    chat_model = CountingChatModel()
+    MultiQueryTranslator(chat_model).translate(CTX)
+
+    StepBackTranslator(chat_model).translate(CTX)
+    MultiQueryTranslator(chat_model).translate(TranslationContext(query=CTX.query, quantity=3))
+    MultiQueryTranslator(CountingChatModel("other")).translate(CTX)
+
+    assert chat_model.calls == 3
+
+
+def test_expired_translation_is_regenerated(monkeypatch):
+    chat_model = CountingChatModel()
+    translator = MultiQueryTranslator(chat_model)
+    translator.translate(CTX)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + translator._cache_ttl_s + 1)
+    translator.translate(CTX)
+
+    assert chat_model.calls == 2
+
+
+def test_expired_translation_is_removed_on_lookup(monkeypatch):
+    translator = MultiQueryTranslator(CountingChatModel())
+    translator.translate(CTX)
+    cache_id = translator._cache_id(CTX)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + translator._cache_ttl_s + 1)
+
+    assert translator._get_cached(cache_id, CTX, None) is None
+    with pytest.raises(FileNotFoundError):
+        translator._cache.get(cache_id, CacheAttr.TRANSLATION)
+
+
+def test_registry_runs_a_route_with_prebuilt_chains():
+    chat_model = CountingChatModel()
+    registry = TranslatorRegistry(chat_model)
+    chain = registry.get(TranslationMethod.MULTI_QUERY)._impl._chain
+    route = TranslationRoute([TranslationMethod.IDENTITY, TranslationMethod.MULTI_QUERY])
+
+    qlist = registry.run(route, CTX)
+    aqlist = asyncio.run(registry.arun(route, TranslationContext(query="Another question?", quantity=2)))
+
+    assert qlist.queries == [CTX.query, "variant one", "variant two"]
+    assert qlist.route == route
+    assert aqlist.queries[0] == "Another question?"
+    # Built when registered, not per call.
+    assert registry.get(TranslationMethod.MULTI_QUERY)._impl._chain is chain
+
+
+def test_registry_rejects_unregistered_methods():
+    registry = TranslatorRegistry(CountingChatModel())
+    registry._translators.pop(TranslationMethod.HYDE)
+
+    with pytest.raises(ValueError):
+        registry.run(TranslationRoute([TranslationMethod.HYDE]), CTX)
@@ -0,0 +1,159 @@
+import asyncio
+import importlib
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable
+
+import services.CacheManager as cm_module
+from services.AnswerCache import AnswerCache
+from services.RAGEngine import RAGEngine
+from utilities import metrics
+
+# `chain.routing.HeuristicRouter` (the attribute) is the class, not the module.
+router_module = importlib.import_module("chain.routing.HeuristicRouter")
+
+# Routed through decomposition, multi-query, step-back and HyDE.
+QUERY = "Could the new plan maybe be better than the old one and what does it cost for a large team of people?"
+
+
+class ConcurrencyTracker:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def track(self, delay: float = 0.05):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(delay)
+        self.in_flight -= 1
+
+
+class DummyChatModel(Runnable):
+    def __init__(self):
+        self.tracker = ConcurrencyTracker()
+
+    def invoke(self, input, *args, **kwargs):
+        return AIMessage(content="variant one\nvariant two")
+
+    async def ainvoke(self, input, *args, **kwargs):
+        await self.tracker.track()
+        return self.invoke(input)
+
+    def generate(self, prompt_templ, query, context):
+        return f"answer from {len(context)} docs"
+
+    async def agenerate(self, prompt_templ, query, context):
+        return self.generate(prompt_templ, query, context)
+
+    def generate_stream(self, prompt_templ, query, context):
+        answer = self.generate(prompt_templ, query, context)
+        for i in range(0, len(answer), 4):
+            yield answer[i: i + 4]
+
+    async def agenerate_stream(self, prompt_templ, query, context):
+        for token in self.generate_stream(prompt_templ, query, context):
+            yield token
+
+
+class DummyRetriever:
+    def __init__(self):
+        self.calls = []
+        self.index_version = 1
+
+    def retrieve_many(self, queries, top_k=4):
+        queries = list(queries)
+        self.calls.append(queries)
+        return [
+            [(Document(page_content=f"doc for {q}", metadata={"id": q}), 0.0)] for q in queries
+        ]
+
+    async def aretrieve_many(self, queries, top_k=4):
+        return self.retrieve_many(queries, top_k)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(router_module, "SESSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(cm_module, "CACHE_DIR", str(tmp_path / "cache"))
+    return RAGEngine(
+        doc_retriever=DummyRetriever(),
+        chat_model=DummyChatModel(),
+        sys_prompt_template=PromptTemplate.from_template("{context} {query}"),
+    )
+
+
+def test_agenerate_answer_matches_generate_answer(engine):
+    assert asyncio.run(engine.agenerate_answer(QUERY)) == engine.generate_answer(QUERY)
+
+
+def test_agenerate_answer_runs_translators_concurrently(engine):
+    asyncio.run(engine.agenerate_answer(QUERY))
+
+    assert engine.chat_model.tracker.max_in_flight == 4
+
+
+def test_all_translated_queries_are_retrieved_in_one_call(engine):
+    engine.generate_answer(QUERY)
+
+    assert len(engine.doc_retriever.calls) == 1
+    # Identity + 2 variants from each of the 4 LLM translators, deduplicated per translator.
+    assert len(engine.doc_retriever.calls[0]) == 9
+
+
+class LengthEmbedder:
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+def test_answer_cache_hit_skips_the_pipeline(engine):
+    engine.answer_cache = AnswerCache(LengthEmbedder(), similarity_threshold=0.999, ttl_s=60, max_entries=8)
+
+    first = engine.generate_answer(QUERY)
+    second = asyncio.run(engine.agenerate_answer(QUERY))
+    engine.doc_retriever.index_version += 1
+    engine.generate_answer(QUERY)
+
+    assert first == second
+    # The third call follows an index change, so it runs the pipeline again.
+    assert len(engine.doc_retriever.calls) == 2
+
+
+def test_streamed_answer_matches_generated_answer(engine):
+    async def collect():
+        return [token async for token in engine.agenerate_answer_stream(QUERY)]
+
+    tokens = list(engine.generate_answer_stream(QUERY))
+
+    assert len(tokens) > 1
+    assert "".join(tokens) == "".join(asyncio.run(collect())) == engine.generate_answer(QUERY)
+
+
+def test_warm_up_failures_do_not_break_the_engine(engine, caplog):
+    engine.chat_model.warm_up = lambda: None
+
+    engine.warm_up()  # DummyRetriever has no warm_up
+
+    assert "Warming up DummyRetriever failed" in caplog.text
+    assert engine.generate_answer(QUERY)
+
+
+def test_close_releases_the_retriever(engine):
+    closed = []
+    engine.doc_retriever.close = lambda: closed.append(True)
+
+    engine.close()
+
+    assert closed == [True]
+
+
+def test_trace_timings_and_stage_histograms_match(engine):
+    metrics.reset()
+
+    trace = engine.generate_answer_traced(QUERY)
+
+    assert set(trace.timings) == {"total", "route", "translate", "retrieve", "rrf", "generate"}
+    for stage in trace.timings:
+        assert metrics.get_histogram_count(metrics.STAGE_SECONDS, stage=stage) == 1
@@ -0,0 +1,101 @@
+import json
+import threading
+
+from langchain_core.documents import Document
+
+import services.SessionJournal as journal_module
+from services.SessionJournal import SessionJournal
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_records_are_appended_as_jsonl(tmp_path):
+    journal = SessionJournal(str(tmp_path), enabled=True, max_bytes=1 << 20, backup_count=2, max_queue=100)
+    journal.record("route", {"original_query": "q", "route": ["identity"]})
+    journal.record("split", {"doc_hash": "h", "splits": [Document(page_content="chunk", metadata={"p": 1})]})
+    journal.close()
+
+    records = read_records(journal.path)
+    assert [r["kind"] for r in records] == ["route", "split"]
+    assert records[0]["route"] == ["identity"]
+    assert records[1]["splits"] == [{"page_content": "chunk", "metadata": {"p": 1}}]
+    assert all("ts" in r for r in records)
+
+
+def test_files_are_rotated_by_size(tmp_path):
+    journal = SessionJournal(str(tmp_path), enabled=True, max_bytes=200, backup_count=2, max_queue=1000)
+    for i in range(50):
+        journal.record("route", {"original_query": f"query number {i}"})
+        journal.flush()
+    journal.close()
+
+    assert (tmp_path / "journal.1.jsonl").exists()
+    assert (tmp_path / "journal.2.jsonl").exists()
+    assert not (tmp_path / "journal.3.jsonl").exists()
+    for path in ("journal.jsonl", "journal.1.jsonl", "journal.2.jsonl"):
+        if (tmp_path / path).exists():
+            read_records(tmp_path / path)  # whole lines only
+
+
+def test_record_never_blocks_when_the_queue_is_full(tmp_path, monkeypatch):
+    # Hold the writer up inside the first write, so the queue fills.
+    writing, release = threading.Event(), threading.Event()
+    dumps = json.dumps
+
+    def slow_dumps(*args, **kwargs):
+        writing.set()
+        release.wait()
+        return dumps(*args, **kwargs)
+
+    monkeypatch.setattr(journal_module.json, "dumps", slow_dumps)
+    journal = SessionJournal(str(tmp_path), enabled=True, max_bytes=1 << 20, backup_count=1, max_queue=2)
+    assert journal.record("route", {"n": 0})
+    writing.wait()
+
+    assert journal.record("route", {"n": 1})
+    assert journal.record("route", {"n": 2})
+    assert not journal.record("route", {"n": 3})
+    assert journal.dropped == 1
+
+    release.set()
+    journal.close()
+    assert [r["n"] for r in read_records(journal.path)] == [0, 1, 2]
+
+
+def test_disabled_journal_writes_nothing(tmp_path):
+    journal = SessionJournal(str(tmp_path / "sessions"), enabled=False)
+
+    assert journal.record("route", {}) is False
+    journal.close()
+    assert not (tmp_path / "sessions").exists()
+
+
+def test_rotation_failure_disables_the_journal_instead_of_hanging(tmp_path, monkeypatch):
+    def broken_rotate(self):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(SessionJournal, "_rotate", broken_rotate)
+    journal = SessionJournal(str(tmp_path), enabled=True, max_bytes=10, backup_count=1, max_queue=10)
+    assert journal.record("route", {"original_query": "long enough to rotate"})
+    journal.flush(timeout=5)
+
+    assert journal.enabled is False
+    assert journal.record("route", {"original_query": "dropped"}) is False
+    assert journal.flush(timeout=5) is True  # the writer is still draining
+    writer = journal._writer
+    journal.close(timeout=5)
+    assert not writer.is_alive()
+    assert [r["original_query"] for r in read_records(journal.path)] == ["long enough to rotate"]
+
+
+def test_flush_and_close_do_not_wait_on_a_dead_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(SessionJournal, "_write_loop", lambda self: None)
+    journal = SessionJournal(str(tmp_path), enabled=True, max_bytes=1 << 20, backup_count=1, max_queue=1)
+    journal._writer.join()
+
+    assert journal.record("route", {}) is False
+    assert journal.flush(timeout=5) is False
+    journal.close(timeout=5)
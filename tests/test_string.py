@@ -0,0 +1,25 @@
+import pytest
+
+from utilities.string import format_response, format_response_stream
+
+RESPONSES = [
+    "The **premium** plan costs *$10* per `user*month`.",
+    "* first item\n* second **item**",
+    "x **y* z**",
+]
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+@pytest.mark.parametrize("token_len", [1, 2, 5])
+def test_streamed_formatting_matches_whole_response(response, token_len):
+    tokens = [response[i: i + token_len] for i in range(0, len(response), token_len)]
+
+    assert "".join(format_response_stream(tokens)) == format_response(response)
+
+
+def test_only_open_spans_are_held_back():
+    chunks = format_response_stream(iter(["Plain text ", "and **bo", "ld**"]))
+
+    assert next(chunks) == "Plain text "
+    assert next(chunks) == "and "
+    assert next(chunks) == "\033[1mbold\033[0m"
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+import chain.text_splitters as ts_module
+import services.CacheManager as cm_module
+from chain.text_splitters import SemanticTextSplitter
+from core.types import SplitterEmbeddingMode
+
+
+@pytest.fixture
+def embed_calls(tmp_path, monkeypatch):
+    """Redirects cache/sessions to tmp_path and stubs the encoder with a deterministic one."""
+    monkeypatch.setattr(cm_module, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(ts_module, "SESSIONS_DIR", str(tmp_path))
+    calls = []
+
+    def fake_embed_texts(texts, model_name=None):
+        calls.append(list(texts))
+        # Sentences about the same topic number share a direction.
+        return np.stack([
+            np.eye(8, dtype=np.float32)[int(t.split()[1]) % 8] + 0.01 for t in texts
+        ])
+
+    monkeypatch.setattr(ts_module.vector, "embed_texts", fake_embed_texts)
+    return calls
+
+
+def create_docs(n):
+    return [
+        Document(
+            page_content=" ".join(
+                f"Topic {(j // 3) + i} sentence." for j in range(9)
+            ),
+            metadata={"source": f"doc{i}.pdf", "page": i},
+        )
+        for i in range(n)
+    ]
+
+
+def create_splitter(n_workers=1):
+    return SemanticTextSplitter(
+        bufsz=0,
+        breakpoint_percentile_threshold=50,
+        embedding_mode=SplitterEmbeddingMode.SENTENCE,
+        n_workers=n_workers,
+    )
+
+
+def test_split_embeds_all_documents_in_one_call(embed_calls):
+    chunks = create_splitter().split(create_docs(3))
+
+    assert len(embed_calls) == 1
+    assert len(embed_calls[0]) == 27
+    assert [c.metadata["page"] for c in chunks] == sorted(c.metadata["page"] for c in chunks)
+
+
+def test_second_split_is_served_from_cache(embed_calls):
+    docs = create_docs(2)
+    first = create_splitter().split(docs)
+    second = create_splitter().split(docs)
+
+    assert len(embed_calls) == 1
+    assert [c.page_content for c in first] == [c.page_content for c in second]
+
+
+def test_single_sentence_document_is_kept_as_is(embed_calls):
+    doc = Document(page_content="Only one sentence here.", metadata={})
+    assert create_splitter().split([doc]) == [doc]
+    assert embed_calls == []
+
+
+def test_parallel_split_matches_serial_order(embed_calls, tmp_path, monkeypatch):
+    docs = create_docs(6)
+    serial = create_splitter(n_workers=1).split(docs)
+    # Start from an empty cache, so the documents are split again.
+    monkeypatch.setattr(cm_module, "CACHE_DIR", str(tmp_path / "parallel_cache"))
+    parallel_splitter = create_splitter(n_workers=2)
+    parallel = parallel_splitter.split(docs)
+    parallel_splitter.close()
+
+    assert len(embed_calls) == 2
+    assert [c.page_content for c in parallel] == [c.page_content for c in serial]
+    assert [c.metadata["chunk_index"] for c in parallel] == [
+        c.metadata["chunk_index"] for c in serial
+    ]
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from services.EmbeddingStore import EmbeddingStore
+from utilities import vector
+
+
+def test_pairwise_distances_match_cosine_loop():
+    embs = np.random.default_rng(0).normal(size=(6, 16)).astype(np.float32)
+
+    dists = vector.calc_pairwise_semantic_distances(embs)
+
+    expected = [1.0 - vector.cosine_similarity(embs[i], embs[i + 1]) for i in range(5)]
+    assert isinstance(dists, list)
+    assert np.allclose(dists, expected, atol=1e-6)
+
+
+def test_pairwise_distances_of_single_embedding_is_empty():
+    assert vector.calc_pairwise_semantic_distances(np.ones((1, 4))) == []
+
+
+@pytest.mark.parametrize("bufsz", [0, 1, 2, 10])
+def test_windowed_mean_matches_naive_windows(bufsz):
+    embs = np.random.default_rng(1).normal(size=(7, 5)).astype(np.float32)
+
+    means = vector.windowed_mean(embs, bufsz)
+
+    n = embs.shape[0]
+    expected = np.stack([
+        embs[max(0, i - bufsz): min(n, i + bufsz + 1)].mean(axis=0) for i in range(n)
+    ])
+    assert means.shape == embs.shape
+    assert np.allclose(means, expected, atol=1e-5)
+
+
+def test_windowed_mean_raises_on_negative_bufsz():
+    with pytest.raises(ValueError):
+        vector.windowed_mean(np.ones((2, 2)), -1)
+
+
+class LengthEncoder:
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_embed_texts_encodes_each_distinct_text_once(tmp_path, monkeypatch):
+    encoder = LengthEncoder()
+    store = EmbeddingStore("dummy", root_dir=str(tmp_path))
+    monkeypatch.setattr(vector, "get_embedding_store", lambda model_name: store)
+    monkeypatch.setattr(vector, "get_embedding_service", lambda model_name: encoder)
+
+    # The store starts out empty, without a known dimension.
+    first = vector.embed_texts(["a", "bb", "a"], model_name="dummy")
+    second = vector.embed_texts(["bb", "ccc"], model_name="dummy")
+
+    assert first.tolist() == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert second.tolist() == [[2.0, 1.0], [3.0, 1.0]]
+    assert encoder.texts == ["a", "bb", "ccc"]